@@ -4,6 +4,8 @@ import os
 
 
 class AnalysisLevels:
+    # The number of worker processes that an analysis level may use
+    processes = 1
 
     @staticmethod
     def create_directory(path: str) -> None:
@@ -0,0 +1,115 @@
+import json
+from typing import List, Tuple
+
+import numpy as np
+import scipy.sparse
+
+
+class LabeledArray:
+    """
+    This class stores a matrix that is exchanged between the analysis stages (e.g., the performance values of the
+    configurations or the influences of the terms). The values are written in the npy format so that they can be
+    memory-mapped without unpickling; the description file next to it contains the shape, the dtype, and the labels
+    of each axis (e.g., the releases and the configuration keys).
+    """
+
+    Description_Suffix = ".json"
+
+    def __init__(self, values: np.ndarray, axes: List[Tuple[str, List]]) -> None:
+        """
+        :param values: the matrix
+        :param axes: the name and the labels of each axis
+        """
+        if len(axes) != values.ndim or any(len(labels) != size for (name, labels), size in zip(axes, values.shape)):
+            print(f"The axes {[name for name, labels in axes]} do not match the shape {values.shape}!")
+            exit(-1)
+        self.values = values
+        self.axes = axes
+
+    def get_labels(self, axis: str) -> List:
+        for name, labels in self.axes:
+            if name == axis:
+                return labels
+        print(f"Unknown axis {axis}!")
+        exit(-1)
+
+    def get_index(self, axis: str, label) -> int:
+        return self.get_labels(axis).index(label)
+
+    def store(self, path: str) -> None:
+        """
+        Writes the values to the given path and the description to the path with the suffix '.json'.
+        :param path: the path of the values
+        """
+        values = np.ascontiguousarray(self.values)
+        with open(path, 'wb') as values_file:
+            np.save(values_file, values, allow_pickle=False)
+        with open(path + self.Description_Suffix, 'w') as description_file:
+            json.dump(dict(shape=list(values.shape), dtype=values.dtype.str,
+                           axes=[dict(name=name, labels=list(labels)) for name, labels in self.axes]),
+                      description_file)
+
+    @classmethod
+    def load(cls, path: str, memory_map: bool = True) -> 'LabeledArray':
+        """
+        Reads the matrix from the given path.
+        :param path: the path of the values
+        :param memory_map: whether the values are memory-mapped (read-only) instead of read into memory
+        :return: the matrix with its axes
+        """
+        with open(path + cls.Description_Suffix, 'r') as description_file:
+            description = json.load(description_file)
+        values = np.load(path, mmap_mode='r' if memory_map else None, allow_pickle=False)
+        if list(values.shape) != description['shape'] or values.dtype.str != description['dtype']:
+            print(f"The values in {path} do not match their description!")
+            exit(-1)
+        return cls(values, [(axis['name'], axis['labels']) for axis in description['axes']])
+
+
+class SparseLabeledArray(LabeledArray):
+    """
+    This class stores a matrix that contains mostly zeros (e.g., the significant performance changes between
+    releases) in the compressed sparse row format. Only the non-zero values and their positions are written; the
+    description file is the same as for dense matrices.
+    """
+
+    def __init__(self, values: scipy.sparse.csr_matrix, axes: List[Tuple[str, List]]) -> None:
+        """
+        :param values: the sparse matrix
+        :param axes: the name and the labels of each axis
+        """
+        super().__init__(scipy.sparse.csr_matrix(values), axes)
+
+    def store(self, path: str) -> None:
+        """
+        Writes the sparse values to the given path and the description to the path with the suffix '.json'.
+        :param path: the path of the values
+        """
+        with open(path, 'wb') as values_file:
+            scipy.sparse.save_npz(values_file, self.values, compressed=False)
+        with open(path + self.Description_Suffix, 'w') as description_file:
+            json.dump(dict(shape=list(self.values.shape), dtype=self.values.dtype.str, format=self.values.format,
+                           axes=[dict(name=name, labels=list(labels)) for name, labels in self.axes]),
+                      description_file)
+
+    @classmethod
+    def load(cls, path: str, memory_map: bool = False) -> 'SparseLabeledArray':
+        """
+        Reads the sparse matrix from the given path.
+        :param path: the path of the values
+        :param memory_map: unused, since the compressed values are always read into memory
+        :return: the sparse matrix with its axes
+        """
+        with open(path + cls.Description_Suffix, 'r') as description_file:
+            description = json.load(description_file)
+        values = scipy.sparse.load_npz(path)
+        if list(values.shape) != description['shape'] or values.dtype.str != description['dtype']:
+            print(f"The values in {path} do not match their description!")
+            exit(-1)
+        return cls(values, [(axis['name'], axis['labels']) for axis in description['axes']])
+
+    def to_dense(self) -> LabeledArray:
+        """
+        :return: the matrix with the same axes in which the missing values are 0
+        """
+        return LabeledArray(self.values.toarray(), self.axes)
@@ -0,0 +1,78 @@
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+
+class BitmapIndex:
+    """
+    This class is an inverted index that maps each option to a bitmap of the items (e.g., configurations or terms)
+    containing this option. The bitmaps are packed into bytes (8 items per byte); thus, set operations on items
+    (e.g., all configurations containing every option of a term) are bitwise operations on a few bytes and counting
+    the items is a popcount.
+    """
+
+    Popcount = np.array([bin(value).count("1") for value in range(256)], dtype=np.int64)
+
+    def __init__(self, items: List, selection: np.ndarray, options: List[str]) -> None:
+        """
+        :param items: the items in the order of the rows of the selection
+        :param selection: a boolean matrix (items x options) stating which item contains which option
+        :param options: the options in the order of the columns of the selection
+        """
+        self.items = items
+        self.bitmaps: Dict[str, np.ndarray] = {option: bitmap for option, bitmap in
+                                               zip(options, np.packbits(np.asarray(selection, dtype=bool).T, axis=1))}
+        self.all_items = self.from_mask(np.ones(len(items), dtype=bool))
+        self.no_items = self.from_mask(np.zeros(len(items), dtype=bool))
+
+    @classmethod
+    def from_option_sets(cls, items: List, option_sets: List[Iterable[str]]) -> 'BitmapIndex':
+        """
+        Creates the index of items that are given as sets of options (e.g., terms or configuration strings).
+        :param items: the items
+        :param option_sets: the options of each item
+        :return: the index
+        """
+        option_sets = [set(option_set) for option_set in option_sets]
+        options = sorted(set().union(*option_sets))
+        selection = np.array([[option in option_set for option in options] for option_set in option_sets],
+                             dtype=bool).reshape(len(items), len(options))
+        return cls(items, selection, options)
+
+    def from_mask(self, mask: np.ndarray) -> np.ndarray:
+        return np.packbits(np.asarray(mask, dtype=bool))
+
+    def get_bitmap(self, option: str) -> np.ndarray:
+        return self.bitmaps.get(option, self.no_items)
+
+    def select_supersets(self, options: Iterable[str]) -> np.ndarray:
+        """
+        :param options: the options (e.g., of a term)
+        :return: the bitmap of the items containing all given options
+        """
+        bitmap = self.all_items
+        for option in options:
+            bitmap = bitmap & self.get_bitmap(option)
+        return bitmap
+
+    def select_subsets(self, options: Iterable[str]) -> np.ndarray:
+        """
+        :param options: the options (e.g., the selected options of a configuration)
+        :return: the bitmap of the items whose options are all contained in the given options
+        """
+        options = set(options)
+        excluded = self.no_items
+        for option, bitmap in self.bitmaps.items():
+            if option not in options:
+                excluded = excluded | bitmap
+        return self.all_items & ~excluded
+
+    def count(self, bitmap: np.ndarray) -> int:
+        return int(self.Popcount[bitmap].sum())
+
+    def get_items(self, bitmap: np.ndarray) -> List:
+        """
+        :param bitmap: the bitmap of items
+        :return: the items of the bitmap in the order of the index
+        """
+        return [self.items[i] for i in np.flatnonzero(np.unpackbits(bitmap, count=len(self.items)))]
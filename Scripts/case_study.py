@@ -1,5 +1,10 @@
 from feature import Feature
-from typing import List
+from feature_model import FeatureModel
+from measurement_cache import MeasurementCache
+from bitmap_index import BitmapIndex
+from typing import Dict, List, Tuple
+import copy
+import numpy as np
 import pandas as pd
 import xml.etree.ElementTree as ET
 import sys
@@ -11,20 +16,106 @@ import process_workloads
 class CaseStudy:
 
     Performance = "performance"
+    Configuration_Key = "configuration_key"
     Case_Studies_In_Milliseconds = ["lrzip", "PostgreSQL", "VP8", "VP9"]
+    # Measurements with this performance value ran into the timeout
+    Timeout = 1800
+    Compiled_Feature_Model = "feature_model.json"
+    # Whether the measurements are encoded compactly (see compact_measurements) and the type of the performance values
+    Compact = False
+    Float_Type = "float64"
+    # The keys of the materialized means (see compute_aggregates)
+    Mean_Performance = "performance"
+    Mean_Performance_Without_Timeouts = "performance_without_timeouts"
+    Mean_Deviation_Per_Workload = "deviation_per_workload"
+    Mean_Deviation_All_Workloads = "deviation_all_workloads"
 
-    def __init__(self, name: str, feature_model_path: str, measurements_path: str, deviations_path: str) -> None:
-        self.features = dict()
+    def __init__(self, name: str, feature_model_path: str, measurements_path: str, deviations_path: str,
+                 cache_path: str = None, compact: bool = None, float_type: str = None) -> None:
+        self.features: Dict[str, Feature] = dict()
+        self.feature_model: FeatureModel = None
         self.configurations = None
         self.deviations = None
+        self.binary_options: List[str] = []
+        self.configuration_bitsets: np.ndarray = None
+        self.configuration_keys: Dict[bytes, int] = dict()
+        self.option_indexes: Dict[Tuple[str, str], BitmapIndex] = dict()
+        # The lookup of the measurements by (workload, revision, configuration key); see get_measurements
+        self.workload_codes: Dict[str, int] = dict()
+        self.revision_codes: Dict[str, int] = dict()
+        self.measurement_index: pd.Index = None
+        self.mean_performance: np.ndarray = None
+        self.relative_deviation: np.ndarray = None
+        # The materialized means per workload and revision; see compute_aggregates
+        self.aggregates: Dict[str, pd.Series] = dict()
         self.name = name
-        self.read_feature_model(feature_model_path)
-        self.read_measurements(measurements_path)
-        self.read_deviations(deviations_path)
+        self.read_feature_model(feature_model_path, cache_path)
+        if cache_path is None:
+            self.read_measurements(measurements_path)
+            self.read_deviations(deviations_path)
+        else:
+            self.read_cached_measurements(cache_path, feature_model_path, measurements_path, deviations_path)
+        self.add_configuration_keys()
+        if self.Compact if compact is None else compact:
+            self.compact_measurements(self.Float_Type if float_type is None else float_type)
 
     def __str__(self) -> str:
         return self.name
 
+    def without_measurements(self) -> 'CaseStudy':
+        """
+        Creates a copy of the case study that contains the feature model but neither the measurements nor the data
+        derived from them (e.g., to transfer the case study to worker processes that attach to shared measurements).
+        :return: the copy of the case study
+        """
+        case_study = copy.copy(self)
+        case_study.configurations = None
+        case_study.deviations = None
+        case_study.configuration_bitsets = None
+        case_study.configuration_keys = dict()
+        case_study.option_indexes = dict()
+        case_study.measurement_index = None
+        case_study.mean_performance = None
+        case_study.relative_deviation = None
+        case_study.aggregates = dict()
+        return case_study
+
+    def compact_measurements(self, float_type: str) -> None:
+        """
+        Encodes the measurements and deviations compactly: the binary options as uint8 (0 or 1) instead of the strings
+        "0" and "1", the workload and the revision as categoricals, and the performance values with the given float
+        type. The option values have to be accessed by <code>get_selection</code> and <code>is_selected</code>,
+        which support both encodings.
+        :param float_type: the float type of the performance values (e.g., 'float32' or 'float64')
+        """
+        for frame in (self.configurations, self.deviations):
+            for option in self.binary_options:
+                frame[option] = self.get_selection(frame, [option])[:, 0].astype(np.uint8)
+            for column in [process_workloads.WORKLOAD_COLUMN_NAME, 'revision']:
+                frame[column] = frame[column].astype('category')
+            frame[self.Performance] = frame[self.Performance].astype(float_type)
+
+    @staticmethod
+    def get_selection(frame: pd.DataFrame, options: List[str]) -> np.ndarray:
+        """
+        Returns which of the given options are selected in each row of the given data frame.
+        :param frame: the measurements or a part of them
+        :param options: the option columns
+        :return: a boolean matrix (rows x options)
+        """
+        values = frame[options].to_numpy()
+        if values.dtype == object:
+            return (values == "1") | (values == 1)
+        return values != 0
+
+    @staticmethod
+    def is_selected(value) -> bool:
+        """
+        :param value: the value of an option column (e.g., of a record of the measurements)
+        :return: <code>True</code> iff the option is selected
+        """
+        return value == "1" or (not isinstance(value, str) and value == 1)
+
     def get_division_factor(self):
         if self.name in self.Case_Studies_In_Milliseconds:
             return 1000
@@ -37,15 +128,28 @@ class CaseStudy:
             result.append(option_node.text)
         return result
 
-    def read_feature_model(self, path: str) -> None:
+    def read_feature_model(self, path: str, cache_path: str = None) -> None:
+        """
+        Reads the features and compiles the feature model. If a cache directory is given, the compiled feature model
+        is read from the cache unless the feature model file changed.
+        :param path: the path to the feature model
+        :param cache_path: the directory of the cache
+        """
+        source_hash = FeatureModel.compute_hash(path)
+        compiled_path = None
+        if cache_path is not None:
+            compiled_path = os.path.join(cache_path, f"{self.name}_{self.Compiled_Feature_Model}")
+            self.feature_model = FeatureModel.load(compiled_path, source_hash)
+            if self.feature_model is not None:
+                self.features = self.feature_model.to_features()
+                return
+
         with open(path, 'r') as feature_model_file:
             root = ET.parse(feature_model_file).getroot()
 
             binary_options = root.find('binaryOptions')
             numeric_options = root.find('numericOptions')
 
-            children_relation = dict()
-
             # Parse binary options
             for binary_option in binary_options:
                 name = binary_option.find('name').text
@@ -54,10 +158,6 @@ class CaseStudy:
                 excluded_options = self.get_options(binary_option.find('excludedOptions'))
                 implied_options = self.get_options(binary_option.find('impliedOptions'))
                 self.features[name] = Feature(name, parent, excluded_options, implied_options, mandatory)
-                if name != "root" and parent not in children_relation:
-                    children_relation[parent] = []
-                if name != "root":
-                    children_relation[parent].append(name)
 
             # Parse numeric options
             for numeric_option in numeric_options:
@@ -66,50 +166,13 @@ class CaseStudy:
                 excluded_options = self.get_options(binary_option.find('excludedOptions'))
                 implied_options = self.get_options(binary_option.find('impliedOptions'))
                 self.features[name] = Feature(name, parent, excluded_options, implied_options)
-                if name != "root" and parent not in children_relation:
-                    children_relation[parent] = []
-                if name != "root":
-                    children_relation[parent].append(name)
-
-            # Add children
-            for feature_name in children_relation.keys():
-                self.features[feature_name].children = children_relation[feature_name]
-
-            # Add alternatives
-            for feature_name in self.features.keys():
-                if self.is_alternative_group(feature_name):
-                    for child in self.features[feature_name].children:
-                        other_children = self.features[feature_name].children.copy()
-                        other_children.remove(child)
-                        self.features[child].alternatives = other_children
-
-            # Decide whether the features are strictly mandatory
-            for feature_name in self.features.keys():
-                self.features[feature_name].strictly_mandatory = self.is_strictly_mandatory(feature_name)
-
-    def is_alternative_group(self, feature_name: str) -> bool:
-        """
-        This method checks whether the given feature is the parent of an alternative group or not. An alternative
-        group contains only mandatory features and each of the features excludes all others.
-        :param feature_name: the name of the parent node
-        :return: <code>True</code> iff the given feature is an alternative group
-        """
-        if feature_name not in self.features.keys():
-            print(f"Feature {feature_name} not in feature list!")
-            exit(-1)
-        feature: Feature = self.features[feature_name]
-        if len(feature.children) <= 1:
-            return False
-        for child in feature.children:
-            child_feature: Feature = self.features[child]
-            if not child_feature.mandatory:
-                return False
-            for other_child in feature.children:
-                if other_child == child:
-                    continue
-                if other_child not in child_feature.exclusions:
-                    return False
-        return True
+
+        # The children, the alternatives, and whether the features are strictly mandatory are derived once
+        self.feature_model = FeatureModel.from_features(self.features, source_hash)
+        self.features = self.feature_model.to_features()
+        if compiled_path is not None:
+            os.makedirs(cache_path, exist_ok=True)
+            self.feature_model.store(compiled_path)
 
     def is_strictly_mandatory(self, feature_name: str) -> bool:
         """
@@ -118,27 +181,7 @@ class CaseStudy:
         :return: <code>true</code> iff the feature and all its parents are mandatory and do not belong to an alternative
          group.
         """
-        if feature_name not in self.features.keys():
-            print(f"Feature {feature_name} not in feature list!")
-            exit(-1)
-        if feature_name == "root":
-            return True
-        feature: Feature = self.features[feature_name]
-        # A numerical feature (mandatory = None) is also strictly mandatory
-        if not feature.binary:
-            return True
-        if not feature.mandatory:
-            return False
-        if len(feature.alternatives) > 0:
-            return False
-        if len(feature.exclusions) > 0:
-            return False
-        parent = self.features[feature.parent]
-        while parent.name != "root":
-            if not parent.mandatory or len(parent.exclusions) > 0:
-                return False
-            parent = self.features[parent.parent]
-        return True
+        return self.feature_model.is_strictly_mandatory(feature_name)
 
     def get_all_feature_names(self) -> List[str]:
         """
@@ -161,3 +204,183 @@ class CaseStudy:
             self.deviations = pd.read_csv(deviation_file, sep=';', lineterminator='\n', dtype=str)
             self.deviations = process_workloads.convert_measurements_file(self.deviations, self.name)
         self.deviations['performance'] = pd.to_numeric(self.deviations['performance'])
+
+    def read_cached_measurements(self, cache_path: str, feature_model_path: str, measurements_path: str,
+                                 deviations_path: str) -> None:
+        """
+        Reads the measurements and deviations from the binary cache if the input files did not change. Otherwise, the
+        csv files are parsed and the converted data frames are written to the cache.
+        :param cache_path: the directory of the cache
+        :param feature_model_path: the path to the feature model
+        :param measurements_path: the path to the measurements
+        :param deviations_path: the path to the deviations
+        """
+        cache = MeasurementCache(cache_path)
+        key = cache.compute_key(self.name, [feature_model_path, measurements_path, deviations_path],
+                                process_workloads.WORKLOADS.get(self.name))
+        self.configurations = cache.load(key, "measurements")
+        self.deviations = cache.load(key, "deviations")
+        if self.configurations is None:
+            self.read_measurements(measurements_path)
+            cache.store(key, "measurements", self.configurations)
+        if self.deviations is None:
+            self.read_deviations(deviations_path)
+            cache.store(key, "deviations", self.deviations)
+
+    def add_configuration_keys(self) -> None:
+        """
+        Adds the column <code>Configuration_Key</code> to the measurements and deviations. The binary options of each
+        row are packed into a fixed-width bitset and each distinct bitset is mapped to a dense integer key. Thereby,
+        configurations can be joined and looked up by a single integer column instead of all option columns.
+        The keys are ordered by the bitsets and are, hence, identical for the measurements and the deviations.
+        """
+        self.binary_options = [feature_name for feature_name in self.features
+                               if self.features[feature_name].binary and feature_name in self.configurations.columns]
+        bitsets = [self.pack_options(frame) for frame in (self.configurations, self.deviations)]
+        self.configuration_bitsets, keys = np.unique(np.concatenate(bitsets), axis=0, return_inverse=True)
+        keys = keys.reshape(-1).astype(np.int64)
+        self.configuration_keys = {bitset.tobytes(): key for key, bitset in enumerate(self.configuration_bitsets)}
+        self.configurations[self.Configuration_Key] = keys[:len(bitsets[0])]
+        self.deviations[self.Configuration_Key] = keys[len(bitsets[0]):]
+
+    def pack_options(self, frame: pd.DataFrame) -> np.ndarray:
+        """
+        Packs the binary options of each row of the given data frame into a bitset.
+        :param frame: the data frame containing the option columns
+        :return: a matrix with one packed bitset (uint8) per row
+        """
+        return np.packbits(self.get_selection(frame, self.binary_options), axis=1)
+
+    def get_configuration_key(self, selected_options: List[str]) -> int:
+        """
+        Returns the key of the configuration where exactly the given options (and the root) are selected.
+        :param selected_options: the selected binary options of the configuration
+        :return: the configuration key or -1 if the configuration was not measured
+        """
+        selection = np.array([option in selected_options or option == "root" for option in self.binary_options])
+        return self.configuration_keys.get(np.packbits(selection).tobytes(), -1)
+
+    def get_option_index(self, workload: str, revision: str) -> BitmapIndex:
+        """
+        Returns the index mapping each binary option to the bitmap of the configurations of the given workload and
+        revision that select it. The items of the index are the row labels of the configurations.
+        :param workload: the workload
+        :param revision: the revision
+        :return: the (cached) index
+        """
+        if len(self.option_indexes) == 0:
+            slices = self.configurations.groupby([process_workloads.WORKLOAD_COLUMN_NAME, 'revision'], sort=False,
+                                                 observed=True)
+            selection = self.get_selection(self.configurations, self.binary_options)
+            for key, rows in slices.indices.items():
+                self.option_indexes[key] = BitmapIndex(list(self.configurations.index[rows]), selection[rows],
+                                                       self.binary_options)
+        if (workload, revision) not in self.option_indexes:
+            self.option_indexes[(workload, revision)] = BitmapIndex([], np.zeros((0, len(self.binary_options))),
+                                                                    self.binary_options)
+        return self.option_indexes[(workload, revision)]
+
+    def encode_measurement_keys(self, workloads, revisions, configuration_keys) -> np.ndarray:
+        """
+        Combines the workload, the revision, and the configuration key into a single integer key.
+        :return: the combined keys, where -1 marks unknown workloads, revisions, or configurations
+        """
+        workload_codes = np.array([self.workload_codes.get(workload, -1) for workload in workloads], dtype=np.int64)
+        revision_codes = np.array([self.revision_codes.get(revision, -1) for revision in revisions], dtype=np.int64)
+        configuration_keys = np.asarray(configuration_keys, dtype=np.int64)
+        keys = (workload_codes * len(self.revision_codes) + revision_codes) * len(self.configuration_bitsets) + \
+            configuration_keys
+        return np.where((workload_codes < 0) | (revision_codes < 0) | (configuration_keys < 0), -1, keys)
+
+    def build_measurement_lookup(self) -> None:
+        """
+        Builds the hash index over the measurements keyed by (workload, revision, configuration key) and aligns the
+        relative deviations with it. If a key occurs more than once, its first row is used.
+        """
+        workload_column = process_workloads.WORKLOAD_COLUMN_NAME
+        self.workload_codes = {workload: code for code, workload in
+                               enumerate(pd.unique(pd.concat([self.configurations[workload_column],
+                                                              self.deviations[workload_column]])))}
+        self.revision_codes = {revision: code for code, revision in
+                               enumerate(pd.unique(pd.concat([self.configurations['revision'],
+                                                              self.deviations['revision']])))}
+        keys = self.encode_measurement_keys(self.configurations[workload_column], self.configurations['revision'],
+                                            self.configurations[self.Configuration_Key])
+        first_occurrences = ~pd.Index(keys).duplicated()
+        self.measurement_index = pd.Index(keys[first_occurrences])
+        self.mean_performance = self.configurations[self.Performance].to_numpy(dtype=float)[first_occurrences]
+
+        deviation_keys = self.encode_measurement_keys(self.deviations[workload_column], self.deviations['revision'],
+                                                      self.deviations[self.Configuration_Key])
+        first_occurrences = ~pd.Index(deviation_keys).duplicated()
+        positions = self.measurement_index.get_indexer(deviation_keys[first_occurrences])
+        self.relative_deviation = np.full(len(self.measurement_index), np.nan)
+        self.relative_deviation[positions[positions >= 0]] = self.deviations[self.Performance].to_numpy(
+            dtype=float)[first_occurrences][positions >= 0]
+
+    def get_measurements(self, workloads: List[str], revisions: List[str],
+                         configuration_keys: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Looks up the mean performance and the relative deviation of the given configurations. Each query is a hash
+        lookup; thus, many configurations can be queried at once.
+        :param workloads: the workload of each query
+        :param revisions: the revision of each query
+        :param configuration_keys: the configuration key of each query
+        :return: the mean performance and the relative deviation of each query (NaN if not measured)
+        """
+        if self.measurement_index is None:
+            self.build_measurement_lookup()
+        positions = self.measurement_index.get_indexer(
+            self.encode_measurement_keys(workloads, revisions, configuration_keys))
+        found = positions >= 0
+        performance = np.where(found, self.mean_performance[positions], np.nan)
+        deviation = np.where(found, self.relative_deviation[positions], np.nan)
+        return performance, deviation
+
+    def compute_aggregates(self) -> None:
+        """
+        Materializes the mean performance (with and without timeouts) and the mean relative deviation of each
+        workload and revision as well as the mean relative deviation of each revision across all workloads. Each
+        aggregate is computed in a single grouped pass.
+        """
+        workload_column = process_workloads.WORKLOAD_COLUMN_NAME
+        timeouts = self.configurations[self.Performance] == self.Timeout
+        for key, configurations in [(self.Mean_Performance, self.configurations),
+                                    (self.Mean_Performance_Without_Timeouts, self.configurations[~timeouts])]:
+            self.aggregates[key] = configurations.groupby([workload_column, 'revision'], sort=False, observed=True)[
+                self.Performance].mean()
+        self.aggregates[self.Mean_Deviation_Per_Workload] = self.deviations.groupby(
+            [workload_column, 'revision'], sort=False, observed=True)[self.Performance].mean()
+        self.aggregates[self.Mean_Deviation_All_Workloads] = self.deviations.groupby(
+            'revision', sort=False, observed=True)[self.Performance].mean()
+
+    def get_revisions(self) -> List[str]:
+        return list(dict.fromkeys(self.configurations.revision))
+
+    def order_by_revisions(self, means: pd.Series) -> pd.DataFrame:
+        revisions = [revision for revision in self.get_revisions() if revision in means.index]
+        return means.reindex(revisions).to_frame(self.Performance).rename_axis('revision')
+
+    def get_mean_performance(self, workload: str, exclude_timeouts: bool = True) -> pd.DataFrame:
+        """
+        :param workload: the workload
+        :param exclude_timeouts: whether measurements that ran into the timeout are ignored
+        :return: the mean performance of each revision (in the order of the measurements) in the column 'performance'
+        """
+        if len(self.aggregates) == 0:
+            self.compute_aggregates()
+        means = self.aggregates[self.Mean_Performance_Without_Timeouts if exclude_timeouts else self.Mean_Performance]
+        return self.order_by_revisions(means.loc[workload] if workload in means.index.levels[0] else means.iloc[:0])
+
+    def get_mean_deviation(self, workload: str = None) -> pd.DataFrame:
+        """
+        :param workload: the workload or <code>None</code> for the mean across all workloads
+        :return: the mean relative deviation of each revision (in the order of the measurements) in the column
+        'performance'
+        """
+        if len(self.aggregates) == 0:
+            self.compute_aggregates()
+        if workload is None:
+            return self.order_by_revisions(self.aggregates[self.Mean_Deviation_All_Workloads])
+        means = self.aggregates[self.Mean_Deviation_Per_Workload]
+        return self.order_by_revisions(means.loc[workload] if workload in means.index.levels[0] else means.iloc[:0])
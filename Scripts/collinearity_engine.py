@@ -0,0 +1,130 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy.linalg import solve_triangular
+
+
+class CollinearityEngine:
+    """
+    This class detects perfect multicollinearity incrementally. It maintains a thin QR factorization of the accepted
+    columns of the design matrix (starting with the intercept) that is updated by Gram-Schmidt with
+    reorthogonalization whenever a column is added. A column that lies in the span of the accepted columns is rejected
+    and the factorization is left untouched; the terms it conflicts with are the accepted columns with a non-zero
+    coefficient in its linear combination. These are exactly the columns whose VIF would be infinite.
+    Thereby, adding a column costs O(rows * accepted columns) instead of a VIF analysis of the whole design matrix.
+    """
+
+    Intercept = "Intercept"
+    Tolerance = 1e-9
+    # Forming the Gram matrix squares the condition number; thus, its pivots need a looser tolerance
+    Gram_Tolerance = 1e-10
+
+    def __init__(self, number_rows: int, number_columns: int) -> None:
+        """
+        :param number_rows: the number of rows of the design matrix
+        :param number_columns: the number of columns that are going to be added (without the intercept); the
+        factorization grows if more columns are accepted
+        """
+        # The rank of the design matrix cannot exceed the number of rows or the number of columns; Q is stored in
+        # column-major order so that its accepted columns are contiguous
+        capacity = min(number_rows, number_columns + 1)
+        self.q = np.zeros((number_rows, capacity), order='F')
+        self.r = np.zeros((capacity, capacity))
+        self.names: List[str] = []
+        self.rank = 0
+        self.add_column(self.Intercept, np.ones(number_rows))
+
+    def grow(self) -> None:
+        """
+        Doubles the number of columns of the factorization (at most up to the number of rows).
+        """
+        capacity = min(self.q.shape[0], 2 * self.q.shape[1])
+        q = np.zeros((self.q.shape[0], capacity), order='F')
+        q[:, :self.rank] = self.q[:, :self.rank]
+        r = np.zeros((capacity, capacity))
+        r[:self.rank, :self.rank] = self.r[:self.rank, :self.rank]
+        self.q, self.r = q, r
+
+    def orthogonalize(self, column: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Projects the given column onto the orthogonal complement of the accepted columns.
+        :param column: the column to project
+        :return: the coefficients with regard to the orthonormal basis and the residual
+        """
+        q = self.q[:, :self.rank]
+        coefficients = q.T @ column
+        residual = column - q @ coefficients
+        # The second pass compensates the loss of orthogonality of classical Gram-Schmidt
+        correction = q.T @ residual
+        residual -= q @ correction
+        return coefficients + correction, residual
+
+    def find_dependencies(self, coefficients: np.ndarray) -> List[str]:
+        """
+        Solves R c = Q^T x to express a dependent column as linear combination of the accepted columns.
+        :param coefficients: the coefficients of the dependent column with regard to the orthonormal basis
+        :return: the names of the accepted columns (without the intercept) that have a non-zero coefficient
+        """
+        combination = solve_triangular(self.r[:self.rank, :self.rank], coefficients)
+        threshold = self.Tolerance * max(1.0, float(np.max(np.abs(combination), initial=0.0)))
+        return [self.names[i] for i in range(self.rank)
+                if abs(combination[i]) > threshold and self.names[i] != self.Intercept]
+
+    def add_column(self, name: str, column: np.ndarray) -> Tuple[List[str], float]:
+        """
+        Adds the given column to the factorization if it is linearly independent of the accepted columns.
+        :param name: the name of the column
+        :param column: the values of the column
+        :return: the conflicting columns (including the given one) and the corresponding VIF value (infinity or NaN
+        for constant columns); the list is empty if the column was accepted
+        """
+        column = np.asarray(column, dtype=float)
+        norm = np.linalg.norm(column)
+        coefficients, residual = self.orthogonalize(column)
+        residual_norm = np.linalg.norm(residual)
+        if residual_norm <= self.Tolerance * max(norm, 1.0):
+            vif_value = float('nan') if np.all(column == column[0]) else float('inf')
+            return self.find_dependencies(coefficients) + [name], vif_value
+        if self.rank == self.q.shape[1]:
+            self.grow()
+        self.q[:, self.rank] = residual / residual_norm
+        self.r[:self.rank, self.rank] = coefficients
+        self.r[self.rank, self.rank] = residual_norm
+        self.names.append(name)
+        self.rank += 1
+        return [], 0.0
+
+    @classmethod
+    def find_dependent_columns(cls, names: List[str], matrix: np.ndarray) -> Dict[int, Tuple[List[str], float]]:
+        """
+        Determines the maximal linearly independent subset of the columns of the given design matrix in the order of
+        the columns. To this end, a Cholesky decomposition of the Gram matrix is computed column by column, where
+        columns with a vanishing pivot are skipped. Thereby, the design matrix is only multiplied once.
+        :param names: the names of the columns, where the first column is the intercept
+        :param matrix: the design matrix
+        :return: a dictionary mapping the index of each dependent column to its conflicting columns (including the
+        column itself) and the corresponding VIF value
+        """
+        gram = matrix.T @ matrix
+        number_columns = len(names)
+        factor = np.zeros((number_columns, min(matrix.shape)))
+        independent_columns: List[int] = []
+        dependencies: Dict[int, Tuple[List[str], float]] = dict()
+        for j in range(number_columns):
+            rank = len(independent_columns)
+            pivot = gram[j, j] - factor[j, :rank] @ factor[j, :rank]
+            # The pivot is the squared norm of the residual of the column
+            if pivot <= cls.Gram_Tolerance * max(gram[j, j], 1.0):
+                column = matrix[:, j]
+                vif_value = float('nan') if np.all(column == column[0]) else float('inf')
+                combination = solve_triangular(factor[independent_columns, :rank], factor[j, :rank], lower=True,
+                                               trans='T') if rank > 0 else np.zeros(0)
+                threshold = cls.Tolerance * max(1.0, float(np.max(np.abs(combination), initial=0.0)))
+                conflicting_columns = [names[independent_columns[i]] for i in range(rank)
+                                       if abs(combination[i]) > threshold
+                                       and names[independent_columns[i]] != cls.Intercept]
+                dependencies[j] = (conflicting_columns + [names[j]], vif_value)
+                continue
+            factor[j:, rank] = (gram[j:, j] - factor[j:, :rank] @ factor[j, :rank]) / np.sqrt(pivot)
+            independent_columns.append(j)
+        return dependencies
@@ -1,15 +1,17 @@
 import json
 from typing import Tuple
 
-import matplotlib.colors
-
 from PerformanceEvolution.recall_analyzer import RecallAnalyzer
 from analysis_levels import AnalysisLevels
+from array_store import LabeledArray, SparseLabeledArray
+from configuration_tensor import ConfigurationTensor
+from plot_renderer import PlotRenderer
+from shared_measurements import SharedMeasurements
+from stage_profiler import StageProfiler
 import csv
+from concurrent.futures import ProcessPoolExecutor
 from shutil import copyfile
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pandas import pivot_table
 import subprocess
 from utilities import *
@@ -23,6 +25,10 @@ import process_workloads
 class ConfigurationLevel(AnalysisLevels):
     name = "ConfigurationLevel"
 
+    # The case study (without measurements) and the shared measurements of a worker process of the process pool
+    worker_case_study: CaseStudy = None
+    worker_measurements: SharedMeasurements = None
+
     @staticmethod
     def execute_command(command: str) -> str:
         output = subprocess.getstatusoutput(command)
@@ -95,17 +101,73 @@ class ConfigurationLevel(AnalysisLevels):
         input_path = os.path.join(input_path, case_study.name)
         workloads = process_workloads.WORKLOADS[str(case_study.name)]
         # Create one dataframe for each workload
-        for workload in workloads:
+        if self.processes > 1:
+            # The workloads are independent; the changes are collected in the workers and added afterward in the
+            # order of the workloads so that the results are identical to the sequential execution.
+            # The measurements are published once in shared memory instead of being pickled into every worker.
+            with SharedMeasurements.publish(case_study.configurations, case_study.deviations) as measurements, \
+                    ProcessPoolExecutor(max_workers=self.processes, initializer=ConfigurationLevel.initialize_worker,
+                                        initargs=(case_study.without_measurements(), measurements.path,
+                                                  PlotRenderer.get_settings(),
+                                                  StageProfiler.get_settings())) as executor:
+                changes_per_workload = list(executor.map(ConfigurationLevel.process_workload, workloads,
+                                                         [path] * len(workloads), [input_path] * len(workloads)))
+        else:
+            changes_per_workload = [self.process_workload(workload, path, input_path, case_study)
+                                    for workload in workloads]
+        for changes in changes_per_workload:
+            for release, workload, config, difference in changes:
+                self.add_change(release, workload, config, difference)
+        self.generate_barplots_per_release(case_study, path)
+
+    @staticmethod
+    def write_dense_differences(case_study: CaseStudy, input_path: str) -> None:
+        """
+        Writes the differences between the releases of each workload as dense matrix (configuration_difference_*),
+        which can be read by np.load. Since the dense matrices are large, they are only written for the analyses
+        reading them.
+        :param input_path: the directory of the case study containing the sparse_configuration_difference_* files
+        """
+        for workload in process_workloads.WORKLOADS[str(case_study.name)]:
+            differences = SparseLabeledArray.load(
+                os.path.join(input_path, f"sparse_configuration_difference_{workload}"))
+            differences.to_dense().store(os.path.join(input_path, f"configuration_difference_{workload}"))
+
+    @staticmethod
+    def initialize_worker(case_study: CaseStudy, measurements_path: str, plot_settings: Dict,
+                          profiler_settings: Dict) -> None:
+        """
+        Initializes a worker process of the process pool: the case study (without its measurements) is transferred
+        only once per worker, the worker attaches to the shared measurements, and the settings of the plot renderer
+        and the profiler of the main process are applied.
+        """
+        ConfigurationLevel.worker_case_study = case_study
+        ConfigurationLevel.worker_measurements = SharedMeasurements.attach(measurements_path)
+        PlotRenderer.configure(plot_settings, worker=True)
+        StageProfiler.configure(profiler_settings, worker=True)
+
+    @staticmethod
+    def process_workload(workload: str, path: str, input_path: str,
+                         case_study: CaseStudy = None) -> List[Tuple[str, str, Dict, float]]:
+        """
+        Generates the data and plots of a single workload.
+        :return: the configuration-level changes of the workload in the order they were found
+        """
+        if case_study is None:
+            case_study = ConfigurationLevel.worker_case_study
+            workload_configs, deviation_configs = ConfigurationLevel.worker_measurements.get_workload_frames(workload)
+        else:
             workload_configs = case_study.configurations[
                 case_study.configurations[process_workloads.WORKLOAD_COLUMN_NAME] == workload]
             deviation_configs = case_study.deviations[
                 case_study.configurations[process_workloads.WORKLOAD_COLUMN_NAME] == workload]
-            workload_path = os.path.join(path, workload)
-            if not os.path.exists(workload_path):
-                os.mkdir(workload_path)
-            self.generate_workload_plots(case_study, workload_configs, deviation_configs, workload_path, input_path,
-                                         workload)
-        self.generate_barplots_per_release(case_study, path)
+        workload_path = os.path.join(path, workload)
+        if not os.path.exists(workload_path):
+            os.mkdir(workload_path)
+        with StageProfiler.span(f"{ConfigurationLevel.name}/{case_study.name}/{workload}", "workload",
+                                rows=len(workload_configs)):
+            return ConfigurationLevel().generate_workload_plots(case_study, workload_configs, deviation_configs,
+                                                                workload_path, input_path, workload)
 
     def generate_barplots_per_release(self, case_study: CaseStudy, output_path: str) -> None:
         configuration_changes = list()
@@ -116,92 +178,56 @@ class ConfigurationLevel(AnalysisLevels):
             configuration_changes.append(
                 float(self.number_configuration_changes_per_release[releases]) / number_total_configurations * 100.0)
 
-        plt.rcParams['xtick.bottom'] = True
-        plt.figure(figsize=(12, 11))
-        sns.set_color_codes("muted")
-        ax = sns.barplot(
-            x=[label.replace("_", ".") for label in sorted(self.number_configuration_changes_per_release.keys())],
-            y=configuration_changes,
-            color='b')
-
-        fig = ax.get_figure()
-        ax.set_ylabel("Configurations [%]", fontsize=50)
-        ax.set_xlabel("Releases", fontsize=50, labelpad=20)
-        plt.xticks(rotation=45, ha='right')
-        # ax.tick_params(labelsize=50)
-        ax.set_ylim([0, 100])
-
-        fig.tight_layout()
-        fig.savefig(os.path.join(output_path, 'configurationChanges.pdf'))
-        plt.close(fig)
+        PlotRenderer.submit(PlotRenderer.Barplot, os.path.join(output_path, 'configurationChanges.pdf'),
+                            dict(labels=[label.replace("_", ".") for label in
+                                         sorted(self.number_configuration_changes_per_release.keys())],
+                                 values=configuration_changes, figsize=[12, 11], xlabel="Releases",
+                                 ylabel="Configurations [%]", fontsize=50, xlabel_pad=20, xtick_rotation=45,
+                                 ylim=[0, 100]))
 
     def generate_workload_plots(self, case_study: CaseStudy, configurations: pd.DataFrame, deviations: pd.DataFrame,
-                                path: str, input_path: str, workload: str):
+                                path: str, input_path: str, workload: str) -> List[Tuple[str, str, Dict, float]]:
         revisions = list(dict.fromkeys(configurations.revision))
         feature_names = case_study.get_all_feature_names()
         feature_names.append(process_workloads.WORKLOAD_COLUMN_NAME)
-        mean_values = configurations.groupby(feature_names, sort=False).mean()
+        mean_values = configurations.groupby(feature_names, sort=False, observed=True)[
+            [CaseStudy.Performance, CaseStudy.Configuration_Key]].mean()
         mean_values.reset_index(inplace=True)
 
         mean_values = mean_values.sort_values('performance')
         mean_values.reset_index(inplace=True)
         number_configurations = len(mean_values)
         index_converter = dict(zip(mean_values['index'], mean_values.index))
-        self.generate_difference_plots(configurations, deviations, case_study, index_converter, mean_values,
-                                       number_configurations, path, list(reversed(revisions)), input_path, workload)
+        return self.generate_difference_plots(configurations, deviations, case_study, index_converter, mean_values,
+                                              number_configurations, path, list(reversed(revisions)), input_path,
+                                              workload)
 
     def generate_difference_plots(self, all_configurations, all_deviations, case_study, index_converter, mean_values,
-                                  number_configurations, path, revisions, input_path: str, workload: str):
+                                  number_configurations, path, revisions, input_path: str,
+                                  workload: str) -> List[Tuple[str, str, Dict, float]]:
         # (I) Plot them in a heatmap (x-axis = configurations; y-axis = revisions/releases; color = performance)
         # Data preparation
         # all_configurations.set_index(keys=feature_names, inplace=True)
-        plot_data = np.zeros((len(revisions), int(len(mean_values))))
-        plot_data[:] = np.nan
-        deviation_values = np.zeros((len(revisions), int(len(mean_values))))
-        deviation_values[:] = np.nan
-
-        configurations = pd.DataFrame(mean_values)
-        configurations = configurations.drop(columns=["index", "revision", "performance"], axis=1)
-        for y in range(0, len(revisions)):
-            # Filter for releases
-            release_configurations = all_configurations[all_configurations.revision == revisions[y]]
-            merged_configs = configurations.merge(release_configurations, on=configurations.columns.to_list(),
-                                                  how='left', indicator=True)
-            merged_configs = merged_configs.loc[merged_configs._merge == 'both', merged_configs.columns != '_merge']
-            release_workload_configurations = all_deviations[all_deviations.revision == revisions[y]]
-            merged_deviations = configurations.merge(release_workload_configurations,
-                                                     on=configurations.columns.to_list(),
-                                                     how='left', indicator=True)
-            merged_deviations = merged_deviations.loc[
-                merged_deviations._merge == 'both', merged_deviations.columns != '_merge']
-            for idx, row in merged_configs.iterrows():
-                plot_data[len(revisions) - 1 - y, idx] = float(row['performance'])
-            for idx, row in merged_deviations.iterrows():
-                deviation_values[len(revisions) - 1 - y, idx] = float(row['performance'])
+        # The rows of the tensor are ordered chronologically, whereas the given revisions are in reversed order
+        tensor = ConfigurationTensor.from_frames(all_configurations, all_deviations, list(reversed(revisions)),
+                                                 mean_values[CaseStudy.Configuration_Key].to_numpy(dtype=np.int64))
+        plot_data = tensor.performance
+        deviation_values = tensor.deviation
         # Export plot_data
-        deviation_values.dump(os.path.join(input_path, f"deviation_values_{workload}"))
-        plot_data.dump(os.path.join(input_path, f"configuration_values_{workload}"))
+        axes = [("releases", tensor.releases), ("configurations", tensor.configuration_keys.tolist())]
+        LabeledArray(deviation_values, axes).store(os.path.join(input_path, f"deviation_values_{workload}"))
+        LabeledArray(plot_data, axes).store(os.path.join(input_path, f"configuration_values_{workload}"))
 
-        cmap = plt.get_cmap('Oranges')
         fontsize = 30
-        fig = plt.figure(figsize=(15, 10))
-        ax = fig.add_subplot(1, 1, 1)
-        # cm = ax.pcolormesh(plot_data, cmap=cmap)
-        cm = ax.pcolormesh(plot_data, cmap=cmap)  # , norm=matplotlib.colors.LogNorm())
-        ax.set_title(case_study.name, fontsize=fontsize)
-        ax.set_ylabel('Release', fontsize=fontsize)
-        ax.set_xlabel('Configuration', fontsize=fontsize)
-        ax.set_yticks(np.arange(0.5, len(revisions) + 0.5, step=1.0))
-        ax.set_yticklabels(reversed(revisions), fontsize=fontsize)
-        ax.get_xaxis().set_visible(False)
-        cb = fig.colorbar(cm, ax=ax)
-        cb.set_label('Performance [s]', fontsize=fontsize)
-        cb.ax.tick_params(labelsize=fontsize)
-        fig = ax.get_figure()
-        fig.tight_layout()
-        super().create_directory(os.path.join(path, 'AbsolutePerformance'))
-        fig.savefig(os.path.join(path, 'AbsolutePerformance', 'configurationsPerformance.pdf'))
-        plt.close(fig)
+        PlotRenderer.submit(PlotRenderer.Heatmap, os.path.join(path, 'AbsolutePerformance',
+                                                               'configurationsPerformance.pdf'),
+                            dict(cmap='Oranges', aggregation='mean', figsize=[15, 10], fontsize=fontsize,
+                                 title=case_study.name,
+                                 xlabel='Configuration', ylabel='Release',
+                                 yticks=np.arange(0.5, len(revisions) + 0.5, step=1.0).tolist(),
+                                 yticklabels=list(reversed(revisions)), ytick_fontsize=fontsize,
+                                 colorbar_label='Performance [s]'),
+                            dict(values=plot_data))
 
         # Create a dataframe with the first performance value of each configuration in the first row
         # and the last performance value in the last row. Calculate the diff to find persisting regressions.
@@ -220,62 +246,34 @@ class ConfigurationLevel(AnalysisLevels):
         # (II) Plot the differences between revisions (x-axis = configurations; y-axis = revisions/releases;
         # color = performance difference between revisions and alternatively performance difference between revision and
         # first revision)
-        plot_data2 = np.copy(plot_data)
-        for y in range(1, len(revisions)):
-            for x in range(0, len(mean_values)):
-                if plot_data[len(revisions) - 1 - y][x] == np.nan and \
-                        plot_data[len(revisions) - y][x] != np.nan:
-                    max_value = 2 * plot_data[len(revisions) - y][x] * \
-                                deviation_values[len(revisions) - y][x]
-                else:
-                    max_value = 2 * max(plot_data[len(revisions) - 1 - y][x] * \
-                                        deviation_values[len(revisions) - 1 - y][x],
-                                        plot_data[len(revisions) - y][x] * \
-                                        deviation_values[len(revisions) - y][x]
-                                        )
-                difference = - (plot_data[len(revisions) - 1 - y][x] - plot_data[len(revisions) - y][x])
-                if abs(difference) < max_value or math.isnan(difference):
-                    plot_data2[len(revisions) - 1 - y][x] = 0
-                else:
-                    plot_data2[len(revisions) - 1 - y][x] = difference
-                    # Collect the data in a dictionary and write it in a markdown file later
-                    self.add_change(f"{revisions[y]} - {revisions[y - 1]}", os.path.basename(path),
-                                    mean_values.loc[x], difference / mean_values['performance'][x] * 100)
-
-        plot_data2 = np.delete(plot_data2, len(revisions) - 1, axis=0)
-        # Export plot_data2
-        plot_data2.dump(os.path.join(input_path, f"configuration_difference_{workload}"))
-
-        # Pick a colormap
-        # cmap = plt.get_cmap('PRGn')
-        cmap = plt.get_cmap('RdBu_r')
-        cmap.set_bad(color='grey')
-        fig = plt.figure(figsize=(15, 8))
-        ax = fig.add_subplot(1, 1, 1)
-        greatest_value = max(abs(np.nanmin(plot_data2)), abs(np.nanmax(plot_data2)))
-        cm = ax.pcolormesh(plot_data2, cmap=cmap, vmin=-greatest_value, vmax=greatest_value)
-        # cm = ax.pcolormesh(plot_data2, cmap=cmap)
-        # ax.set_title(case_study.name, fontsize=fontsize)
-        ax.set_ylabel('Release', fontsize=fontsize)
-        ax.set_xlabel('Configuration', fontsize=fontsize)
-        ax.set_yticks(range(0, len(revisions)))
-        ax.set_yticklabels(reversed(revisions), fontsize=fontsize)
-        ax.get_xaxis().set_visible(False)
-        cb = fig.colorbar(cm, ax=ax, extend='both')
-        cb.set_label('Performance [s]', fontsize=fontsize)
-        cb.ax.tick_params(labelsize=fontsize)
-        fig = ax.get_figure()
-        fig.tight_layout()
-        self.create_directory(os.path.join(path, 'Difference'))
-        fig.savefig(os.path.join(path, 'Difference', 'configurationsDifference.pdf'))
-        plt.close(fig)
+        plot_data2, significant = tensor.compute_differences()
+        # Collect the changes; they are added to the dictionaries and written to a markdown file later
+        configuration_records = mean_values[case_study.get_all_feature_names()].to_dict('records')
+        changes = [(release, os.path.basename(path), configuration_records[x],
+                    difference / mean_values['performance'][x] * 100)
+                   for release, x, difference in tensor.get_changes(plot_data2, significant)]
+        # Export the significant differences; most of the differences are 0 and, thus, they are stored sparse (see
+        # write_dense_differences for the dense matrix)
+        SparseLabeledArray(tensor.get_sparse_changes(plot_data2, significant),
+                           [("release_pairs", [tensor.get_release_pair(row) for row in range(len(plot_data2))]),
+                            ("configurations", tensor.configuration_keys.tolist())]).store(
+            os.path.join(input_path, f"sparse_configuration_difference_{workload}"))
+
+        PlotRenderer.submit(PlotRenderer.Heatmap, os.path.join(path, 'Difference', 'configurationsDifference.pdf'),
+                            dict(cmap='RdBu_r', bad_color='grey', symmetric=True, aggregation='extreme',
+                                 figsize=[15, 8], fontsize=fontsize,
+                                 xlabel='Configuration', ylabel='Release', yticks=list(range(0, len(revisions))),
+                                 yticklabels=list(reversed(revisions)), ytick_fontsize=fontsize,
+                                 colorbar_label='Performance [s]', extend='both'),
+                            dict(values=plot_data2))
+        return changes
 
     def pretty_print_config(self, config: Dict[str, float], difference: float = None, machine_readable: bool = False) -> \
     Tuple[str, str]:
         if not machine_readable:
             result = "{"
             for k, v in config.items():
-                if v == '1' and k != "root":
+                if CaseStudy.is_selected(v) and k != "root":
                     result = f"{result} {k},"
             result = f"{result}}}"
             diff = None
@@ -285,7 +283,7 @@ class ConfigurationLevel(AnalysisLevels):
             return result, diff
         result = ""
         for k, v in config.items():
-            if v == '1' and k != "root":
+            if CaseStudy.is_selected(v) and k != "root":
                 result = f"{result} {k}"
         diff = None
         if difference is not None:
@@ -0,0 +1,104 @@
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse
+
+from case_study import CaseStudy
+
+
+class ConfigurationTensor:
+    """
+    This class pivots the measurements of one workload into dense (release x configuration) matrices of the
+    performance and the relative deviation. The rows are ordered by the given releases (oldest first) and the columns
+    by the given configuration keys. Configurations that were not measured in a release are NaN.
+    All computations on the matrices (thresholds, differences, and changes) are whole-array operations.
+    """
+
+    def __init__(self, releases: List[str], configuration_keys: np.ndarray) -> None:
+        self.releases = releases
+        self.configuration_keys = np.asarray(configuration_keys, dtype=np.int64)
+        self.release_index = pd.Index(releases)
+        self.configuration_index = pd.Index(self.configuration_keys)
+        self.performance: np.ndarray = None
+        self.deviation: np.ndarray = None
+
+    @classmethod
+    def from_frames(cls, configurations: pd.DataFrame, deviations: pd.DataFrame, releases: List[str],
+                    configuration_keys: np.ndarray) -> 'ConfigurationTensor':
+        """
+        Creates the tensor of a single workload.
+        :param configurations: the measurements of the workload
+        :param deviations: the deviations of the workload
+        :param releases: the releases in chronological order
+        :param configuration_keys: the configuration keys in the order of the columns
+        :return: the tensor containing the performance and deviation matrices
+        """
+        tensor = cls(releases, configuration_keys)
+        tensor.performance = tensor.pivot(configurations)
+        tensor.deviation = tensor.pivot(deviations)
+        return tensor
+
+    def pivot(self, frame: pd.DataFrame) -> np.ndarray:
+        """
+        Scatters the performance column of the given frame into a (release x configuration) matrix.
+        :param frame: the measurements or deviations containing the revision and the configuration key
+        :return: the matrix, where missing values are NaN
+        """
+        values = np.full((len(self.releases), len(self.configuration_keys)), np.nan)
+        rows = self.release_index.get_indexer(frame['revision'])
+        columns = self.configuration_index.get_indexer(frame[CaseStudy.Configuration_Key])
+        valid = (rows >= 0) & (columns >= 0)
+        values[rows[valid], columns[valid]] = frame['performance'].to_numpy(dtype=float)[valid]
+        return values
+
+    def compute_thresholds(self) -> np.ndarray:
+        """
+        Computes the significance threshold 2 * max(mean * deviation) for each pair of consecutive releases.
+        As with Python's max, the value of the older release is taken unless the newer one is greater; thus, a
+        missing (NaN) value of the older release results in a NaN threshold.
+        :return: a matrix with one row per pair of consecutive releases
+        """
+        products = self.performance * self.deviation
+        older, newer = products[:-1], products[1:]
+        with np.errstate(invalid='ignore'):
+            return 2 * np.where(newer > older, newer, older)
+
+    def compute_differences(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Computes the signed performance differences (newer - older) between consecutive releases.
+        :return: the differences, where insignificant or missing differences are 0, and the mask of the significant
+        differences
+        """
+        # Negating (older - newer) keeps the sign of zero differences consistent with the reported changes
+        differences = -(self.performance[:-1] - self.performance[1:])
+        with np.errstate(invalid='ignore'):
+            significant = ~(np.abs(differences) < self.compute_thresholds()) & ~np.isnan(differences)
+        return np.where(significant, differences, 0.0), significant
+
+    def get_release_pair(self, row: int) -> str:
+        return f"{self.releases[row]} - {self.releases[row + 1]}"
+
+    def get_changes(self, differences: np.ndarray, significant: np.ndarray) -> List[Tuple[str, int, float]]:
+        """
+        Lists the significant changes. The changes are ordered by the newest pair of releases first and then by the
+        configuration column.
+        :param differences: the differences from <code>compute_differences</code>
+        :param significant: the mask of the significant differences
+        :return: the list of changes as (release pair, configuration column, difference)
+        """
+        rows, columns = np.nonzero(significant[::-1])
+        rows = len(significant) - 1 - rows
+        return [(self.get_release_pair(row), column, difference)
+                for row, column, difference in zip(rows.tolist(), columns.tolist(),
+                                                   differences[rows, columns].tolist())]
+
+    def get_sparse_changes(self, differences: np.ndarray, significant: np.ndarray) -> scipy.sparse.csr_matrix:
+        """
+        Collects the significant changes as a sparse (release pair x configuration) matrix of the signed differences.
+        :param differences: the differences from <code>compute_differences</code>
+        :param significant: the mask of the significant differences
+        :return: the sparse matrix containing only the non-zero significant differences
+        """
+        rows, columns = np.nonzero(significant & (differences != 0))
+        return scipy.sparse.csr_matrix((differences[rows, columns], (rows, columns)), shape=differences.shape)
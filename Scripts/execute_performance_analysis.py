@@ -1,10 +1,11 @@
 #!/bin/env python3
 import os
+import shutil
 import sys
-from typing import List
-
-import matplotlib.pyplot as plt
-import seaborn as sns
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from functools import partial
+from typing import Dict, List, Tuple
 
 from PerformanceEvolution.persisting_regression_analysis import PersistingRegressionAnalysis
 from PerformanceEvolution.precision_analyzer import PrecisionAnalyzer
@@ -13,12 +14,42 @@ from PerformanceEvolution.workload_sensitivity import WorkloadSensitivityAnalyze
 from case_study import CaseStudy
 from configuration_level import ConfigurationLevel
 from option_level import OptionLevel
+from plot_renderer import PlotRenderer
 from recall_analyzer import RecallAnalyzer
+from stage_graph import Stage, StageGraph
+from stage_profiler import StageProfiler
 
 NFP = "performance"  # (execution time in our case)
 FM = "FeatureModel.xml"
 Measurements = "measurements.csv"
 Deviations = "deviations.csv"
+Cache = ".measurement_cache"
+Stage_Manifests = ".stages"
+# The directory of the outputs of each case study if the case studies are analyzed in parallel
+Case_Study_Outputs = ".case_studies"
+# The files written by the analysis levels across all case studies; they are merged after a parallel execution
+Report_Files = ["README_post.md", "README_post2.md"]
+Appended_Report_Files = ["config_changes.md"]
+Change_Report_Files = ["identified_changes.md"]
+
+# The options whose value has to be a positive number
+Number_Options = ["processes", "parallel"]
+
+Scripts_Path = os.path.dirname(os.path.abspath(__file__))
+# The modules whose changes invalidate all stages and the modules of each stage
+Common_Sources = ["array_store", "case_study", "feature", "feature_model", "measurement_cache", "plot_renderer",
+                  "process_workloads", "stage_graph"]
+Stage_Sources: Dict[str, List[str]] = {
+    "ConfigurationLevel": ["analysis_levels", "configuration_level", "configuration_tensor", "shared_measurements",
+                           "utilities", "vif_analysis", "collinearity_engine"],
+    "OptionLevel": ["analysis_levels", "option_level", "utilities", "vif_analysis", "collinearity_engine",
+                    "performance_model_learner", "job_runner"],
+    "Precision": ["precision_analyzer"],
+    "Recall": ["recall_analyzer"],
+    "PersistingRegressions": ["persisting_regression_analysis", "configuration_level"],
+    "WorkloadSensitivity": ["workload_sensitivity"],
+    "Frequency": ["workload_frequency_analyzer"]
+}
 
 AnalysisLevels = [
     ConfigurationLevel(),
@@ -30,9 +61,52 @@ def print_usage() -> None:
     """
     Prints the usage of the python script.
     """
-    print("Usage: execute_performance_analysis.py <InputPath> <OutputPath>")
+    print("Usage: execute_performance_analysis.py <InputPath> <OutputPath> [Options]")
     print("InputPath\t The path to the directory containing all relevant information of the case studies.")
     print("OutputPath\t The path to the directory where all plots should be exported to.")
+    print("Options:")
+    print("--processes=<N>\t The number of worker processes used per analysis level (default: 1).")
+    print("--learner=<L>\t Learns the performance-influence models with 'splconqueror' (slurm jobs, default), "
+          "'local' (SPL Conqueror jobs on this machine), or 'native' (in-process).")
+    print("--multicollinearity=<M>\t Removes the multicollinear terms 'incremental' (term by term, default) or "
+          "'rank_revealing' (one decomposition per workload and release).")
+    print("--parallel=<N>\t Analyzes up to N case studies concurrently, each in its own process (default: 1).")
+    print("--compact[=T]\t Encodes the options as uint8 and the workloads and revisions as categories; T is the float "
+          "type of the performance values ('float64' (default) or 'float32').")
+    print("--plots=<M>\t When the plots are rendered: 'now' (default), in the 'background' (by --processes "
+          "processes), 'later' (only the plot data is stored; see plot_renderer.py), or 'skip' (no plots).")
+    print(f"--raster[=<N>]\t Rasterizes the heatmaps and aggregates their columns into at most N columns (default: "
+          f"{PlotRenderer.Default_Raster_Columns}).")
+    print("--force\t\t Executes all stages even if their inputs did not change.")
+    print("--check\t\t Executes no stage; lists the stages that are not up to date and exits with -1 if there is any.")
+    print("--incremental\t Learns and optimizes only the performance-influence models of the releases missing from "
+          "models.csv and appends them; all pairs of releases are analyzed as in a full execution.")
+    print(f"--trace\t\t Records the wall-clock time, CPU time, peak memory, and the processed rows and terms of each "
+          f"stage, workload, and VIF analysis and writes them to {StageProfiler.Profile_Directory}/"
+          f"{StageProfiler.Trace_File} (Chrome trace format) and {StageProfiler.Summary_File} in the output directory.")
+    print("--profile=<S>\t Profiles the stage S (or all stages of the analysis S, e.g., 'Precision') by cProfile.")
+    print("--tracemalloc=<S>\t Traces the memory allocations of the stage S by tracemalloc.")
+
+
+def parse_options(arguments: List[str]) -> Dict[str, str]:
+    """
+    Parses the optional arguments in the form '--name=value' (or '--name' for flags).
+    :param arguments: the optional arguments
+    :return: a dictionary mapping the names of the options to their values
+    """
+    options = dict()
+    for argument in arguments:
+        if not argument.startswith("--"):
+            print_usage()
+            exit(-1)
+        name, _, value = argument[2:].partition("=")
+        options[name] = value
+    # The options expecting a positive number
+    for name in Number_Options:
+        if name in options and (not options[name].isdigit() or int(options[name]) < 1):
+            print_usage()
+            exit(-1)
+    return options
 
 
 def list_directories(path: str) -> List:
@@ -54,14 +128,300 @@ def create_directory(path: str) -> None:
         os.makedirs(path)
 
 
+def get_source_files(modules: List[str]) -> List[str]:
+    """
+    Returns the paths to the source files of the given modules and of the modules reading the case studies.
+    :param modules: the names of the modules
+    :return: the list of paths
+    """
+    return [os.path.join(Scripts_Path, f"{module}.py") for module in Common_Sources + modules]
+
+
+def read_case_study(input_path: str, case_study: str) -> CaseStudy:
+    with StageProfiler.span(f"CaseStudy/{case_study}", "load") as counts:
+        cs = CaseStudy(case_study, os.path.join(input_path, case_study, FM),
+                       os.path.join(input_path, case_study, Measurements),
+                       os.path.join(input_path, case_study, Deviations),
+                       os.path.join(input_path, case_study, Cache))
+        counts['rows'] = len(cs.configurations)
+    return cs
+
+
+def get_measurement_files(input_path: str, case_study: str) -> List[str]:
+    return [os.path.join(input_path, case_study, file_name) for file_name in [FM, Measurements, Deviations]]
+
+
+def run_analysis_level(al, case_studies: List[str], input_path: str, output_path: str) -> None:
+    """
+    Executes the performance change analysis of the given analysis level for all case studies.
+    """
+    create_directory(os.path.join(output_path, al.name))
+    al.initialize_for_metrics(os.path.join(output_path, al.name))
+    for i in range(len(case_studies)):
+        case_study = case_studies[i]
+        print(case_study + " (" + str(int((float(i) / len(case_studies)) * 100)) + "%)")
+        # Read in one case study (i.e., its FM and measurements) after another (and wipe the data to save some RAM)
+        cs = read_case_study(input_path, case_study)
+        create_directory(os.path.join(output_path, al.name, case_study))
+        print("\t" + al.get_name() + "...", end="")
+        sys.stdout.flush()
+        al.prepare(cs, input_path)
+        al.evaluate_metrics(cs, os.path.join(output_path, al.name), input_path)
+        al.generate_plots(cs, os.path.join(output_path, al.name, case_study), input_path)
+        print("Finished!")
+        al.finish(os.path.join(output_path, al.name), os.path.join(input_path, case_study))
+
+
+def run_case_study_analysis(name: str, input_path: str, output_path: str, case_study: str) -> None:
+    """
+    Executes the given analysis (precision, recall, workload sensitivity, persisting regressions, or the workload
+    frequency) for one case study. The files of each case study are written to its own directory (e.g.,
+    Precision/<CaseStudy>) so that the stages of different case studies do not overwrite each other's outputs.
+    """
+    analysis_path = os.path.join(output_path, name, case_study)
+    create_directory(analysis_path)
+    case_study_path = os.path.join(input_path, case_study)
+    models_path = os.path.join(case_study_path, "models", "models.csv")
+    if name == "Frequency":
+        WorkloadFrequencyAnalyzer().perform_analysis(analysis_path, case_study_path)
+        return
+    cs = read_case_study(input_path, case_study)
+    if name == "Precision":
+        PrecisionAnalyzer().perform_analysis(analysis_path, cs, models_path, case_study_path)
+    elif name == "Recall":
+        RecallAnalyzer().perform_analysis(analysis_path, cs, models_path, case_study_path)
+    elif name == "PersistingRegressions":
+        ConfigurationLevel.write_dense_differences(cs, case_study_path)
+        PersistingRegressionAnalysis().process_data(cs, case_study_path, analysis_path)
+    elif name == "WorkloadSensitivity":
+        WorkloadSensitivityAnalyzer().process_data(cs, case_study_path, analysis_path)
+
+
+def get_stage_settings() -> Dict[str, str]:
+    """
+    Returns the configured options that change the outputs of the stages. The number of processes is omitted since it
+    does not affect the results; the incremental mode is omitted since it only changes models.csv, which is an input.
+    """
+    rendered = PlotRenderer.Mode in [PlotRenderer.Now, PlotRenderer.Background]
+    return dict(plots="render" if rendered else PlotRenderer.Mode, raster_columns=str(PlotRenderer.Raster_Columns),
+                compact=CaseStudy.Float_Type if CaseStudy.Compact else "",
+                multicollinearity=OptionLevel.Multicollinearity_Mode)
+
+
+def create_stage_graph(case_studies: List[str], input_path: str, output_path: str, force: bool,
+                       analysis_levels: List = None) -> StageGraph:
+    """
+    Declares the stages of the analysis and their dependencies. The analysis levels communicate with the other
+    stages through files (e.g., changed_configurations.json, changed_options_with_direction.json,
+    configuration_difference_*, and plot_data_*), which are the outputs of the stages.
+    :param analysis_levels: the configuration level and the option level (default: the module-level instances)
+    """
+    graph = StageGraph(os.path.join(output_path, Stage_Manifests), force, get_stage_settings())
+    case_study_paths = [os.path.join(input_path, case_study) for case_study in case_studies]
+    measurement_files = [path for case_study in case_studies for path in get_measurement_files(input_path, case_study)]
+    models_files = [os.path.join(path, "models", "models.csv") for path in case_study_paths]
+
+    # In the next lines, we execute the performance change analysis at the configuration level and the option level
+    configuration_level, option_level = AnalysisLevels if analysis_levels is None else analysis_levels
+    graph.add_stage(Stage(configuration_level.name,
+                          partial(run_analysis_level, configuration_level, case_studies, input_path, output_path),
+                          measurement_files + get_source_files(Stage_Sources[configuration_level.name]),
+                          [os.path.join(output_path, configuration_level.name)] +
+                          [os.path.join(path, pattern) for path in case_study_paths for pattern in
+                           ["changed_configurations*.json", "changes_detected_by_workloads.json",
+                            "configuration_values_*", "deviation_values_*", "sparse_configuration_difference_*"]]))
+    # As long as the performance-influence models are not learned, the option level has to advance its preparation
+    graph.add_stage(Stage(option_level.name,
+                          partial(run_analysis_level, option_level, case_studies, input_path, output_path),
+                          measurement_files + models_files + get_source_files(Stage_Sources[option_level.name]),
+                          [os.path.join(output_path, option_level.name)] +
+                          [os.path.join(path, pattern) for path in case_study_paths for pattern in
+                           ["changed_options*.json", "relevantTerms.txt", "plot_data_*"]],
+                          always_run=lambda: not all(os.path.exists(path) for path in models_files) or any(
+                              os.path.exists(os.path.join(os.path.dirname(path), OptionLevel.Pending_Revisions_File))
+                              for path in models_files)))
+
+    # Next, execute the analysis for precision, recall, workload sensitivity, persisting regressions and the workload
+    # frequency
+    for case_study in case_studies:
+        for name, dependencies in [("Precision", [configuration_level.name, option_level.name]),
+                                   ("Recall", [configuration_level.name, option_level.name]),
+                                   ("PersistingRegressions", [configuration_level.name]),
+                                   ("WorkloadSensitivity", [configuration_level.name]),
+                                   ("Frequency", [configuration_level.name])]:
+            # The persisting regressions read the dense differences, which are written by their stage
+            outputs = [os.path.join(input_path, case_study, "configuration_difference_*")] \
+                if name == "PersistingRegressions" else []
+            graph.add_stage(Stage(f"{name}/{case_study}",
+                                  partial(run_case_study_analysis, name, input_path, output_path, case_study),
+                                  get_measurement_files(input_path, case_study) +
+                                  [os.path.join(input_path, case_study, "models", "models.csv")] +
+                                  get_source_files(Stage_Sources[name]),
+                                  [os.path.join(output_path, name, case_study)] + outputs, dependencies))
+    return graph
+
+
+def configure(options: Dict[str, str], analysis_levels: List, output_path: str, worker: bool = False) -> None:
+    """
+    Applies the settings of the plot renderer, the settings of the profiler, and the options of the analysis levels.
+    :param worker: whether the case study is analyzed in a worker process
+    """
+    raster_columns = options.get("raster", "0") if options.get("raster") != "" else PlotRenderer.Default_Raster_Columns
+    PlotRenderer.configure(dict(mode=options.get("plots", PlotRenderer.Now), processes=int(options.get("processes", 1)),
+                                raster_columns=int(raster_columns)))
+    profiler = StageProfiler.Tracemalloc if "tracemalloc" in options else \
+        StageProfiler.CProfile if "profile" in options else None
+    StageProfiler.configure(dict(enabled="trace" in options,
+                                 path=os.path.join(os.path.abspath(output_path), StageProfiler.Profile_Directory),
+                                 profiled_stage=options.get("tracemalloc", options.get("profile")), profiler=profiler),
+                            worker=worker)
+    for al in analysis_levels:
+        al.processes = int(options.get("processes", 1))
+    OptionLevel.Model_Learner = options.get("learner", OptionLevel.Model_Learner)
+    OptionLevel.Incremental = "incremental" in options
+    OptionLevel.Multicollinearity_Mode = options.get("multicollinearity", OptionLevel.Multicollinearity_Mode)
+    if OptionLevel.Multicollinearity_Mode not in OptionLevel.Multicollinearity_Modes:
+        print_usage()
+        exit(-1)
+    if "compact" in options:
+        CaseStudy.Compact = True
+        CaseStudy.Float_Type = options["compact"] if options["compact"] != "" else CaseStudy.Float_Type
+        if CaseStudy.Float_Type not in ["float32", "float64"]:
+            print_usage()
+            exit(-1)
+
+
+def analyze_case_study(case_study: str, input_path: str, output_path: str, options: Dict[str, str]) -> str:
+    """
+    Executes all stages for a single case study in a worker process. The analysis levels are created anew so that no
+    state is shared with other case studies; the outputs are written to a separate directory.
+    :return: the console output of the analysis
+    """
+    analysis_levels = [ConfigurationLevel(), OptionLevel()]
+    configure(options, analysis_levels, output_path, worker=True)
+    case_study_output_path = os.path.join(output_path, Case_Study_Outputs, case_study)
+    create_directory(case_study_output_path)
+    log_path = os.path.join(case_study_output_path, "analysis.log")
+    with open(log_path, 'w') as log_file, redirect_stdout(log_file):
+        create_stage_graph([case_study], input_path, case_study_output_path, "force" in options,
+                           analysis_levels).run()
+        PlotRenderer.wait()
+    with open(log_path, 'r') as log_file:
+        return log_file.read()
+
+
+def merge_report_files(paths: List[str], merged_path: str) -> None:
+    """
+    Merges the markdown tables of the given files: the header (up to the alignment row) is taken from the first
+    file and the rows of all files follow in the given order.
+    """
+    lines: List[str] = []
+    for path in paths:
+        with open(path, 'r') as report_file:
+            report_lines = report_file.readlines()
+        header_length = next((i + 1 for i, line in enumerate(report_lines) if line.startswith("| :---:")), 0)
+        if len(lines) == 0:
+            lines += report_lines[:header_length]
+        lines += report_lines[header_length:]
+    with open(merged_path, 'w') as merged_file:
+        merged_file.writelines(lines)
+
+
+def merge_change_tables(paths: List[str], merged_path: str) -> None:
+    """
+    Merges the tables of identified changes (one row per term and release listing the workloads). As in the sequential
+    execution, the workloads of the same term and release are combined into one row and the rows are sorted.
+    """
+    header: List[str] = []
+    rows: Dict[Tuple[str, str], str] = dict()
+    for path in paths:
+        with open(path, 'r') as report_file:
+            report_lines = report_file.readlines()
+        header = header if len(header) > 0 else report_lines[:2]
+        for line in report_lines[2:]:
+            term, release, workloads = line[2:].rstrip("\n")[:-1].split(" | ", 2)
+            rows[(term, release)] = rows.get((term, release), "") + workloads
+    with open(merged_path, 'w') as merged_file:
+        merged_file.writelines(header)
+        for term, release in sorted(rows.keys()):
+            merged_file.write(f"| {term} | {release} | {rows[(term, release)]}|\n")
+
+
+def merge_case_study_outputs(case_studies: List[str], output_path: str) -> None:
+    """
+    Merges the outputs of the case studies into the output directory. The report files of the analysis levels are
+    merged; all other files are copied in the order of the case studies.
+    """
+    reports: Dict[str, List[str]] = dict()
+    for case_study in case_studies:
+        case_study_output_path = os.path.join(output_path, Case_Study_Outputs, case_study)
+        for root, dirs, file_names in os.walk(case_study_output_path):
+            dirs[:] = [directory for directory in dirs if directory != Stage_Manifests]
+            relative_root = os.path.relpath(root, case_study_output_path)
+            if relative_root == ".":
+                continue
+            create_directory(os.path.join(output_path, relative_root))
+            for file_name in file_names:
+                relative_path = os.path.join(relative_root, file_name)
+                if file_name in Report_Files + Appended_Report_Files + Change_Report_Files:
+                    reports.setdefault(relative_path, []).append(os.path.join(root, file_name))
+                else:
+                    shutil.copyfile(os.path.join(root, file_name), os.path.join(output_path, relative_path))
+    for relative_path, paths in reports.items():
+        if os.path.basename(relative_path) in Change_Report_Files:
+            merge_change_tables(paths, os.path.join(output_path, relative_path))
+        elif os.path.basename(relative_path) in Appended_Report_Files:
+            with open(os.path.join(output_path, relative_path), 'w') as merged_file:
+                for path in paths:
+                    with open(path, 'r') as report_file:
+                        merged_file.write(report_file.read())
+        else:
+            merge_report_files(paths, os.path.join(output_path, relative_path))
+
+
+def run_in_parallel(case_studies: List[str], input_path: str, output_path: str, options: Dict[str, str]) -> None:
+    """
+    Analyzes the case studies concurrently; each case study is analyzed in its own process with its own stages.
+    The console output of each case study is printed in the order of the case studies.
+    """
+    with ProcessPoolExecutor(max_workers=min(int(options["parallel"]), len(case_studies))) as executor:
+        for case_study, log in zip(case_studies, executor.map(analyze_case_study, case_studies,
+                                                               [input_path] * len(case_studies),
+                                                               [output_path] * len(case_studies),
+                                                               [options] * len(case_studies))):
+            print(f"{case_study}:")
+            sys.stdout.write(log)
+    merge_case_study_outputs(case_studies, output_path)
+
+
+def check_stages(case_studies: List[str], input_path: str, output_path: str, options: Dict[str, str]) -> None:
+    """
+    Lists the stages that the next execution would execute (e.g., to check that an execution without any changes
+    skips all stages) and exits with -1 if there is any.
+    """
+    if int(options.get("parallel", 1)) > 1 and len(case_studies) > 1:
+        graphs = [create_stage_graph([case_study], input_path,
+                                     os.path.join(output_path, Case_Study_Outputs, case_study), "force" in options,
+                                     [ConfigurationLevel(), OptionLevel()]) for case_study in case_studies]
+    else:
+        graphs = [create_stage_graph(case_studies, input_path, output_path, "force" in options)]
+    pending_stages = [stage for graph in graphs for stage in graph.get_pending_stages()]
+    if len(pending_stages) == 0:
+        print("All stages are up to date.")
+        exit(0)
+    print("Stages that are not up to date: " + ", ".join(pending_stages))
+    exit(-1)
+
+
 def main() -> None:
     """
     The main method reads in the data of the case studies and evaluates the data with regard to the different
-    research questions (1-4) of the study.
+    research questions (1-4) of the study. Stages whose inputs did not change since the last execution are skipped.
     """
-    if len(sys.argv) != 3:
+    if len(sys.argv) < 3:
         print_usage()
         exit(0)
+    options = parse_options(sys.argv[3:])
 
     # Read in the path to the case study data
     input_path = sys.argv[1]
@@ -69,86 +429,21 @@ def main() -> None:
     # Read in the output path of the plots
     output_path = sys.argv[2]
 
-    fontsize = 30
-    plt.rcParams.update({'font.size': fontsize})
-    sns.set_style("whitegrid")
+    configure(options, AnalysisLevels, output_path)
 
     case_studies = list_directories(input_path)
+    if "check" in options:
+        check_stages(case_studies, input_path, output_path, options)
     print("Progress:")
-    i = -1
 
-    # In the next lines, we execute the performance change analysis at the configuration level and the option level
-    for al in AnalysisLevels:
-        if not os.path.exists(os.path.join(output_path, al.name)):
-            os.mkdir(os.path.join(output_path, al.name))
-        al.initialize_for_metrics(os.path.join(output_path, al.name))
+    if int(options.get("parallel", 1)) > 1 and len(case_studies) > 1:
+        run_in_parallel(case_studies, input_path, output_path, options)
+        StageProfiler.finish()
+        return
 
-    for case_study in case_studies:
-        i += 1
-        print(case_study + " (" + str(int((float(i) / len(case_studies)) * 100)) + "%)")
-        # Read in one case study (i.e., its FM and measurements) after another (and wipe the data to save some RAM)
-        cs = CaseStudy(case_study, os.path.join(input_path, case_study, FM),
-                       os.path.join(input_path, case_study, Measurements),
-                       os.path.join(input_path, case_study, Deviations))
-
-        rq_count = 0
-        for al in AnalysisLevels:
-            if not os.path.exists(os.path.join(output_path, al.name, case_study)):
-                os.mkdir(os.path.join(output_path, al.name, case_study))
-            rq_count += 1
-            print("\t" + al.get_name() + "...", end="")
-            sys.stdout.flush()
-            al.prepare(cs, input_path)
-            al.evaluate_metrics(cs, os.path.join(output_path, al.name), input_path)
-            al.generate_plots(cs, os.path.join(output_path, al.name, case_study), input_path)
-            print("Finished!")
-
-        for al in AnalysisLevels:
-            al.finish(os.path.join(output_path, al.name), os.path.join(input_path, case_study))
-
-    # Next, execute the analysis for precision, recal, workload sensitivity, persisting regressions and the workload
-    # frequency
-    for case_study in case_studies:
-        cs = CaseStudy(case_study, os.path.join(input_path, case_study, FM),
-                       os.path.join(input_path, case_study, Measurements),
-                       os.path.join(input_path, case_study, Deviations))
-
-        # Precision
-        precision_analyzer = PrecisionAnalyzer()
-        if not os.path.exists(os.path.join(output_path, "Precision")):
-            os.mkdir(os.path.join(output_path, "Precision"))
-        precision_analyzer.perform_analysis(os.path.join(output_path, "Precision"), cs,
-                                            os.path.join(input_path, case_study, "models", "models.csv"),
-                                            os.path.join(input_path, case_study))
-
-        # Recall
-        recall_analyzer = RecallAnalyzer()
-        if not os.path.exists(os.path.join(output_path, "Recall")):
-            os.mkdir(os.path.join(output_path, "Recall"))
-        recall_analyzer.perform_analysis(os.path.join(output_path, "Recall"), cs,
-                                         os.path.join(input_path, case_study, "models", "models.csv"),
-                                         os.path.join(input_path, case_study))
-
-        # Persisting regressions
-        persisting_regression_analysis = PersistingRegressionAnalysis()
-        if not os.path.exists(os.path.join(output_path, "PersistingRegressions")):
-            os.mkdir(os.path.join(output_path, "PersistingRegressions"))
-        persisting_regression_analysis.process_data(cs, os.path.join(input_path, case_study),
-                                                    os.path.join(output_path, "PersistingRegressions"))
-
-        # Workload sensitivity
-        workload_sensitivity_analyzer = WorkloadSensitivityAnalyzer()
-        if not os.path.exists(os.path.join(output_path, "WorkloadSensitivity")):
-            os.mkdir(os.path.join(output_path, "WorkloadSensitivity"))
-        workload_sensitivity_analyzer.process_data(cs, os.path.join(input_path, case_study),
-                                                   os.path.join(output_path, "WorkloadSensitivity"))
-
-        # Workload frequency
-        frequency_analyzer = WorkloadFrequencyAnalyzer()
-        if not os.path.exists(os.path.join(output_path, "Frequency")):
-            os.mkdir(os.path.join(output_path, "Frequency"))
-        frequency_analyzer.perform_analysis(os.path.join(output_path, "Frequency"),
-                                            os.path.join(input_path, case_study))
+    create_stage_graph(case_studies, input_path, output_path, "force" in options).run()
+    PlotRenderer.wait()
+    StageProfiler.finish()
 
 
 if __name__ == "__main__":
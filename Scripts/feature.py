@@ -3,23 +3,19 @@ from typing import Dict
 
 
 class Feature:
-    name = ""
-    binary = False
-    mandatory = None
-    strictly_mandatory = None
-    parent = None
-    children = []
-    exclusions = []
-    implications = []
-    alternatives = []
+    __slots__ = ['name', 'binary', 'mandatory', 'strictly_mandatory', 'parent', 'children', 'exclusions',
+                 'implications', 'alternatives']
 
     def __init__(self, name: str, parent, exclusions: List, implications: List, mandatory: bool = None) -> None:
         self.binary = mandatory is not None
         self.name = name
         self.mandatory = mandatory
+        self.strictly_mandatory = None
         self.parent = parent
+        self.children: List[str] = []
         self.implications = implications
         self.exclusions = exclusions
+        self.alternatives: List[str] = []
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
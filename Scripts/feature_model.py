@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+from typing import Dict, List
+
+import numpy as np
+
+from feature import Feature
+
+
+class FeatureModel:
+    """
+    This class is the compiled representation of a feature model. The features are identified by integer ids (in the
+    order of the feature model) and the structure is stored in arrays: the parent and the depth of each feature, the
+    alternative group each feature belongs to, and whether it is strictly mandatory. Furthermore, the features that
+    are removed for multicollinearity are mapped to the parent that takes over their influence.
+    All structural queries are computed once during the compilation; the compiled model can be stored as json.
+    """
+
+    __slots__ = ['names', 'ids', 'binary', 'mandatory', 'parents', 'depths', 'exclusions', 'implications',
+                 'children', 'alternative_groups', 'alternative_group_ids', 'strictly_mandatory',
+                 'removed_feature_parents', 'source_hash']
+
+    Format_Version = 1
+
+    def __init__(self, names: List[str], binary: List[bool], mandatory: List[bool], parent_names: List[str],
+                 exclusions: List[List[str]], implications: List[List[str]], source_hash: str = "") -> None:
+        """
+        :param names: the names of the features in the order of the feature model
+        :param binary: whether each feature is binary
+        :param mandatory: whether each feature is mandatory (<code>False</code> for numeric features)
+        :param parent_names: the name of the parent of each feature
+        :param exclusions: the features excluded by each feature
+        :param implications: the features implied by each feature
+        :param source_hash: the content hash of the feature model file
+        """
+        self.names = names
+        self.ids: Dict[str, int] = {name: i for i, name in enumerate(names)}
+        self.binary = np.array(binary, dtype=bool)
+        self.mandatory = np.array(mandatory, dtype=bool)
+        self.parents = np.array([self.ids.get(parent, -1) if name != "root" else -1
+                                 for name, parent in zip(names, parent_names)], dtype=np.int64)
+        self.exclusions = exclusions
+        self.implications = implications
+        self.source_hash = source_hash
+        self.children: List[List[int]] = [[] for _ in names]
+        for i, parent in enumerate(self.parents.tolist()):
+            if parent >= 0:
+                self.children[parent].append(i)
+        self.depths = np.zeros(len(names), dtype=np.int64)
+        for i in self.get_top_down_order():
+            if self.parents[i] >= 0:
+                self.depths[i] = self.depths[self.parents[i]] + 1
+        self.compute_alternative_groups()
+        self.compute_strictly_mandatory()
+        self.compute_removed_feature_parents()
+
+    def get_top_down_order(self) -> List[int]:
+        order: List[int] = []
+        features_to_visit = [i for i in range(len(self.names)) if self.parents[i] < 0]
+        while len(features_to_visit) > 0:
+            feature = features_to_visit.pop()
+            order.append(feature)
+            features_to_visit.extend(self.children[feature])
+        return order
+
+    def compute_alternative_groups(self) -> None:
+        """
+        A feature is the parent of an alternative group if it has more than one child, all children are mandatory,
+        and each child excludes all other children.
+        """
+        self.alternative_groups: List[List[int]] = []
+        self.alternative_group_ids = np.full(len(self.names), -1, dtype=np.int64)
+        for children in self.children:
+            if len(children) <= 1 or not all(self.mandatory[child] for child in children):
+                continue
+            if all(self.names[other_child] in self.exclusions[child] for child in children for other_child in children
+                   if other_child != child):
+                self.alternative_group_ids[children] = len(self.alternative_groups)
+                self.alternative_groups.append(children)
+
+    def compute_strictly_mandatory(self) -> None:
+        """
+        A feature is strictly mandatory if it and all its parents are mandatory and have no exclusions, and it does
+        not belong to an alternative group. The root and numeric features are always strictly mandatory.
+        """
+        mandatory_chain = np.zeros(len(self.names), dtype=bool)
+        self.strictly_mandatory = np.zeros(len(self.names), dtype=bool)
+        for i in self.get_top_down_order():
+            parent = self.parents[i]
+            if self.names[i] == "root" or parent < 0:
+                mandatory_chain[i] = True
+                self.strictly_mandatory[i] = self.names[i] == "root" or not self.binary[i]
+                continue
+            parent_chain = mandatory_chain[parent]
+            mandatory_chain[i] = self.mandatory[i] and len(self.exclusions[i]) == 0 and parent_chain
+            self.strictly_mandatory[i] = not self.binary[i] or (mandatory_chain[i] and
+                                                                self.alternative_group_ids[i] < 0)
+
+    def compute_removed_feature_parents(self) -> None:
+        """
+        Identifies the features that are removed for multicollinearity: the first feature of each alternative group
+        and all optional features. Each of them is mapped to its closest parent (transitively) that is mandatory and
+        not part of an alternative group, or to the child of the root.
+        """
+        self.removed_feature_parents: Dict[str, str] = dict()
+        for i, name in enumerate(self.names):
+            group = self.alternative_group_ids[i]
+            if group >= 0 and all(self.names[alternative] not in self.removed_feature_parents
+                                  for alternative in self.alternative_groups[group] if alternative != i):
+                self.removed_feature_parents[name] = ""
+            elif not self.mandatory[i]:
+                self.removed_feature_parents[name] = ""
+        for name in self.removed_feature_parents:
+            parent = self.parents[self.ids[name]]
+            while parent >= 0 and self.parents[parent] >= 0 and self.names[self.parents[parent]] != "root" and \
+                    self.mandatory[parent] and self.alternative_group_ids[parent] < 0:
+                parent = self.parents[parent]
+            self.removed_feature_parents[name] = self.names[parent] if parent >= 0 else ""
+
+    def get_alternatives(self, name: str) -> List[str]:
+        group = self.alternative_group_ids[self.ids[name]]
+        if group < 0:
+            return []
+        return [self.names[alternative] for alternative in self.alternative_groups[group] if self.names[alternative] != name]
+
+    def is_strictly_mandatory(self, name: str) -> bool:
+        if name not in self.ids:
+            print(f"Feature {name} not in feature list!")
+            exit(-1)
+        return bool(self.strictly_mandatory[self.ids[name]])
+
+    def to_features(self) -> Dict[str, Feature]:
+        """
+        :return: the features of the feature model (in its order) with their children and alternatives
+        """
+        features: Dict[str, Feature] = dict()
+        for i, name in enumerate(self.names):
+            parent = self.names[self.parents[i]] if self.parents[i] >= 0 else None
+            features[name] = Feature(name, parent, self.exclusions[i], self.implications[i],
+                                     bool(self.mandatory[i]) if self.binary[i] else None)
+        for i, name in enumerate(self.names):
+            features[name].children = [self.names[child] for child in self.children[i]]
+            features[name].alternatives = self.get_alternatives(name)
+            features[name].strictly_mandatory = bool(self.strictly_mandatory[i])
+        return features
+
+    @staticmethod
+    def compute_hash(path: str) -> str:
+        with open(path, 'rb') as feature_model_file:
+            return hashlib.sha256(feature_model_file.read()).hexdigest()
+
+    @classmethod
+    def from_features(cls, features: Dict[str, Feature], source_hash: str = "") -> 'FeatureModel':
+        return cls(list(features.keys()), [feature.binary for feature in features.values()],
+                   [bool(feature.mandatory) for feature in features.values()],
+                   [feature.parent for feature in features.values()],
+                   [list(feature.exclusions) for feature in features.values()],
+                   [list(feature.implications) for feature in features.values()], source_hash)
+
+    def store(self, path: str) -> None:
+        temporary_path = f"{path}.tmp{os.getpid()}"
+        with open(temporary_path, 'w') as model_file:
+            json.dump(dict(version=self.Format_Version, source_hash=self.source_hash, names=self.names,
+                           binary=self.binary.tolist(), mandatory=self.mandatory.tolist(),
+                           parents=[self.names[parent] if parent >= 0 else None for parent in self.parents.tolist()],
+                           exclusions=self.exclusions, implications=self.implications), model_file)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str, source_hash: str) -> 'FeatureModel':
+        """
+        Loads the compiled feature model.
+        :param path: the path to the compiled feature model
+        :param source_hash: the content hash of the current feature model file
+        :return: the feature model or <code>None</code> if it does not exist or is outdated
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as model_file:
+            description = json.load(model_file)
+        if description.get('version') != cls.Format_Version or description.get('source_hash') != source_hash:
+            return None
+        return cls(description['names'], description['binary'], description['mandatory'], description['parents'],
+                   description['exclusions'], description['implications'], source_hash)
@@ -0,0 +1,113 @@
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Set, Tuple
+
+
+class JobRunner:
+    """
+    This class executes the jobs of a job file (one shell command per line, e.g., jobs.txt of the option level) on the
+    local machine instead of a slurm queue. The jobs are executed by a bounded pool of processes, whose size is also
+    limited by the available memory and the memory each job requests. The output of each job is written to its own
+    log file and failed jobs are retried. Completed jobs are recorded next to the job file so that an interrupted
+    execution resumes with the jobs that are not completed yet.
+    """
+
+    Completed_Suffix = ".completed"
+    Log_Directory = "job_logs"
+
+    def __init__(self, processes: int, memory_per_job: int, retries: int = 2) -> None:
+        """
+        :param processes: the maximum number of jobs executed in parallel
+        :param memory_per_job: the memory in MB each job requires
+        :param retries: the number of times a failed job is executed again
+        """
+        self.processes = max(1, min(processes, self.get_available_memory() // max(memory_per_job, 1)))
+        self.retries = retries
+
+    @staticmethod
+    def parse_memory(sbatch_options: str) -> int:
+        """
+        Extracts the memory per job from the given sbatch options (e.g., '--mem=15000M').
+        :param sbatch_options: the options of sbatch
+        :return: the memory in MB or 0 if no memory is requested
+        """
+        match = re.search(r"--mem=(\d+)([KMGT]?)", sbatch_options)
+        if match is None:
+            return 0
+        factors = {"K": 1 / 1024, "": 1, "M": 1, "G": 1024, "T": 1024 * 1024}
+        return int(int(match.group(1)) * factors[match.group(2)])
+
+    @staticmethod
+    def get_available_memory() -> int:
+        """
+        :return: the available memory in MB (or the physical memory if the available memory is unknown)
+        """
+        if os.path.exists("/proc/meminfo"):
+            with open("/proc/meminfo", 'r') as meminfo_file:
+                for line in meminfo_file.readlines():
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) // 1024
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+
+    @staticmethod
+    def read_jobs(path: str) -> List[str]:
+        with open(path, 'r') as job_file:
+            return [line.strip() for line in job_file.readlines() if line.strip() != ""]
+
+    def read_completed_jobs(self, path: str) -> Set[str]:
+        if not os.path.exists(path + self.Completed_Suffix):
+            return set()
+        return set(self.read_jobs(path + self.Completed_Suffix))
+
+    def execute_job(self, command: str, working_directory: str, log_path: str) -> bool:
+        """
+        Executes the given job and retries it if it fails.
+        :param command: the shell command of the job
+        :param working_directory: the directory the job is executed in
+        :param log_path: the path to the log file of the job
+        :return: <code>True</code> iff the job was executed successfully
+        """
+        with open(log_path, 'w') as log_file:
+            for attempt in range(self.retries + 1):
+                log_file.write(f"Attempt {attempt + 1}: {command}\n")
+                log_file.flush()
+                result = subprocess.run(command, shell=True, cwd=working_directory, stdout=log_file,
+                                        stderr=subprocess.STDOUT)
+                if result.returncode == 0:
+                    return True
+                log_file.write(f"Exit code {result.returncode}\n")
+        return False
+
+    def run(self, paths: List[str]) -> bool:
+        """
+        Executes all jobs of the given job files that are not completed yet in one pool. The jobs are executed in the
+        directory of their job file.
+        :param paths: the paths to the job files
+        :return: <code>True</code> iff all jobs are completed
+        """
+        jobs: List[Tuple[str, str, str]] = []
+        for path in paths:
+            log_directory = os.path.join(os.path.dirname(os.path.abspath(path)), self.Log_Directory)
+            os.makedirs(log_directory, exist_ok=True)
+            name = os.path.splitext(os.path.basename(path))[0]
+            completed_jobs = self.read_completed_jobs(path)
+            jobs += [(path, command, os.path.join(log_directory, f"{name}_{index}.log"))
+                     for index, command in enumerate(self.read_jobs(path)) if command not in completed_jobs]
+        print(f"\n\t\tExecuting {len(jobs)} jobs with {self.processes} processes...", end="")
+
+        failed_jobs: List[Tuple[str, str]] = []
+        with ThreadPoolExecutor(max_workers=self.processes) as executor:
+            futures = {executor.submit(self.execute_job, command, os.path.dirname(os.path.abspath(path)),
+                                       log_path): (path, command, log_path) for path, command, log_path in jobs}
+            for future in as_completed(futures):
+                path, command, log_path = futures[future]
+                if future.result():
+                    with open(path + self.Completed_Suffix, 'a') as completed_file:
+                        completed_file.write(command + "\n")
+                else:
+                    failed_jobs.append((command, log_path))
+        for command, log_path in failed_jobs:
+            print(f"\nThe job '{command}' failed (see {log_path}).")
+        return len(failed_jobs) == 0
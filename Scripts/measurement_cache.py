@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class MeasurementCache:
+    """
+    This class stores the converted measurement and deviation data frames of a case study in a columnar binary format.
+    Each column is written as a separate numpy file: numeric columns keep their dtype, whereas all other columns
+    (e.g., the options, the workload, and the revision) are stored as categorical codes of the smallest possible
+    integer type together with their categories.
+    The entries are keyed by a content hash of the input files (i.e., the csv files and the feature model) and of the
+    workloads of the case study so that changed input files or workloads invalidate the cache automatically.
+    """
+
+    Format_Version = 1
+    Columns_File = "columns.json"
+
+    def __init__(self, cache_path: str) -> None:
+        self.cache_path = cache_path
+
+    @staticmethod
+    def compute_key(case_study_name: str, paths: List[str], workloads: List[str] = None) -> str:
+        """
+        Computes the cache key from the content of the given files.
+        :param case_study_name: the name of the case study, since the conversion of the measurements depends on it
+        :param paths: the paths to the input files (e.g., feature model, measurements, and deviations)
+        :param workloads: the workloads of the case study (see process_workloads.WORKLOADS), since the workload
+        columns are converted by them
+        :return: the hex digest of the content hash
+        """
+        content_hash = hashlib.sha256()
+        content_hash.update(f"{MeasurementCache.Format_Version};{case_study_name};{json.dumps(workloads)}".encode())
+        for path in paths:
+            with open(path, 'rb') as input_file:
+                for chunk in iter(lambda: input_file.read(1 << 20), b''):
+                    content_hash.update(chunk)
+        return content_hash.hexdigest()
+
+    def get_entry_path(self, key: str, name: str) -> str:
+        return os.path.join(self.cache_path, key, name)
+
+    def load(self, key: str, name: str) -> Optional[pd.DataFrame]:
+        """
+        Loads the data frame with the given name from the cache.
+        :param key: the cache key of the input files
+        :param name: the name of the data frame (e.g., 'measurements')
+        :return: the data frame or <code>None</code> if there is no valid cache entry
+        """
+        entry_path = self.get_entry_path(key, name)
+        if not os.path.exists(os.path.join(entry_path, self.Columns_File)):
+            return None
+        with open(os.path.join(entry_path, self.Columns_File), 'r') as columns_file:
+            columns: List[Dict] = json.load(columns_file)
+        data = dict()
+        for position, column in enumerate(columns):
+            values = np.load(os.path.join(entry_path, f"{position}.npy"), allow_pickle=False)
+            if column['kind'] == 'category':
+                # The last category is reserved for missing values (code -1)
+                categories = np.empty(len(column['categories']) + 1, dtype=object)
+                categories[:-1] = column['categories']
+                categories[-1] = np.nan
+                values = categories[values]
+            data[column['name']] = values
+        return pd.DataFrame(data, columns=[column['name'] for column in columns])
+
+    def store(self, key: str, name: str, frame: pd.DataFrame) -> None:
+        """
+        Stores the given data frame in the cache. Entries of outdated keys are removed.
+        :param key: the cache key of the input files
+        :param name: the name of the data frame (e.g., 'measurements')
+        :param frame: the data frame to store
+        """
+        self.remove_outdated_entries(key)
+        entry_path = self.get_entry_path(key, name)
+        temporary_path = f"{entry_path}.tmp{os.getpid()}"
+        if os.path.exists(temporary_path):
+            shutil.rmtree(temporary_path)
+        os.makedirs(temporary_path)
+
+        columns: List[Dict] = []
+        for position, column_name in enumerate(frame.columns):
+            column_values = frame[column_name]
+            if pd.api.types.is_numeric_dtype(column_values.dtype) and not pd.api.types.is_bool_dtype(
+                    column_values.dtype):
+                columns.append(dict(name=column_name, kind='numeric'))
+                values = column_values.to_numpy()
+            else:
+                codes, categories = pd.factorize(column_values, use_na_sentinel=True)
+                columns.append(dict(name=column_name, kind='category', categories=categories.tolist()))
+                values = codes.astype(np.min_scalar_type(-max(len(categories), 1)))
+            np.save(os.path.join(temporary_path, f"{position}.npy"), values, allow_pickle=False)
+
+        # Write the column description last; it marks the entry as complete
+        with open(os.path.join(temporary_path, self.Columns_File), 'w') as columns_file:
+            json.dump(columns, columns_file)
+        if os.path.exists(entry_path):
+            shutil.rmtree(entry_path)
+        os.replace(temporary_path, entry_path)
+
+    def remove_outdated_entries(self, key: str) -> None:
+        if not os.path.exists(self.cache_path):
+            return
+        for entry in os.listdir(self.cache_path):
+            if entry != key and os.path.isdir(os.path.join(self.cache_path, entry)):
+                shutil.rmtree(os.path.join(self.cache_path, entry), ignore_errors=True)
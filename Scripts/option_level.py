@@ -9,15 +9,18 @@ import sys
 from shutil import copyfile
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from pandas import pivot_table
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict
 from typing import List
 from typing import Tuple
 from utilities import *
 from vif_analysis import VIFAnalyzer
+from performance_model_learner import PerformanceModelLearner
+from plot_renderer import PlotRenderer
+from stage_profiler import StageProfiler
+from job_runner import JobRunner
+from array_store import LabeledArray
 from feature import Feature
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -33,6 +36,20 @@ class OptionLevel(AnalysisLevels):
                      "--time='24:00:00' " \
                      "--output=/scratch/kaltenec/Workloads/slurm_out.log "
 
+    # Either "incremental" (term by term) or "rank_revealing" (one decomposition per workload and release)
+    Multicollinearity_Mode = "incremental"
+    Multicollinearity_Modes = ["incremental", "rank_revealing"]
+
+    # Either "splconqueror" (slurm jobs for SPL Conqueror), "local" (SPL Conqueror jobs executed on the local machine),
+    # or "native" (in-process learner writing models.csv directly)
+    Model_Learner = "splconqueror"
+    # The number of times a failed job is executed again by the local job runner
+    Job_Retries = 2
+    # Whether only the models of the releases that are missing from models.csv are learned and added to it
+    Incremental = False
+    # Lists the releases whose models are added to models.csv as soon as they are learned (incremental mode)
+    Pending_Revisions_File = "pending_revisions.txt"
+
     def __init__(self):
         # Initialize for data gathering
         self.changes_in_revisions_and_workloads: Dict[str, Dict[str, List[Tuple[str, bool, str]]]] = dict()
@@ -77,6 +94,20 @@ class OptionLevel(AnalysisLevels):
         workloads = process_workloads.WORKLOADS[str(case_study.name)]
         revisions = list(dict.fromkeys(case_study.configurations.revision))
 
+        if self.Incremental and os.path.exists(os.path.join(models_path, "models.csv")):
+            performance_models = pd.read_csv(os.path.join(models_path, "models.csv"), sep=";",
+                                             usecols=['workload', 'revision'], dtype=str)
+            learned_models = set(zip(performance_models['workload'], performance_models['revision']))
+            new_revisions = [revision for revision in revisions
+                             if any((workload, revision) not in learned_models for workload in workloads)]
+            if len(new_revisions) > 0:
+                self.learn_new_revisions(case_study, input_path, models_path, workloads, new_revisions)
+            return
+
+        if self.Model_Learner == "native" and not os.path.exists(os.path.join(models_path, "models.csv")):
+            self.learn_models(case_study, input_path, models_path, workloads, revisions)
+            return
+
         if not os.path.exists(models_path):
             print("\n\t\tCreating new slurm job for " + case_study.name + "...", end="")
 
@@ -88,67 +119,240 @@ class OptionLevel(AnalysisLevels):
             # Extract the measurement files
             all_configurations = case_study.configurations
             header = list(
-                filter(lambda x: x != process_workloads.WORKLOAD_COLUMN_NAME and x != "revision",
-                       all_configurations.columns.values))
+                filter(lambda x: x != process_workloads.WORKLOAD_COLUMN_NAME and x != "revision"
+                                 and x != CaseStudy.Configuration_Key, all_configurations.columns.values))
 
             self.create_iterative_learning_jobs(all_configurations, header, models_path, workloads, revisions)
-
-        elif not os.path.exists(os.path.join(models_path, "model_base.txt")):
-            multicollinearity_features_that_will_be_removed = self.identify_removed_multicollinearity_features(
-                case_study)
+            # Without the local job runner, the jobs have to be executed (e.g., by slurm) before the next phase
+            if self.Model_Learner != "local":
+                return
+
+        if not os.path.exists(os.path.join(models_path, "model_base.txt")):
+            # The local job runner resumes jobs that are not completed yet
+            if self.Model_Learner == "local":
+                self.run_jobs([os.path.join(models_path, "jobs.txt")])
             # If the iterative models are learned, the results have to be aggregated and new models have to be
             #  learned by using the evaluate-model functionality of SPL Conqueror
+            self.optimize_models(case_study, models_path, workloads, revisions)
+            self.create_truemodel_scripts(models_path, revisions, workloads)
             with open(os.path.join(models_path, "learn_opt.txt"), 'w') as general_learn_file:
-                terms_across_workloads = dict()
                 for workload in workloads:
-                    all_terms = dict()
                     for revision in revisions:
-                        performance_model, model_error = self.get_performance_model(
-                            os.path.join(models_path, f"{workload}_{revision}.log"))
-                        if performance_model == "":
-                            print(f"Performance model is empty in {case_study.name} {revision} {workload}!")
-                            exit(-1)
-                        term_dict = self.process_model(performance_model, case_study,
-                                                       multicollinearity_features_that_will_be_removed)
+                        general_learn_file.write(
+                            f"mono {self.SPLConqueror_Path} {os.path.join(models_path, f'learn_{workload}_{revision}.a')}\n")
+            if self.Model_Learner != "local":
+                return
 
-                        self.combine_dicts(all_terms, term_dict)
+        if not os.path.exists(os.path.join(models_path, "models.csv")):
+            if self.Model_Learner == "local":
+                self.run_jobs([os.path.join(models_path, f"jobs_{workload}.txt") for workload in workloads])
+            self.extract_models(models_path, revisions, workloads, "opt")
 
-                    self.combine_dicts(terms_across_workloads, all_terms)
+    def learn_new_revisions(self, case_study: CaseStudy, input_path: str, models_path: str, workloads: List[str],
+                            new_revisions: List[str]) -> None:
+        """
+        Learns and optimizes the performance-influence models of the given (new) releases only and adds them to
+        models.csv. The models are optimized with the terms of the previous models so that the models of all releases
+        share the same terms. As long as the models are learned by jobs, the releases are listed in
+        pending_revisions.txt.
+        """
+        print(f"\n\t\tLearning the performance-influence models of the releases {', '.join(new_revisions)}...",
+              end="")
+        sys.stdout.flush()
+        pending_path = os.path.join(models_path, self.Pending_Revisions_File)
+        with open(pending_path, 'w') as pending_file:
+            pending_file.writelines([revision + "\n" for revision in new_revisions])
+        # The terms of the previous models are the columns of models.csv
+        model_base_path = os.path.join(models_path, "model_base.txt")
+        if not os.path.exists(model_base_path) or os.path.getsize(model_base_path) == 0:
+            with open(os.path.join(models_path, "models.csv"), 'r') as models_file:
+                self.write_model(models_file.readline().strip().split(";")[2:-1], model_base_path)
+
+        if self.Model_Learner == "native":
+            self.learn_models(case_study, input_path, models_path, workloads, new_revisions, append=True)
+            os.remove(pending_path)
+            return
+
+        if not all(os.path.exists(os.path.join(models_path, f"{workload}_{revision}.log"))
+                   for workload in workloads for revision in new_revisions):
+            header = list(filter(lambda x: x != process_workloads.WORKLOAD_COLUMN_NAME and x != "revision"
+                                 and x != CaseStudy.Configuration_Key, case_study.configurations.columns.values))
+            self.create_iterative_learning_jobs(case_study.configurations, header, models_path, workloads,
+                                                new_revisions)
+            if self.Model_Learner != "local":
+                return
+            self.run_jobs([os.path.join(models_path, "jobs.txt")])
+
+        if not all(os.path.exists(os.path.join(models_path, f"{workload}_{revision}_opt.log"))
+                   for workload in workloads for revision in new_revisions):
+            self.optimize_revision_models(case_study, models_path, workloads, new_revisions)
+            self.create_truemodel_scripts(models_path, new_revisions, workloads)
+            if self.Model_Learner != "local":
+                return
+            self.run_jobs([os.path.join(models_path, f"jobs_{workload}.txt") for workload in workloads])
+
+        self.extract_models(models_path, new_revisions, workloads, "opt", append=True)
+        os.remove(pending_path)
+
+    def run_jobs(self, job_files: List[str]) -> None:
+        """
+        Executes the given job files on the local machine. The number of parallel jobs is limited by the number of
+        processes and the memory that is requested for each job in the sbatch options.
+        """
+        job_runner = JobRunner(self.processes, JobRunner.parse_memory(self.SBatch_Options), self.Job_Retries)
+        if not job_runner.run(job_files):
+            print(f"Not all jobs were executed successfully!")
+            exit(-1)
 
-                for workload in workloads:
-                    terms = self.sort_terms(list(terms_across_workloads.keys()), case_study)
+    def optimize_models(self, case_study: CaseStudy, models_path: str, workloads: List[str],
+                        revisions: List[str]) -> None:
+        """
+        Aggregates the terms of the iterative models of all workloads and releases and removes multicollinear terms
+        from the resulting model for each workload and release (model_opt_*.txt). The aggregated terms are written to
+        model_base.txt.
+        """
+        multicollinearity_features_that_will_be_removed = self.identify_removed_multicollinearity_features(
+            case_study)
+        terms_across_workloads = dict()
+        for workload in workloads:
+            all_terms = dict()
+            for revision in revisions:
+                performance_model, model_error = self.get_performance_model(
+                    os.path.join(models_path, f"{workload}_{revision}.log"))
+                if performance_model == "":
+                    print(f"Performance model is empty in {case_study.name} {revision} {workload}!")
+                    exit(-1)
+                term_dict = self.process_model(performance_model, case_study,
+                                               multicollinearity_features_that_will_be_removed)
 
-                    self.write_model(terms, os.path.join(models_path, f"model_base_{workload}.txt"))
+                self.combine_dicts(all_terms, term_dict)
 
-                    # Optimize the models by using the Variance Influence Factor (VIF)
-                    vif_analyzer = VIFAnalyzer(case_study, os.path.join(models_path, f"model_base_{workload}.txt"))
-                    term_number = len(vif_analyzer.terms)
-                    model_with_countermeasures = vif_analyzer.apply_multicollinearity_countermeasures()
-                    if len(model_with_countermeasures) < term_number:
-                        print(f"In the case study {case_study.name}, some terms were dropped due to countermeasures.")
-                    # Optimize the models for each workload and release
-                    for revision in revisions:
-                        new_model = vif_analyzer.apply_iterative_vif(model_with_countermeasures, case_study.Performance,
-                                                                     os.path.join(models_path,
-                                                                                  f"conflicts_{workload}_{revision}.txt"),
-                                                                     workload=workload, revision=revision)
+            self.combine_dicts(terms_across_workloads, all_terms)
 
-                        # Print the new model
-                        converted_model = list(map(lambda a: " * ".join(a), new_model))
-                        opt_file = os.path.join(models_path, f"model_opt_{workload}_{revision}.txt")
-                        self.write_model(converted_model, opt_file)
+        for workload in workloads:
+            terms = self.sort_terms(list(terms_across_workloads.keys()), case_study)
+            self.write_model(terms, os.path.join(models_path, f"model_base_{workload}.txt"))
+        self.optimize_revision_models(case_study, models_path, workloads, revisions)
 
-                    self.create_truemodel_scripts(models_path, revisions, workloads)
-                    for revision in revisions:
-                        general_learn_file.write(
-                            f"mono {self.SPLConqueror_Path} {os.path.join(models_path, f'learn_{workload}_{revision}.a')}\n")
+        terms_all_workloads = self.sort_terms(list(terms_across_workloads.keys()), case_study)
 
-            terms_all_workloads = self.sort_terms(list(terms_across_workloads.keys()), case_study)
+        self.write_model(terms_all_workloads, os.path.join(models_path, f"model_base.txt"))
 
-            self.write_model(terms_all_workloads, os.path.join(models_path, f"model_base.txt"))
+    def optimize_revision_models(self, case_study: CaseStudy, models_path: str, workloads: List[str],
+                                 revisions: List[str]) -> None:
+        """
+        Removes multicollinear terms from the model of each workload (model_base_<workload>.txt or, if it does not
+        exist, model_base.txt) for each of the given releases (model_opt_*.txt).
+        """
+        for workload in workloads:
+            model_path = os.path.join(models_path, f"model_base_{workload}.txt")
+            if not os.path.exists(model_path):
+                model_path = os.path.join(models_path, "model_base.txt")
+            # Optimize the models by using the Variance Influence Factor (VIF)
+            vif_analyzer = VIFAnalyzer(case_study, model_path)
+            term_number = len(vif_analyzer.terms)
+            model_with_countermeasures = vif_analyzer.apply_multicollinearity_countermeasures()
+            if len(model_with_countermeasures) < term_number:
+                print(f"In the case study {case_study.name}, some terms were dropped due to countermeasures.")
+            # Optimize the models for each workload and release
+            for revision in revisions:
+                if self.Multicollinearity_Mode == "rank_revealing":
+                    apply_vif = vif_analyzer.apply_rank_revealing_pruning
+                else:
+                    apply_vif = vif_analyzer.apply_incremental_vif
+                with StageProfiler.span(f"VIF/{case_study.name}/{workload}/{revision}", "vif",
+                                        terms=len(model_with_countermeasures)) as counts:
+                    new_model = apply_vif(model_with_countermeasures, case_study.Performance,
+                                          os.path.join(models_path, f"conflicts_{workload}_{revision}.txt"),
+                                          workload=workload, revision=revision)
+                    counts['kept_terms'] = len(new_model)
+
+                # Print the new model
+                converted_model = list(map(lambda a: " * ".join(a), new_model))
+                opt_file = os.path.join(models_path, f"model_opt_{workload}_{revision}.txt")
+                self.write_model(converted_model, opt_file)
+
+    def learn_models(self, case_study: CaseStudy, input_path: str, models_path: str, workloads: List[str],
+                     revisions: List[str], append: bool = False) -> None:
+        """
+        Learns the performance-influence models in-process instead of creating jobs for SPL Conqueror. The models of
+        both learning steps are written as log files in the format of SPL Conqueror; already learned models are kept.
+        Afterwards, the models are extracted into models.csv.
+        :param append: whether the models of the given releases are added to the existing models.csv
+        """
+        print("\n\t\tLearning the performance-influence models of " + case_study.name + "...", end="")
+        sys.stdout.flush()
+        super().create_directory(models_path)
+        copyfile(os.path.join(input_path, "FeatureModel.xml"), os.path.join(models_path, "FeatureModel.xml"))
+
+        all_configurations = case_study.configurations
+        configurations = all_configurations[pd.to_numeric(all_configurations[CaseStudy.Performance]) != 0.0]
+        slices = configurations.groupby([process_workloads.WORKLOAD_COLUMN_NAME, 'revision'], sort=False,
+                                        observed=True)
+        # As in the models of SPL Conqueror, the first strictly mandatory option (other than root) is the base term
+        mandatory_options = [option for option in case_study.binary_options
+                             if option != "root" and case_study.is_strictly_mandatory(option)]
+        base_option = mandatory_options[0] if len(mandatory_options) > 0 else case_study.binary_options[0]
+        options = [base_option] + [option for option in case_study.binary_options
+                                   if option != base_option and option != "root"]
+
+        def get_slice(workload: str, revision: str) -> pd.DataFrame:
+            if (workload, revision) not in slices.groups:
+                print(f"Workload {workload} of release {revision} has no configurations != 0")
+                return configurations.iloc[:0]
+            return slices.get_group((workload, revision))[options + [CaseStudy.Performance]]
+
+        # Learn the iterative models
+        missing = [(workload, revision) for revision in revisions for workload in workloads
+                   if not os.path.exists(os.path.join(models_path, f"{workload}_{revision}.log"))]
+        logs = self.map_slices(OptionLevel.learn_slice, [get_slice(*key) for key in missing],
+                               [options] * len(missing))
+        for (workload, revision), log in zip(missing, logs):
+            with open(os.path.join(models_path, f"{workload}_{revision}.log"), 'w') as log_file:
+                log_file.writelines(list(map(lambda x: x + "\n", log)))
+
+        if not os.path.exists(os.path.join(models_path, "model_base.txt")):
+            self.optimize_models(case_study, models_path, workloads, revisions)
+        else:
+            # The models of further releases are optimized with the existing terms
+            missing_revisions = [revision for revision in revisions if not all(
+                os.path.exists(os.path.join(models_path, f"model_opt_{workload}_{revision}.txt"))
+                for workload in workloads)]
+            self.optimize_revision_models(case_study, models_path, workloads, missing_revisions)
+
+        # Learn the coefficients of the optimized models
+        missing = [(workload, revision) for workload in workloads for revision in revisions
+                   if not os.path.exists(os.path.join(models_path, f"{workload}_{revision}_opt.log"))]
+        terms = []
+        for workload, revision in missing:
+            with open(os.path.join(models_path, f"model_opt_{workload}_{revision}.txt"), 'r') as model_file:
+                terms.append([list(map(lambda x: x.strip(), line.split("*"))) for line in model_file.readlines()
+                              if line.strip() != ""])
+        logs = self.map_slices(OptionLevel.fit_slice, [get_slice(*key) for key in missing], terms)
+        for (workload, revision), log in zip(missing, logs):
+            with open(os.path.join(models_path, f"{workload}_{revision}_opt.log"), 'w') as log_file:
+                log_file.writelines(list(map(lambda x: x + "\n", log)))
+
+        self.extract_models(models_path, revisions, workloads, "opt", append)
+
+    def map_slices(self, function, *arguments) -> List:
+        if self.processes > 1:
+            with ProcessPoolExecutor(max_workers=self.processes) as executor:
+                return list(executor.map(function, *arguments))
+        return list(map(function, *arguments))
 
-        elif not os.path.exists(os.path.join(models_path, "models.csv")):
-            self.extract_models(models_path, revisions, workloads, "opt")
+    @staticmethod
+    def learn_slice(configurations: pd.DataFrame, options: List[str]) -> List[str]:
+        if len(configurations) == 0:
+            return []
+        return PerformanceModelLearner().learn(configurations, options, CaseStudy.Performance)[2]
+
+    @staticmethod
+    def fit_slice(configurations: pd.DataFrame, terms: List[List[str]]) -> List[str]:
+        if len(configurations) == 0:
+            return []
+        model, error = PerformanceModelLearner().fit(configurations, terms, CaseStudy.Performance)
+        return [f"0;{model};{error}"]
 
     def create_truemodel_scripts(self, models_path: str, revisions: List[str], workloads: List[str]) -> None:
         # Learn the model
@@ -175,7 +379,13 @@ class OptionLevel(AnalysisLevels):
                         all_lines.append(f'truemodel model_opt_{workload}_{revision}.txt')
                         a_file.writelines(list(map(lambda x: x + "\n", all_lines)))
 
-    def extract_models(self, models_path: str, revisions: List[str], workloads: List[str], suffix: str) -> None:
+    def extract_models(self, models_path: str, revisions: List[str], workloads: List[str], suffix: str,
+                       append: bool = False) -> None:
+        """
+        Combines the performance-influence models of the given workloads and releases into models.csv.
+        :param append: whether the models are added to the models in models.csv (with its columns); as when all models
+        are extracted, the rows are ordered by the workloads and then by the releases
+        """
         # (only if all performance-influence models are learned:) Combine all performance-influence models
         #  into one single file for each release
         # Use the model_opt.txt file as header
@@ -185,24 +395,36 @@ class OptionLevel(AnalysisLevels):
             header.insert(0, "revision")
             header.insert(0, "workload")
             header.insert(len(header), "error")
+        rows = []
+        for workload in workloads:
+            for revision in revisions:
+                revision_dict = dict()
+                revision_dict["workload"] = f"{workload}"
+                revision_dict["revision"] = f"{revision}"
+                performance_model, model_error = self.get_performance_model(
+                    os.path.join(models_path, f"{workload}_{str(revision)}_opt.log"))
+                terms = performance_model.split("+")
+                for term in terms:
+                    elements = term.strip().split("*")
+                    elements = list(map(lambda x: x.strip(), elements))
+                    options = ' * '.join(elements[1:])
+                    revision_dict[options] = elements[0]
+                revision_dict["error"] = model_error
+                rows.append(revision_dict)
+        if append:
+            with open(os.path.join(models_path, "models.csv"), 'r', newline="") as models_file:
+                reader = csv.DictReader(models_file, delimiter=";")
+                header = reader.fieldnames
+                previous_rows = list(reader)
+            models = {(row["workload"], row["revision"]): row for row in previous_rows + rows}
+            workload_order = list(dict.fromkeys([row["workload"] for row in previous_rows] + workloads))
+            revision_order = list(dict.fromkeys([row["revision"] for row in previous_rows] + revisions))
+            rows = [models[(workload, revision)] for workload in workload_order for revision in revision_order
+                    if (workload, revision) in models]
         with open(os.path.join(models_path, "models.csv"), 'w', newline="\n") as models_file:
             dict_writer = csv.DictWriter(models_file, delimiter=";", fieldnames=header)
             dict_writer.writeheader()
-            for workload in workloads:
-                for revision in revisions:
-                    revision_dict = dict()
-                    revision_dict["workload"] = f"{workload}"
-                    revision_dict["revision"] = f"{revision}"
-                    performance_model, model_error = self.get_performance_model(
-                        os.path.join(models_path, f"{workload}_{str(revision)}_opt.log"))
-                    terms = performance_model.split("+")
-                    for term in terms:
-                        elements = term.strip().split("*")
-                        elements = list(map(lambda x: x.strip(), elements))
-                        options = ' * '.join(elements[1:])
-                        revision_dict[options] = elements[0]
-                    revision_dict["error"] = model_error
-                    dict_writer.writerow(revision_dict)
+            dict_writer.writerows(rows)
 
     def sort_terms(self, term_list: List[str], case_study: CaseStudy) -> List[str]:
         """
@@ -322,7 +544,9 @@ class OptionLevel(AnalysisLevels):
         for y in second_list:
             for x in first_list:
                 l = list(x)
-                l.append(y)
+                # Binary options are idempotent (x * x = x)
+                if y not in l:
+                    l.append(y)
                 result.append(sorted(l))
         return result
 
@@ -342,6 +566,10 @@ class OptionLevel(AnalysisLevels):
         pass
 
     def generate_plots(self, case_study: CaseStudy, path: str, input_path: str) -> None:
+        if os.path.exists(os.path.join(input_path, case_study.name, "models", self.Pending_Revisions_File)):
+            print(f"\n\t\tThe performance-influence models of the new releases of {case_study.name} are not learned "
+                  f"yet...", end="")
+            return
         if os.path.exists(os.path.join(input_path, case_study.name, "models", "models.csv")):
             with open(os.path.join(input_path, case_study.name, "models", "models.csv")) as models_file:
                 self.generate_influence_difference_plots(case_study, input_path, models_file, path)
@@ -360,16 +588,8 @@ class OptionLevel(AnalysisLevels):
                         plot_data[y] = performance_models.iloc[y][2:len(
                             performance_models.columns) - 1]
 
-                    config_data = case_study.configurations[
-                        case_study.configurations[process_workloads.WORKLOAD_COLUMN_NAME] == workload]
-                    mean_values = pivot_table(config_data[config_data['performance'] != 1800], values='performance',
-                                              index=['revision'])
-                    mean_values = mean_values.iloc[mean_values.index.map(revisions.index).argsort()]
-
-                    deviation_values = pivot_table(case_study.deviations, values='performance',
-                                                   index=['revision'])
-                    deviation_values = deviation_values.iloc[deviation_values.index.map(revisions.index).argsort()]
-                    deviation_values.reset_index(inplace=True)
+                    mean_values = case_study.get_mean_performance(workload)
+                    deviation_values = case_study.get_mean_deviation().reset_index()
                     changed = np.zeros(len(revisions) - 1)
                     relevant_performance_model_columns = dict()
 
@@ -406,23 +626,11 @@ class OptionLevel(AnalysisLevels):
         for releases in sorted(self.number_term_changes_per_release.keys()):
             term_changes.append(self.number_term_changes_per_release[releases])
 
-        plt.rcParams['xtick.bottom'] = True
-        plt.figure(figsize=(12, 11))
-        sns.set_color_codes("muted")
-        ax = sns.barplot(x=[label.replace("_", ".") for label in sorted(self.number_term_changes_per_release.keys())],
-                         y=term_changes,
-                         color='b')
-
-        fig = ax.get_figure()
-        ax.set_ylabel("Terms [%]", fontsize=50)
-        ax.set_xlabel("Releases", fontsize=50, labelpad=20)
-        plt.xticks(rotation=45, ha='right')
-        # ax.tick_params(labelsize=50)
-        ax.set_ylim([0, 100])
-
-        fig.tight_layout()
-        fig.savefig(os.path.join(output_path, 'termChanges.pdf'))
-        plt.close(fig)
+        PlotRenderer.submit(PlotRenderer.Barplot, os.path.join(output_path, 'termChanges.pdf'),
+                            dict(labels=[label.replace("_", ".") for label in
+                                         sorted(self.number_term_changes_per_release.keys())],
+                                 values=term_changes, figsize=[12, 11], xlabel="Releases", ylabel="Terms [%]",
+                                 fontsize=50, xlabel_pad=20, xtick_rotation=45, ylim=[0, 100]))
 
     def store_performance_change(self, term: str, from_revision: str, to_revision: str, workload: str, speed_up: bool,
                                  amount_change: str, renamed_term: str = None) -> None:
@@ -454,160 +662,147 @@ class OptionLevel(AnalysisLevels):
                                                                                        list(performance_models.columns)[
                                                                                        2:])
         for workload in workloads:
-            plot_data = np.zeros((len(revisions), len(performance_models.columns) - 3))
-            performance_models_workload = performance_models[
-                performance_models[process_workloads.WORKLOAD_COLUMN_NAME] == workload]
-            for y in range(0, len(revisions)):
-                plot_data[len(revisions) - 1 - y] = performance_models_workload.iloc[y][2:len(
-                    performance_models_workload.columns) - 1]
-
-            for y in range(0, len(revisions)):
-                for column_to_add_index, columns_to_add_to_indexes in colums_to_add:
-                    for colum_to_add_to_index in columns_to_add_to_indexes:
-                        plot_data[len(revisions) - 1 - y][colum_to_add_to_index] += plot_data[len(revisions) - 1 - y][
-                            column_to_add_index]
-            for y in range(0, len(revisions)):
-                for column_to_add_index, columns_to_add_to_indexes in columns_to_add_from:
-                    for colum_to_add_from_index in columns_to_add_to_indexes:
-                        plot_data[len(revisions) - 1 - y][
-                            column_to_add_index] += performance_models_workload.iloc[y][colum_to_add_from_index + 2]
-
-            # Export the processed data for the recall analysis
-            self.write_plot_data(plot_data, os.path.join(input_path, f"plot_data_{workload}.json"))
-
-            fontsize = 20
-            cmap = plt.get_cmap('RdBu_r')
-            fig = plt.figure(figsize=(18, 10))
-            ax = fig.add_subplot(1, 1, 1)
-            greatest_value = max(abs(np.nanmin(plot_data)), abs(np.nanmax(plot_data)))
-            cm = ax.pcolormesh(plot_data, cmap=cmap, vmin=-greatest_value, vmax=greatest_value)
-            ax.set_title(case_study.name, fontsize=fontsize)
-            ax.set_ylabel('Release', fontsize=fontsize)
-            ax.set_xlabel('Term', fontsize=fontsize)
-            ax.set_yticks(np.arange(0.5, len(revisions) + 0.5, step=1.0))
-            ax.set_yticklabels(reversed(revisions))
-            tmp = list(performance_models_workload.columns[2:-1])
-            ax.set_xticks(np.arange(0.5, len(tmp) + 0.5, step=1.0))
-            ax.set_xticklabels(tmp, rotation=45, ha='right', fontsize=20)
-            cb = fig.colorbar(cm, ax=ax)
-            cb.ax.tick_params(labelsize=fontsize)
-            cb.set_label('Influence [s]', fontsize=fontsize)
-            fig = ax.get_figure()
-            fig.tight_layout()
-            super().create_directory(os.path.join(path, workload, 'AbsoluteInfluence'))
-            fig.savefig(os.path.join(path, workload, 'AbsoluteInfluence', 'configurationsInfluence.pdf'))
-            plt.close(fig)
-            # (II) Plot the differences of the coefficients of the terms with a heatmap
-            plot_data2 = np.copy(plot_data)
-            config_data = case_study.configurations[
-                case_study.configurations[process_workloads.WORKLOAD_COLUMN_NAME] == workload]
-            mean_values = pivot_table(config_data[config_data['performance'] != 1800], values='performance',
-                                      index=['revision'])
-            mean_values = mean_values.iloc[mean_values.index.map(revisions.index).argsort()]
-            term_dictionary = dict()
-            term_ci_dictionary = dict()
-            deviation_values = pivot_table(case_study.deviations, values='performance', index=['revision'])
-            deviation_values = deviation_values.iloc[deviation_values.index.map(revisions.index).argsort()]
-            deviation_values.reset_index(inplace=True)
-            term_renaming = self.column_renaming_for_multicollinearity(case_study)
-            with open(os.path.join(input_path, case_study.name, "relevantTerms.txt"), 'w') as term_file:
-                for y in range(1, len(revisions)):
-                    terms = ""
-
-                    term_dictionary[revisions[y - 1] + "-" + revisions[y]] = [[], 0, [0, 0, 0, 0, 0, 0, 0], 0]
-                    term_ci_dictionary[revisions[y - 1] + "-" + revisions[y]] = [[], 0]
-                    standard_deviation = max(mean_values.iloc[len(revisions) - 1 - y]['performance'] * \
-                                             deviation_values.iloc[len(revisions) - 1 - y]['performance'],
-                                             mean_values.iloc[len(revisions) - y]['performance'] * \
-                                             deviation_values.iloc[len(revisions) - y]['performance']) / \
-                                         case_study.get_division_factor()
-                    min_value = 2 * standard_deviation
-                    relevant_column_counter = 0
-                    for i in range(0, len(performance_models_workload.columns) - 3):
-                        difference = - (plot_data[len(revisions) - y][i] - plot_data[len(revisions) - 1 - y][i])
-                        term_dictionary[revisions[y - 1] + "-" + revisions[y]][3] += 1
-                        if abs(difference) > min_value and plot_data[len(revisions) - 1 - y][i] != 0:
-                            relevant_column_counter += 1
-                            plot_data2[len(revisions) - 1 - y][i] = difference
-                            term_dictionary[revisions[y - 1] + "-" + revisions[y]][0].append(
-                                performance_models_workload.columns[i + 1])
-                            term_dictionary[revisions[y - 1] + "-" + revisions[y]][1] += difference
-
-                            if i == 0:
-                                terms += "root; "
-                                term_dictionary[revisions[y - 1] + "-" + revisions[y]][2][0] += 1
-                            else:
-                                terms += performance_models_workload.columns[i + 1] + ";"
-                                term_dictionary[revisions[y - 1] + "-" + revisions[y]][2][
-                                    len(performance_models_workload.columns[i + 1].split('*'))] += 1
-
-                            # Collect the change in the form of: term -> revision -> (workload, speed up -- boolean)
-                            change = difference / ((mean_values.iloc[len(revisions) - y - 1]['performance'] +
-                                                    mean_values.iloc[len(revisions) - y]['performance']) / 2) * 100
-                            # if abs(change) > 1:
-                            if performance_models_workload.columns[i + 2] in term_renaming:
-                                self.store_performance_change(performance_models_workload.columns[i + 2],
-                                                              revisions[y - 1],
-                                                              revisions[y], workload, difference < 0,
-                                                              "{:.2f}%".format(change),
-                                                              renamed_term=term_renaming[
-                                                                  performance_models_workload.columns[i + 2]])
-                            else:
-                                self.store_performance_change(performance_models_workload.columns[i + 2],
-                                                              revisions[y - 1],
-                                                              revisions[y], workload, difference < 0,
-                                                              "{:.2f}%".format(change))
+            with StageProfiler.span(f"{self.name}/{case_study.name}/{workload}", "workload",
+                                    terms=len(performance_models.columns) - 3):
+                self.generate_workload_influence_plots(case_study, input_path, path, workload, performance_models,
+                                                       revisions, colums_to_add, columns_to_add_from)
+
+    def generate_workload_influence_plots(self, case_study: CaseStudy, input_path: str, path: str, workload: str,
+                                          performance_models: pd.DataFrame, revisions: List[str],
+                                          colums_to_add: List, columns_to_add_from: List) -> None:
+        """
+        Plots the coefficients of the terms of the given workload and their differences between the releases and
+        collects the changes of the terms.
+        """
+        plot_data = np.zeros((len(revisions), len(performance_models.columns) - 3))
+        performance_models_workload = performance_models[
+            performance_models[process_workloads.WORKLOAD_COLUMN_NAME] == workload]
+        for y in range(0, len(revisions)):
+            plot_data[len(revisions) - 1 - y] = performance_models_workload.iloc[y][2:len(
+                performance_models_workload.columns) - 1]
+
+        for y in range(0, len(revisions)):
+            for column_to_add_index, columns_to_add_to_indexes in colums_to_add:
+                for colum_to_add_to_index in columns_to_add_to_indexes:
+                    plot_data[len(revisions) - 1 - y][colum_to_add_to_index] += plot_data[len(revisions) - 1 - y][
+                        column_to_add_index]
+        for y in range(0, len(revisions)):
+            for column_to_add_index, columns_to_add_to_indexes in columns_to_add_from:
+                for colum_to_add_from_index in columns_to_add_to_indexes:
+                    plot_data[len(revisions) - 1 - y][
+                        column_to_add_index] += performance_models_workload.iloc[y][colum_to_add_from_index + 2]
+
+        # Export the processed data for the recall analysis
+        self.write_plot_data(plot_data, list(reversed(revisions)), list(performance_models.columns[2:-1]),
+                             os.path.join(input_path, case_study.name, f"plot_data_{workload}"))
+
+        fontsize = 20
+        term_labels = list(performance_models_workload.columns[2:-1])
+        PlotRenderer.submit(PlotRenderer.Heatmap,
+                            os.path.join(path, workload, 'AbsoluteInfluence', 'configurationsInfluence.pdf'),
+                            dict(cmap='RdBu_r', symmetric=True, figsize=[18, 10], fontsize=fontsize,
+                                 title=case_study.name, xlabel='Term', ylabel='Release',
+                                 yticks=np.arange(0.5, len(revisions) + 0.5, step=1.0).tolist(),
+                                 yticklabels=list(reversed(revisions)),
+                                 xticks=np.arange(0.5, len(term_labels) + 0.5, step=1.0).tolist(),
+                                 xticklabels=term_labels, xtick_fontsize=20, colorbar_label='Influence [s]'),
+                            dict(values=plot_data))
+        # (II) Plot the differences of the coefficients of the terms with a heatmap
+        plot_data2 = np.copy(plot_data)
+        mean_values = case_study.get_mean_performance(workload)
+        term_dictionary = dict()
+        term_ci_dictionary = dict()
+        deviation_values = case_study.get_mean_deviation().reset_index()
+        term_renaming = self.column_renaming_for_multicollinearity(case_study)
+        with open(os.path.join(input_path, case_study.name, "relevantTerms.txt"), 'w') as term_file:
+            for y in range(1, len(revisions)):
+                terms = ""
+
+                term_dictionary[revisions[y - 1] + "-" + revisions[y]] = [[], 0, [0, 0, 0, 0, 0, 0, 0], 0]
+                term_ci_dictionary[revisions[y - 1] + "-" + revisions[y]] = [[], 0]
+                standard_deviation = max(mean_values.iloc[len(revisions) - 1 - y]['performance'] * \
+                                         deviation_values.iloc[len(revisions) - 1 - y]['performance'],
+                                         mean_values.iloc[len(revisions) - y]['performance'] * \
+                                         deviation_values.iloc[len(revisions) - y]['performance']) / \
+                                     case_study.get_division_factor()
+                min_value = 2 * standard_deviation
+                relevant_column_counter = 0
+                for i in range(0, len(performance_models_workload.columns) - 3):
+                    difference = - (plot_data[len(revisions) - y][i] - plot_data[len(revisions) - 1 - y][i])
+                    term_dictionary[revisions[y - 1] + "-" + revisions[y]][3] += 1
+                    if abs(difference) > min_value and plot_data[len(revisions) - 1 - y][i] != 0:
+                        relevant_column_counter += 1
+                        plot_data2[len(revisions) - 1 - y][i] = difference
+                        term_dictionary[revisions[y - 1] + "-" + revisions[y]][0].append(
+                            performance_models_workload.columns[i + 1])
+                        term_dictionary[revisions[y - 1] + "-" + revisions[y]][1] += difference
+
+                        if i == 0:
+                            terms += "root; "
+                            term_dictionary[revisions[y - 1] + "-" + revisions[y]][2][0] += 1
+                        else:
+                            terms += performance_models_workload.columns[i + 1] + ";"
+                            term_dictionary[revisions[y - 1] + "-" + revisions[y]][2][
+                                len(performance_models_workload.columns[i + 1].split('*'))] += 1
+
+                        # Collect the change in the form of: term -> revision -> (workload, speed up -- boolean)
+                        change = difference / ((mean_values.iloc[len(revisions) - y - 1]['performance'] +
+                                                mean_values.iloc[len(revisions) - y]['performance']) / 2) * 100
+                        # if abs(change) > 1:
+                        if performance_models_workload.columns[i + 2] in term_renaming:
+                            self.store_performance_change(performance_models_workload.columns[i + 2],
+                                                          revisions[y - 1],
+                                                          revisions[y], workload, difference < 0,
+                                                          "{:.2f}%".format(change),
+                                                          renamed_term=term_renaming[
+                                                              performance_models_workload.columns[i + 2]])
                         else:
-                            plot_data2[len(revisions) - 1 - y][i] = 0
-
-                        if plot_data[len(revisions) - y - 1][i] != 0 and plot_data[len(revisions) - y][i] == 0:
-                            print(
-                                f"Newer release results in timeout: {revisions[y - 1]} - {revisions[y]} Workload:{workload} Term: {performance_models_workload.columns[i + 2]}")
-
-                        if confidence_interval_disjoint(case_study.name,
-                                                        plot_data[len(revisions) - 1 - y][i],
-                                                        deviation_values.iloc[len(revisions) - 1 - y][
-                                                            'performance'],
-                                                        plot_data[len(revisions) - y][i],
-                                                        deviation_values.iloc[len(revisions) - y]['performance']):
-                            term_ci_dictionary[revisions[y - 1] + "-" + revisions[y]][0].append(
-                                performance_models_workload.columns[i])
-                            term_ci_dictionary[revisions[y - 1] + "-" + revisions[y]][1] += difference
-
-                    # self.changes_distribution[
-                    #    int(relevant_column_counter * 100 / (len(performance_models.columns) - 2.0))] += 1
-
-                    if terms != "" and terms != performance_models_workload.columns[1]:
-                        term_file.write(f"{workload} -- {revisions[y]}: {terms}\n")
-
-                    term_dictionary[revisions[y - 1] + "-" + revisions[y]][1] /= standard_deviation
-            plot_data2 = np.delete(plot_data2, len(revisions) - 1, axis=0)
-            cmap = plt.get_cmap('RdBu_r')
-            fig = plt.figure(figsize=(18, 8))
-            ax = fig.add_subplot(1, 1, 1)
-            greatest_value = max(abs(np.nanmin(plot_data2)), abs(np.nanmax(plot_data2)))
-            # The following code is only needed for the pervolution renewal
-            cm = ax.pcolormesh(plot_data2, cmap=cmap, vmin=-greatest_value, vmax=greatest_value)
-            # ax.set_title(case_study.name, fontsize=fontsize)
-            ax.set_ylabel('Release', fontsize=fontsize)
-            ax.set_xlabel('Configuration Choice', fontsize=fontsize)
-            ax.set_yticks(range(0, len(revisions)))
-            ax.set_yticklabels(reversed(revisions), fontsize=20)
-            tmp = list(performance_models_workload.columns[2:-1])
-            tmp[0] = 'root * blind'
-            ax.set_xticks(np.arange(0.5, len(tmp) + 0.5, step=1.0))
-            ax.set_xticklabels(tmp, rotation=45, ha='right', fontsize=20)
-            cb = fig.colorbar(cm, ax=ax, extend='both')
-            cb.ax.tick_params(labelsize=fontsize)
-            cb.set_label('Influence Difference [s]', fontsize=fontsize)
-            fig = ax.get_figure()
-            fig.tight_layout()
-            self.create_directory(os.path.join(path, workload, 'InfluenceDifference'))
-            fig.savefig(os.path.join(path, workload, 'InfluenceDifference', 'influenceDifference.pdf'))
-            plt.close(fig)
-
-    def write_plot_data(self, matrix: np.array, path: str) -> None:
-        matrix.dump(path)
+                            self.store_performance_change(performance_models_workload.columns[i + 2],
+                                                          revisions[y - 1],
+                                                          revisions[y], workload, difference < 0,
+                                                          "{:.2f}%".format(change))
+                    else:
+                        plot_data2[len(revisions) - 1 - y][i] = 0
+
+                    if plot_data[len(revisions) - y - 1][i] != 0 and plot_data[len(revisions) - y][i] == 0:
+                        print(
+                            f"Newer release results in timeout: {revisions[y - 1]} - {revisions[y]} Workload:{workload} Term: {performance_models_workload.columns[i + 2]}")
+
+                    if confidence_interval_disjoint(case_study.name,
+                                                    plot_data[len(revisions) - 1 - y][i],
+                                                    deviation_values.iloc[len(revisions) - 1 - y][
+                                                        'performance'],
+                                                    plot_data[len(revisions) - y][i],
+                                                    deviation_values.iloc[len(revisions) - y]['performance']):
+                        term_ci_dictionary[revisions[y - 1] + "-" + revisions[y]][0].append(
+                            performance_models_workload.columns[i])
+                        term_ci_dictionary[revisions[y - 1] + "-" + revisions[y]][1] += difference
+
+                # self.changes_distribution[
+                #    int(relevant_column_counter * 100 / (len(performance_models.columns) - 2.0))] += 1
+
+                if terms != "" and terms != performance_models_workload.columns[1]:
+                    term_file.write(f"{workload} -- {revisions[y]}: {terms}\n")
+
+                term_dictionary[revisions[y - 1] + "-" + revisions[y]][1] /= standard_deviation
+        plot_data2 = np.delete(plot_data2, len(revisions) - 1, axis=0)
+        # The following code is only needed for the pervolution renewal
+        term_labels = ['root * blind'] + term_labels[1:]
+        PlotRenderer.submit(PlotRenderer.Heatmap,
+                            os.path.join(path, workload, 'InfluenceDifference', 'influenceDifference.pdf'),
+                            dict(cmap='RdBu_r', symmetric=True, aggregation='extreme', figsize=[18, 8],
+                                 fontsize=fontsize,
+                                 xlabel='Configuration Choice', ylabel='Release',
+                                 yticks=list(range(0, len(revisions))), yticklabels=list(reversed(revisions)),
+                                 ytick_fontsize=20,
+                                 xticks=np.arange(0.5, len(term_labels) + 0.5, step=1.0).tolist(),
+                                 xticklabels=term_labels, xtick_fontsize=20, colorbar_label='Influence Difference [s]',
+                                 extend='both'),
+                            dict(values=plot_data2))
+
+    def write_plot_data(self, matrix: np.array, releases: List[str], terms: List[str], path: str) -> None:
+        # The rows contain the influences of the terms in the given releases (the newest release first)
+        LabeledArray(matrix, [("releases", releases), ("terms", terms)]).store(path)
 
     def replace_terms(self, terms):
         term_replacement_dict = {'root': 'Root', 'lzo': 'LZO', 'auth_sha512': 'SHA512',
@@ -653,11 +848,13 @@ class OptionLevel(AnalysisLevels):
             parent_pos = columns.index(removed_multicollinear_features[current_feature])
             alternative_pos_list: List[int] = list()
             if len(current_feature.alternatives) != 0:
+                # Terms that are not part of the models have no influence
                 for alternative in current_feature.alternatives:
-                    alternative_post = columns.index(alternative)
-                    alternative_pos_list.append(alternative_post)
+                    if alternative in columns:
+                        alternative_post = columns.index(alternative)
+                        alternative_pos_list.append(alternative_post)
                 columns_to_add.append((parent_pos, alternative_pos_list))
-            elif not current_feature.mandatory:
+            elif not current_feature.mandatory and current_feature.name in columns:
                 columns_to_add.append((parent_pos, [columns.index(current_feature.name)]))
 
         # Handle interactions by adding to them the base influence and the influence of parent features
@@ -669,42 +866,28 @@ class OptionLevel(AnalysisLevels):
 
             # Add the base term. Note that there is only one base term.
             for column_to_add, column_list in columns_to_add:
-                if columns.index(terms[0]) in column_list:
+                if terms[0] in columns and columns.index(terms[0]) in column_list:
                     column_list.append(columns.index(column))
                     break
 
             # Add the feature terms afterwards
             feature_columns: List[int] = list()
             for term in terms:
-                feature_columns.append(columns.index(term.strip()))
+                if term.strip() in columns:
+                    feature_columns.append(columns.index(term.strip()))
             columns_to_add_from.append((columns.index(column), feature_columns))
 
         return columns_to_add, columns_to_add_from
 
     def identify_removed_multicollinearity_features(self, case_study: CaseStudy) -> Dict[Feature, str]:
-        # Identify all alternative features and take the first one, since it was removed for multicollinearity
-        removed_multicollinear_features: Dict[Feature, str] = dict()
-        for feature_name in case_study.features:
-            feature = case_study.features[feature_name]
-            if len(feature.alternatives) > 0 and all(
-                    case_study.features[alternative] not in removed_multicollinear_features for alternative in
-                    feature.alternatives):
-                removed_multicollinear_features[feature] = ""
-            elif not feature.mandatory:
-                removed_multicollinear_features[feature] = ""
-        # Identify the parent feature (transitive) that is mandatory and not root
-        # This is the feature that is presumably used in MLR and whose influence has to be added to the other
-        # alternatives.
-        for feature in removed_multicollinear_features:
-            removed_multicollinear_features[feature] = self.find_suitable_parent(case_study, feature)
-        return removed_multicollinear_features
-
-    def find_suitable_parent(self, case_study: CaseStudy, feature: Feature) -> str:
-        parent = feature.parent
-        while case_study.features[parent].parent != "root" and case_study.features[parent].mandatory and len(
-                case_study.features[parent].alternatives) == 0:
-            parent = case_study.features[parent].parent
-        return parent
+        """
+        Returns the features that were removed for multicollinearity (the first feature of each alternative group and
+        the optional features) together with the parent feature (transitive) that is mandatory and not root. This is
+        the feature that is presumably used in MLR and whose influence has to be added to the other alternatives.
+        The mapping is precomputed by the compiled feature model; the returned dictionary may be modified.
+        """
+        return {case_study.features[feature_name]: parent for feature_name, parent in
+                case_study.feature_model.removed_feature_parents.items()}
 
     def column_renaming_for_multicollinearity(self, case_study: CaseStudy) -> Dict[str, str]:
         removed_multicollinear_features = self.identify_removed_multicollinearity_features(case_study)
@@ -0,0 +1,106 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from case_study import CaseStudy
+
+
+class PerformanceModelLearner:
+    """
+    This class learns performance-influence models in-process by forward stepwise regression. It mirrors the settings
+    of SPL Conqueror that are used for the iterative learning (see <code>OptionLevel.create_iterative_learning_jobs</code>):
+    the relative loss function, no epsilon tube, no backward steps, no hierarchy, at most 70 rounds, a minimal
+    improvement of 0.1 per round, and an abort error of 5%.
+    In each round, the candidates are all options and all interactions of a term of the model with an additional
+    option. The candidate that results in the lowest relative error (fitted by least squares) is added to the model.
+    """
+
+    def __init__(self, abort_error: float = 5.0, number_of_rounds: int = 70,
+                 min_improvement_per_round: float = 0.1) -> None:
+        self.abort_error = abort_error
+        self.number_of_rounds = number_of_rounds
+        self.min_improvement_per_round = min_improvement_per_round
+
+    @staticmethod
+    def compute_error(design_matrix: np.ndarray, performance: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        Fits the coefficients by least squares and computes the relative error.
+        :param design_matrix: the matrix containing one column per term
+        :param performance: the measured performance values (not 0)
+        :return: the coefficients and the mean relative error in percent
+        """
+        coefficients = np.linalg.lstsq(design_matrix, performance, rcond=None)[0]
+        prediction = design_matrix @ coefficients
+        return coefficients, float(np.mean(np.abs(prediction - performance) / np.abs(performance)) * 100)
+
+    @staticmethod
+    def get_options_matrix(configurations: pd.DataFrame, options: List[str]) -> Dict[str, np.ndarray]:
+        selection = CaseStudy.get_selection(configurations, options).astype(float)
+        return {option: selection[:, i] for i, option in enumerate(options)}
+
+    def learn(self, configurations: pd.DataFrame, options: List[str], nfp: str) -> Tuple[str, float, List[str]]:
+        """
+        Learns a performance-influence model on the given configurations.
+        :param configurations: the configurations (with a performance different from 0)
+        :param options: the binary options; the first one is the base term, which is always part of the model
+        :param nfp: the nfp to learn
+        :return: the model in the format of SPL Conqueror, its error, and one log line per round
+        """
+        performance = configurations[nfp].to_numpy(dtype=float)
+        option_values = self.get_options_matrix(configurations, options)
+        model: List[Tuple[str, ...]] = [(options[0],)]
+        columns: List[np.ndarray] = [option_values[options[0]]]
+        coefficients, error = self.compute_error(np.column_stack(columns), performance)
+        log: List[str] = [f"0;{self.format_model(model, coefficients)};{error}"]
+        for round_number in range(1, self.number_of_rounds + 1):
+            if error < self.abort_error:
+                break
+            best_candidate = None
+            # Candidates with identical columns are equivalent; only the first one is evaluated
+            seen_columns = {column.tobytes() for column in columns}
+            for term, term_column in zip([()] + model[1:], [None] + columns[1:]):
+                for option in options[1:]:
+                    if option in term:
+                        continue
+                    candidate = tuple(sorted(term + (option,)))
+                    column = option_values[option] if term_column is None else term_column * option_values[option]
+                    if not column.any() or column.tobytes() in seen_columns:
+                        continue
+                    # Interactions that are implied by the feature model (e.g., of a feature with its parent) equal
+                    #  one of their factors
+                    if term_column is not None and (np.array_equal(column, term_column) or
+                                                    np.array_equal(column, option_values[option])):
+                        continue
+                    seen_columns.add(column.tobytes())
+                    candidate_coefficients, candidate_error = self.compute_error(np.column_stack(columns + [column]),
+                                                                                 performance)
+                    if best_candidate is None or candidate_error < best_candidate[3]:
+                        best_candidate = (candidate, column, candidate_coefficients, candidate_error)
+            if best_candidate is None or error - best_candidate[3] < self.min_improvement_per_round:
+                break
+            model.append(best_candidate[0])
+            columns.append(best_candidate[1])
+            coefficients, error = best_candidate[2], best_candidate[3]
+            log.append(f"{round_number};{self.format_model(model, coefficients)};{error}")
+        return self.format_model(model, coefficients), error, log
+
+    def fit(self, configurations: pd.DataFrame, terms: List[List[str]], nfp: str) -> Tuple[str, float]:
+        """
+        Fits the coefficients of the given terms (i.e., the truemodel of SPL Conqueror).
+        :param configurations: the configurations (with a performance different from 0)
+        :param terms: the terms of the model, where each term consists of one or more options
+        :param nfp: the nfp to learn
+        :return: the model in the format of SPL Conqueror and its error
+        """
+        performance = configurations[nfp].to_numpy(dtype=float)
+        option_values = self.get_options_matrix(configurations,
+                                                sorted({option for term in terms for option in term}))
+        columns = [np.prod([option_values[option] for option in term], axis=0) for term in terms]
+        coefficients, error = self.compute_error(np.column_stack(columns), performance)
+        return self.format_model([tuple(term) for term in terms], coefficients), error
+
+    @staticmethod
+    def format_model(model: List[Tuple[str, ...]], coefficients: np.ndarray) -> str:
+        return " + ".join(f"{coefficient!r} * {' * '.join(term)}" for term, coefficient in
+                          zip(model, coefficients.tolist()))
@@ -0,0 +1,362 @@
+#!/bin/env python3
+import copy
+import json
+import os
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class PlotRenderer:
+    """
+    This class renders the plots of the analysis. The analyzers only compute the data of a plot and submit it as a
+    plot specification: the kind of the plot (e.g., a heatmap), the path of the plot file, its parameters (e.g., the
+    labels and the colormap), and its arrays. Depending on the mode, the plot is rendered immediately, rendered by a
+    pool of background processes, stored to be rendered later, or skipped. The plotting libraries are imported
+    only when the first plot is rendered.
+    Stored specifications are written to the directory '.plots' next to the plot file (the parameters as json file
+    and the arrays as npz file) and are rendered by executing this script on the output directory.
+    """
+
+    # The rendering modes
+    Now = "now"
+    Background = "background"
+    Later = "later"
+    Skip = "skip"
+    Modes = [Now, Background, Later, Skip]
+
+    # The kinds of plots
+    Heatmap = "heatmap"
+    Barplot = "barplot"
+    Violin = "violin"
+
+    Mode = Now
+    # The number of processes rendering in the background or rendering the stored plots
+    Processes = 1
+    Plot_Directory = ".plots"
+    Spec_Suffix = ".json"
+    Arrays_Suffix = ".npz"
+    Style = "whitegrid"
+    # The ticks at the bottom are enabled for all plots as the release barplots require them
+    Style_Parameters = {'font.size': 30, 'xtick.bottom': True}
+    # The maximum number of columns of a rasterized heatmap; 0 draws every cell of the heatmaps as vector graphics
+    Raster_Columns = 0
+    Default_Raster_Columns = 1000
+    Raster_Dpi = 150
+
+    # The pool of background processes and the submitted plots of this process
+    executor: ProcessPoolExecutor = None
+    pending: List[Future] = []
+    # The plotting modules once they are imported and styled in this process
+    plotting = None
+
+    @classmethod
+    def get_settings(cls) -> Dict:
+        """
+        :return: the settings of the renderer that are transferred to other processes
+        """
+        return dict(mode=cls.Mode, processes=cls.Processes, raster_columns=cls.Raster_Columns)
+
+    @classmethod
+    def configure(cls, settings: Dict, worker: bool = False) -> None:
+        """
+        Applies the given settings in this process.
+        :param settings: the settings of the renderer
+        :param worker: whether this process is a worker of a process pool; a worker renders the plots itself instead
+        of starting another pool of background processes
+        """
+        if settings['mode'] not in cls.Modes:
+            print(f"Unknown plot mode {settings['mode']}!")
+            exit(-1)
+        cls.Mode = cls.Now if worker and settings['mode'] == cls.Background else settings['mode']
+        cls.Processes = settings['processes']
+        cls.Raster_Columns = settings.get('raster_columns', 0)
+
+    @classmethod
+    def load_plotting(cls) -> Tuple:
+        """
+        Imports matplotlib and seaborn and applies the style of the plots.
+        :return: pyplot and seaborn
+        """
+        if cls.plotting is None:
+            import matplotlib.pyplot as plt
+            import seaborn as sns
+            sns.set_style(cls.Style)
+            plt.rcParams.update(cls.Style_Parameters)
+            cls.plotting = (plt, sns)
+        return cls.plotting
+
+    @classmethod
+    def submit(cls, kind: str, path: str, params: Dict, arrays: Dict[str, np.ndarray] = None) -> None:
+        """
+        Renders the given plot according to the rendering mode.
+        :param kind: the kind of the plot
+        :param path: the path of the plot file
+        :param params: the parameters of the plot; they have to be json-serializable
+        :param arrays: the arrays of the plot
+        """
+        arrays = arrays if arrays is not None else dict()
+        if cls.Mode == cls.Skip:
+            return
+        elif cls.Mode == cls.Later:
+            cls.store(kind, path, params, arrays)
+        elif cls.Mode == cls.Background:
+            if cls.executor is None:
+                cls.executor = ProcessPoolExecutor(max_workers=cls.Processes, initializer=PlotRenderer.configure,
+                                                   initargs=(cls.get_settings(), True))
+            # The plot is transferred asynchronously; thus, the caller may not change the data afterward
+            cls.pending.append(cls.executor.submit(PlotRenderer.render, kind, path, copy.deepcopy(params),
+                                                   {name: np.array(values) for name, values in arrays.items()}))
+        else:
+            cls.render(kind, path, params, arrays)
+
+    @classmethod
+    def wait(cls) -> None:
+        """
+        Waits until all plots that are rendered in the background are written.
+        """
+        pending, cls.pending = cls.pending, []
+        for future in pending:
+            future.result()
+        if cls.executor is not None:
+            cls.executor.shutdown()
+            cls.executor = None
+
+    @classmethod
+    def get_spec_path(cls, path: str) -> str:
+        return os.path.join(os.path.dirname(path), cls.Plot_Directory, os.path.basename(path))
+
+    @classmethod
+    def store(cls, kind: str, path: str, params: Dict, arrays: Dict[str, np.ndarray]) -> None:
+        """
+        Writes the specification of the given plot so that it can be rendered later.
+        """
+        spec_path = cls.get_spec_path(path)
+        os.makedirs(os.path.dirname(spec_path), exist_ok=True)
+        with open(spec_path + cls.Arrays_Suffix, 'wb') as arrays_file:
+            np.savez(arrays_file, **arrays)
+        with open(spec_path + cls.Spec_Suffix, 'w') as spec_file:
+            json.dump(dict(kind=kind, file=os.path.basename(path), params=params, arrays=sorted(arrays.keys())),
+                      spec_file)
+
+    @classmethod
+    def load(cls, spec_path: str) -> Tuple[str, str, Dict, Dict[str, np.ndarray]]:
+        """
+        Reads a stored plot specification.
+        :param spec_path: the path of the json file of the specification
+        :return: the kind, the path of the plot file, the parameters, and the arrays of the plot
+        """
+        with open(spec_path, 'r') as spec_file:
+            spec = json.load(spec_file)
+        with np.load(spec_path[:-len(cls.Spec_Suffix)] + cls.Arrays_Suffix, allow_pickle=False) as arrays_file:
+            arrays = {name: arrays_file[name] for name in spec['arrays']}
+        path = os.path.join(os.path.dirname(os.path.dirname(spec_path)), spec['file'])
+        return spec['kind'], path, spec['params'], arrays
+
+    @classmethod
+    def render(cls, kind: str, path: str, params: Dict, arrays: Dict[str, np.ndarray]) -> None:
+        """
+        Renders the given plot. The plot file is replaced only after it is written completely.
+        """
+        plot_functions = {cls.Heatmap: cls.plot_heatmap, cls.Barplot: cls.plot_barplot, cls.Violin: cls.plot_violin}
+        if kind not in plot_functions:
+            print(f"Unknown kind of plot {kind}!")
+            exit(-1)
+        plt, sns = cls.load_plotting()
+        fig = plot_functions[kind](plt, sns, params, arrays)
+        fig.tight_layout()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}")
+        if cls.Raster_Columns > 0:
+            fig.savefig(temporary_path, format=os.path.splitext(path)[1][1:], dpi=cls.Raster_Dpi)
+        else:
+            fig.savefig(temporary_path, format=os.path.splitext(path)[1][1:])
+        plt.close(fig)
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def bin_columns(values: np.ndarray, number_bins: int, aggregation: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Aggregates adjacent columns of the given matrix into bins of (almost) equal size. Missing values are ignored;
+        a bin without any value is missing.
+        :param values: the matrix
+        :param number_bins: the number of bins; it has to be smaller than the number of columns
+        :param aggregation: 'mean' for the mean of the values or 'extreme' for the value with the greatest magnitude
+        (e.g., for differences, where single changes should remain visible)
+        :return: the binned matrix and the edges of the bins in the coordinates of the columns
+        """
+        edges = np.linspace(0, values.shape[1], number_bins + 1).round().astype(np.int64)
+        starts = edges[:-1]
+        missing = np.isnan(values)
+        if aggregation == 'mean':
+            sums = np.add.reduceat(np.where(missing, 0.0, values), starts, axis=1)
+            counts = np.add.reduceat(~missing, starts, axis=1)
+            binned = np.divide(sums, counts, out=np.full(sums.shape, np.nan), where=counts > 0)
+        elif aggregation == 'extreme':
+            maxima = np.fmax.reduceat(values, starts, axis=1)
+            minima = np.fmin.reduceat(values, starts, axis=1)
+            binned = np.where(np.abs(maxima) >= np.abs(minima), maxima, minima)
+        else:
+            print(f"Unknown aggregation {aggregation}!")
+            exit(-1)
+        return binned, edges
+
+    @staticmethod
+    def plot_heatmap(plt, sns, params: Dict, arrays: Dict[str, np.ndarray]):
+        """
+        Plots the matrix 'values' as heatmap (e.g., the performance of the configurations per release).
+        If the heatmaps are rasterized, the cells are drawn as one image while the axes and labels remain vector
+        graphics; more columns than the raster allows are aggregated into bins (see the parameter 'aggregation').
+        """
+        values = arrays['values']
+        fontsize = params['fontsize']
+        cmap = plt.get_cmap(params['cmap'])
+        if params.get('bad_color') is not None:
+            cmap.set_bad(color=params['bad_color'])
+        fig = plt.figure(figsize=params['figsize'])
+        ax = fig.add_subplot(1, 1, 1)
+        if params.get('symmetric', False):
+            greatest_value = max(abs(np.nanmin(values)), abs(np.nanmax(values)))
+            limits = dict(vmin=-greatest_value, vmax=greatest_value)
+        else:
+            limits = dict()
+        binned = 0 < PlotRenderer.Raster_Columns < values.shape[1]
+        if binned:
+            # The color limits are those of the original values so that the colors do not depend on the binning
+            limits = limits if len(limits) > 0 else dict(vmin=np.nanmin(values), vmax=np.nanmax(values))
+            binned_values, edges = PlotRenderer.bin_columns(values, PlotRenderer.Raster_Columns,
+                                                            params.get('aggregation', 'mean'))
+            cm = ax.pcolormesh(edges, np.arange(values.shape[0] + 1), binned_values, cmap=cmap, rasterized=True,
+                               **limits)
+        elif PlotRenderer.Raster_Columns > 0:
+            cm = ax.pcolormesh(values, cmap=cmap, rasterized=True, **limits)
+        else:
+            cm = ax.pcolormesh(values, cmap=cmap, **limits)
+        if params.get('title') is not None:
+            ax.set_title(params['title'], fontsize=fontsize)
+        ax.set_ylabel(params['ylabel'], fontsize=fontsize)
+        ax.set_xlabel(params['xlabel'], fontsize=fontsize)
+        ax.set_yticks(params['yticks'])
+        if params.get('ytick_fontsize') is not None:
+            ax.set_yticklabels(params['yticklabels'], fontsize=params['ytick_fontsize'])
+        else:
+            ax.set_yticklabels(params['yticklabels'])
+        if params.get('xticks') is None:
+            ax.get_xaxis().set_visible(False)
+        elif binned:
+            # The labels of the single columns cannot be shown for binned columns
+            ax.set_xticks([])
+        else:
+            ax.set_xticks(params['xticks'])
+            ax.set_xticklabels(params['xticklabels'], rotation=45, ha='right', fontsize=params['xtick_fontsize'])
+        cb = fig.colorbar(cm, ax=ax, extend=params.get('extend', 'neither'))
+        cb.set_label(params['colorbar_label'], fontsize=fontsize)
+        cb.ax.tick_params(labelsize=fontsize)
+        return fig
+
+    @staticmethod
+    def plot_barplot(plt, sns, params: Dict, arrays: Dict[str, np.ndarray]):
+        """
+        Plots the given values per label as barplot (e.g., the changes per release).
+        """
+        fig = plt.figure(figsize=params['figsize'])
+        sns.set_color_codes("muted")
+        ax = sns.barplot(x=params['labels'], y=params['values'], color='b')
+        ax.set_ylabel(params['ylabel'], fontsize=params['fontsize'])
+        ax.set_xlabel(params['xlabel'], fontsize=params['fontsize'], labelpad=params.get('xlabel_pad'))
+        if params.get('xtick_rotation') is not None:
+            plt.xticks(rotation=params['xtick_rotation'], ha='right')
+        if params.get('xticks') is not None:
+            plt.xticks(params['xticks'])
+        if params.get('xlim') is not None:
+            ax.set_xlim(*params['xlim'])
+        if params.get('ylim') is not None:
+            ax.set_ylim(params['ylim'])
+        if params.get('twin_xlabel') is not None:
+            # A second x-axis on top of the plot (e.g., the relative values)
+            ax2 = ax.twiny()
+            ax2.set_xlim(*params['twin_xlim'])
+            ax2.set_xlabel(params['twin_xlabel'], fontsize=params['fontsize'], labelpad=params.get('twin_xlabel_pad'))
+            ax2.plot([], [])
+        return fig
+
+    @staticmethod
+    def plot_violin(plt, sns, params: Dict, arrays: Dict[str, np.ndarray]):
+        """
+        Plots the distribution of the array 'values' (e.g., the precision per workload) as violin.
+        """
+        import pandas as pd
+        fig = plt.figure(figsize=params['figsize'])
+        ax = fig.add_subplot(1, 1, 1)
+        ax.set_ylim(params['ylim'])
+        sns.violinplot(data=pd.DataFrame({params['name']: arrays['values']}), y=params['name'], linewidth=3, cut=0)
+        ax.set_ylabel(params['ylabel'])
+        return fig
+
+    @classmethod
+    def find_specs(cls, path: str) -> List[str]:
+        """
+        :param path: the output directory
+        :return: the sorted paths of all stored plot specifications in the given directory
+        """
+        spec_paths = []
+        for root, dirs, file_names in os.walk(path):
+            if os.path.basename(root) == cls.Plot_Directory:
+                spec_paths += [os.path.join(root, file_name) for file_name in file_names
+                               if file_name.endswith(cls.Spec_Suffix)]
+        return sorted(spec_paths)
+
+    @classmethod
+    def render_stored(cls, spec_path: str) -> None:
+        cls.render(*cls.load(spec_path))
+
+    @classmethod
+    def render_directory(cls, path: str) -> int:
+        """
+        Renders all stored plot specifications in the given directory.
+        :param path: the output directory
+        :return: the number of rendered plots
+        """
+        spec_paths = cls.find_specs(path)
+        if cls.Processes > 1:
+            with ProcessPoolExecutor(max_workers=cls.Processes, initializer=PlotRenderer.configure,
+                                     initargs=(cls.get_settings(), True)) as executor:
+                list(executor.map(PlotRenderer.render_stored, spec_paths))
+        else:
+            for spec_path in spec_paths:
+                cls.render_stored(spec_path)
+        return len(spec_paths)
+
+
+def print_usage() -> None:
+    """
+    Prints the usage of the python script.
+    """
+    print("Usage: plot_renderer.py <OutputPath> [Options]")
+    print("OutputPath\t The output directory of an analysis executed with '--plots=later'.")
+    print("Options:")
+    print("--processes=<N>\t The number of processes rendering the plots (default: 1).")
+    print(f"--raster[=<N>]\t Rasterizes the heatmaps and aggregates their columns into at most N columns (default: "
+          f"{PlotRenderer.Default_Raster_Columns}).")
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        print_usage()
+        exit(-1)
+    for argument in sys.argv[2:]:
+        name, _, value = argument.partition("=")
+        if name == "--processes":
+            PlotRenderer.Processes = int(value)
+        elif name == "--raster":
+            PlotRenderer.Raster_Columns = int(value) if value != "" else PlotRenderer.Default_Raster_Columns
+        else:
+            print_usage()
+            exit(-1)
+    print(f"Rendered {PlotRenderer.render_directory(sys.argv[1])} plots.")
+
+
+if __name__ == "__main__":
+    main()
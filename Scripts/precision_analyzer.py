@@ -6,10 +6,9 @@ import numpy
 import numpy as np
 import pandas as pd
 
-import matplotlib.pyplot as plt
-import seaborn as sns
-
+from PerformanceEvolution.bitmap_index import BitmapIndex
 from PerformanceEvolution.case_study import CaseStudy
+from plot_renderer import PlotRenderer
 
 
 class PrecisionAnalyzer:
@@ -19,12 +18,15 @@ class PrecisionAnalyzer:
         self.configurations = None
         # Dict[str (release), Dict[str (workload), List[Tuple[str (options), bool (speed up)]]]]
         self.options = None
+        # The changed configurations of each release and workload indexed by their options
+        self.configuration_indexes: Dict[Tuple[str, str], Tuple[BitmapIndex, np.ndarray, np.ndarray]] = dict()
 
     def perform_analysis(self, path: str, case_study: CaseStudy, models_path: str, input_path: str) -> None:
         with open(os.path.join(input_path, 'changed_configurations_with_direction.json'), 'r') as changed_configurations:
             self.configurations = json.load(changed_configurations)
         with open(os.path.join(input_path, 'changed_options_with_direction.json'), 'r') as changed_options:
             self.options = json.load(changed_options)
+        self.configuration_indexes = dict()
 
         # For each release, workload, and option-level change:
         # Determine the affected configurations on the configuration level
@@ -39,25 +41,14 @@ class PrecisionAnalyzer:
         low_performance = 0
         workloads_confirmed = dict()
         workloads_total = dict()
-        exclude_timeout_configurations = case_study.configurations[case_study.configurations["performance"] != 1800]
         for release in self.options.keys():
             split_release = release.split(" - ")
             for workload in self.options[release]:
-                # Calculate the mean values per workload
-                workload_configurations = exclude_timeout_configurations[
-                    exclude_timeout_configurations["workload"] == workload]
-                mean_performance = (numpy.mean(
-                    workload_configurations[workload_configurations["revision"] == split_release[0]][
-                        "performance"]),
-                                    numpy.mean(workload_configurations[
-                                                   workload_configurations["revision"] == split_release[1]][
-                                                   "performance"]))
-                workload_deviations = case_study.deviations[case_study.deviations["workload"] == workload]
-                mean_deviation = (numpy.mean(
-                    workload_deviations[workload_deviations["revision"] == split_release[0]]["performance"]),
-                                  numpy.mean(workload_deviations[
-                                                 workload_deviations["revision"] == split_release[1]][
-                                                 "performance"]))
+                # Look up the mean values per workload
+                mean_performance = tuple(case_study.get_mean_performance(workload).reindex(split_release)[
+                                             "performance"].tolist())
+                mean_deviation = tuple(case_study.get_mean_deviation(workload).reindex(split_release)[
+                                           "performance"].tolist())
 
                 total_changes += len(self.options[release][workload])
                 if workload not in workloads_confirmed:
@@ -112,14 +103,9 @@ class PrecisionAnalyzer:
         # Retrieve standard deviation for dissertation
         print(f"Standard deviation of precision: {np.std(df['Precision'])}%")
 
-        fig = plt.figure(figsize=(5, 8))
-        ax = fig.add_subplot(1, 1, 1)
-        ax.set_ylim([0, 100])
-        sns.violinplot(data=df, y="Precision", linewidth=3, cut=0)
-        ax.set_ylabel("Precision [%]")
-        fig.tight_layout()
-        fig.savefig(os.path.join(path, 'precision_violin.pdf'))
-        plt.close(fig)
+        PlotRenderer.submit(PlotRenderer.Violin, os.path.join(path, 'precision_violin.pdf'),
+                            dict(name="Precision", ylabel="Precision [%]", figsize=[5, 8], ylim=[0, 100]),
+                            dict(values=np.array(recall_values)))
         # Convert the changes in the configuration level
         with open(os.path.join(path, 'precision_per_workload.tex'), 'w') as tex_file:
             tex_file.write(df.to_latex(index=False, float_format="${:.2f}\\%$".format))
@@ -130,49 +116,61 @@ class PrecisionAnalyzer:
                 return True
         return False
 
+    def compare_releases(self, case_study: CaseStudy, releases: str, workload: str,
+                         term: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compares the configurations of the given workload that contain all options of the term between both
+        releases. The configurations are aligned by their configuration key.
+        :return: the signed changes (older - newer) of the configurations measured in both releases, the keys of the
+        removed configurations, and the keys of the added configurations
+        """
+        measurements: List[pd.Series] = []
+        for release in releases.split(" - "):
+            index = case_study.get_option_index(workload, release)
+            configurations = case_study.configurations.loc[
+                index.get_items(index.select_supersets(term.split(" * ")))]
+            measurements.append(pd.Series(configurations["performance"].to_numpy(dtype=float),
+                                          index=configurations[CaseStudy.Configuration_Key].to_numpy()))
+        older, newer = measurements
+        # As in CaseStudy.build_measurement_lookup, the first row of a configuration key that occurs more than once
+        # is used
+        common_keys, older_positions, newer_positions = np.intersect1d(older.index, newer.index, return_indices=True)
+        changes = older.to_numpy()[older_positions] - newer.to_numpy()[newer_positions]
+        return changes, np.setdiff1d(older.index, newer.index), np.setdiff1d(newer.index, older.index)
+
     def has_change_with_another_metric_or_different_configuration_space(self, case_study: CaseStudy, releases: str,
                                                                         workload: str, term: str, threshold: float,
                                                                         speed_up: bool) -> Tuple[bool, bool, bool]:
-        affected_configurations = case_study.configurations[case_study.configurations["workload"] == workload]
-        for option in term.split(" * "):
-            affected_configurations = affected_configurations[affected_configurations[option] == "1"]
-        split_release = releases.split(" - ")
-        first_release_configurations = affected_configurations[affected_configurations["revision"] == split_release[0]]
-        first_release_configurations.reset_index(inplace=True)
-        second_release_configurations = affected_configurations[affected_configurations["revision"] == split_release[1]]
-        second_release_configurations.reset_index(inplace=True)
-        found = False
-        found_direction = False
-        if len(first_release_configurations) == len(second_release_configurations):
-            for index, row in first_release_configurations.iterrows():
-                change = float(first_release_configurations.loc[index]["performance"]) - float(
-                        second_release_configurations.loc[index]["performance"])
-                if abs(change) > threshold:
-                    found = True
-                    if (speed_up and float(change) < 0) or (not speed_up and float(change) > 0):
-                        found_direction = True
-                        break
-
-        return found, len(first_release_configurations) != len(second_release_configurations), found_direction
+        changes, removed_configurations, added_configurations = self.compare_releases(case_study, releases, workload,
+                                                                                      term)
+        significant = np.abs(changes) > threshold
+        expected_direction = changes < 0 if speed_up else changes > 0
+        return bool(significant.any()), len(removed_configurations) + len(added_configurations) > 0, \
+            bool((significant & expected_direction).any())
+
+    def get_configuration_index(self, release: str, workload: str) -> Tuple[BitmapIndex, np.ndarray, np.ndarray]:
+        """
+        Returns the index of the changed configurations of the given release and workload together with the bitmaps
+        of the configurations that became faster and slower, respectively.
+        """
+        if (release, workload) not in self.configuration_indexes:
+            changes = self.configurations[release][workload]
+            index = BitmapIndex.from_option_sets(changes, [configuration.split(" ") for configuration, change in changes])
+            differences = np.array([float(change) for configuration, change in changes])
+            self.configuration_indexes[(release, workload)] = (index, index.from_mask(differences < 0),
+                                                               index.from_mask(differences > 0))
+        return self.configuration_indexes[(release, workload)]
 
     def is_affected_term_in_configuration_level(self, release: str, workload: str,
                                                 term: str, speed_up: bool = None) -> bool:
         # Filter the configurations from the configuration level corresponding to the term
-        affected_configurations = []
         if release not in self.configurations or workload not in self.configurations[release]:
             return False
-        for configuration, change in self.configurations[release][workload]:
-            configuration_options = configuration.split(" ")
-            # Each option of the term has to be in the current configuration
-            not_found = False
-            for option in term.split(" * "):
-                if option not in configuration_options:
-                    not_found = True
-            if not_found:
-                continue
-            if speed_up is None:
-                affected_configurations.append(configuration)
-            elif (speed_up and float(change) < 0) or (not speed_up and float(change) > 0):
-                affected_configurations.append(configuration)
+        index, faster_configurations, slower_configurations = self.get_configuration_index(release, workload)
+        # Each option of the term has to be in the configuration
+        affected_configurations = index.select_supersets(term.split(" * "))
+        if speed_up is not None:
+            affected_configurations = affected_configurations & (faster_configurations if speed_up
+                                                                 else slower_configurations)
         # If there is overlap, return true
-        return len(affected_configurations) > 0
+        return index.count(affected_configurations) > 0
@@ -1,9 +1,7 @@
 #!/bin/env python3
 
-import matplotlib.pyplot as plt
 import os
 import pandas as pd
-import seaborn as sns
 import sys
 from typing import Dict, List, Tuple
 
@@ -84,6 +82,10 @@ def convert_measurements_file(data: pd.DataFrame, case_study: str) -> pd.DataFra
 
 
 def create_scatter_plot(data: pd.DataFrame, case_study: str, output_directory: str) -> None:
+    # The plotting libraries are only imported if plots are created; the workloads are also used by the analysis
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     plt.rcParams["figure.figsize"] = (8, 5)
     plt.figure()
     data = convert_measurements_file(data, case_study)
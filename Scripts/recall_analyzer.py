@@ -5,10 +5,11 @@ from typing import Dict, List, Tuple
 import pandas as pd
 import numpy as np
 
-import matplotlib.pyplot as plt
-import seaborn as sns
-
+from PerformanceEvolution.array_store import LabeledArray
+from PerformanceEvolution.bitmap_index import BitmapIndex
 from PerformanceEvolution.case_study import CaseStudy
+from plot_renderer import PlotRenderer
+from PerformanceEvolution.term_coverage import TermCoverage
 
 
 class RecallAnalyzer:
@@ -19,6 +20,8 @@ class RecallAnalyzer:
         self.options_with_directions = None
         self.configurations_with_directions = None
         self.affected_configurations_per_term_and_release: Dict[str, Dict[str, Dict[str, float]]] = dict()
+        # The terms of each release and workload indexed by their options
+        self.term_indexes: Dict[str, Dict[str, BitmapIndex]] = dict()
 
     def perform_analysis(self, path: str, case_study: CaseStudy, models_path: str, input_path: str) -> None:
         with open(os.path.join(input_path, 'changed_configurations.json'), 'r') as changed_configurations:
@@ -38,9 +41,11 @@ class RecallAnalyzer:
         all_revision = list(case_study.configurations["revision"].unique())
 
         # First, determine the affected configurations per term
+        term_coverage = TermCoverage(list(performance_models.columns[2:]), case_study.binary_options)
         for revisions in self.configurations:
             first_release = revisions.split(' - ')[0]
             self.affected_configurations_per_term_and_release[revisions] = dict()
+            self.term_indexes[revisions] = dict()
             for workload in self.configurations[revisions]:
                 self.affected_configurations_per_term_and_release[revisions][workload] = dict()
                 current_performance_models = performance_models.loc[
@@ -51,14 +56,12 @@ class RecallAnalyzer:
 
                 # Iterate over all columns (except for the first one) and enter them in the according dictionary
                 for term in current_performance_models.columns[2:]:
-                    affected_configurations = case_study.configurations.loc[
-                        (case_study.configurations['revision'] == first_release) & (
-                                case_study.configurations['workload'] == workload)]
-                    options = term.split(' * ')
-                    for option in options:
-                        affected_configurations = affected_configurations[affected_configurations[option] == '1']
-                    number_configurations = len(affected_configurations)
+                    number_configurations = term_coverage.get_count(case_study.configurations, first_release,
+                                                                    workload, term)
                     self.affected_configurations_per_term_and_release[revisions][workload][term] = number_configurations
+                terms = list(self.affected_configurations_per_term_and_release[revisions][workload].keys())
+                self.term_indexes[revisions][workload] = BitmapIndex.from_option_sets(
+                    terms, [term.split(" * ") for term in terms])
 
         # After determining that, we can search for the most specific term corresponding to a configuration
         total_changed_configurations = 0
@@ -79,7 +82,7 @@ class RecallAnalyzer:
                 for configuration, diff in self.configurations_with_directions[revisions][workload]:
                     affected_terms = self.find_affected_terms(revisions, configuration, workload)
                     for affected_term in affected_terms:
-                        if workload not in self.options[revisions]:
+                        if workload not in self.options.get(revisions, dict()):
                             continue
                         found = False
                         for term, speed_up in self.options_with_directions[revisions][workload]:
@@ -96,33 +99,32 @@ class RecallAnalyzer:
 
             # Ignore direction
             for workload in self.configurations[revisions]:
-                option_infos = np.load(os.path.join(input_path, "..", f"plot_data_{workload}.json"), allow_pickle=True)
+                option_infos = LabeledArray.load(os.path.join(input_path, f"plot_data_{workload}"))
 
                 if workload not in confirmed_changes_per_workload:
                     confirmed_changes_per_workload[workload] = 0
                     total_changes_per_workload[workload] = 0
 
                 total_changed_configurations += len(self.configurations[revisions][workload])
+                deviations_of_configurations = self.get_deviations_of_configurations(
+                    case_study, self.configurations[revisions][workload], revisions, workload)
                 for configuration in self.configurations[revisions][workload]:
                     total_changes_per_workload[workload] += 1
                     affected_terms = self.find_affected_terms(revisions, configuration, workload)
 
                     found = False
                     for affected_term in affected_terms:
-                        if workload in self.options[revisions] and affected_term in self.options[revisions][workload]:
+                        if workload in self.options.get(revisions, dict()) and affected_term in self.options[revisions][workload]:
                             confirmed_changes_per_workload[workload] += 1
                             total_confirmed_changes += 1
                             found = True
                             break
                     if not found:
                         for affected_term in affected_terms:
-                            index_of_affected_term = list(performance_models.columns).index(affected_term) - 2
-                            if abs(option_infos[first_revision_row][index_of_affected_term] -
-                                   option_infos[second_revision_row][
-                                       index_of_affected_term]) > self.get_deviation_of_configuration(case_study,
-                                                                                                      configuration,
-                                                                                                      revisions,
-                                                                                                      workload):
+                            index_of_affected_term = option_infos.get_index("terms", affected_term)
+                            if abs(option_infos.values[first_revision_row][index_of_affected_term] -
+                                   option_infos.values[second_revision_row][
+                                       index_of_affected_term]) > deviations_of_configurations[configuration]:
                                 relevant_change += 1
                                 break
                             elif max(float(performance_models_with_error.loc[
@@ -157,73 +159,33 @@ class RecallAnalyzer:
         # Retrieve standard deviation for dissertation
         print(f"Standard deviation of recall: {np.std(df['Recall'])}%")
 
-        fig = plt.figure(figsize=(5, 8))
-        ax = fig.add_subplot(1, 1, 1)
-        ax.set_ylim([0, 100])
-        sns.violinplot(data=df, y="Recall", linewidth=3, cut=0)
-        ax.set_ylabel("Recall [%]")
-        fig.tight_layout()
-        fig.savefig(os.path.join(path, 'recall_violin.pdf'))
-        plt.close(fig)
+        PlotRenderer.submit(PlotRenderer.Violin, os.path.join(path, 'recall_violin.pdf'),
+                            dict(name="Recall", ylabel="Recall [%]", figsize=[5, 8], ylim=[0, 100]),
+                            dict(values=np.array(recall_values)))
 
         # Convert the changes in the configuration level
         with open(os.path.join(path, 'recall_per_workload.tex'), 'w') as tex_file:
             tex_file.write(df.to_latex(index=False, float_format="${:.2f}\\%$".format))
 
-    def get_deviation_of_configuration(self, case_study: CaseStudy, configuration: str, releases: str,
-                                       workload: str) -> float:
-        configuration_options = configuration.split(" ")
-        split_releases = releases.split(" - ")
-        workload_deviations = case_study.deviations[case_study.deviations["workload"] == workload]
-        workload_performance = case_study.configurations[case_study.configurations["workload"] == workload]
-        workload_deviations = workload_deviations.loc[
-            (workload_deviations["revision"] == split_releases[0]) | (
-                    workload_deviations["revision"] == split_releases[1])]
-        workload_performance = workload_performance.loc[
-            (workload_performance["revision"] == split_releases[0]) | (
-                    workload_performance["revision"] == split_releases[1])]
-        for option in workload_deviations.columns:
-            if option == "revision":
-                break
-            if option in configuration_options or option == "root":
-                workload_deviations = workload_deviations[workload_deviations[option] == "1"]
-                workload_performance = workload_performance[workload_performance[option] == "1"]
-            else:
-                workload_deviations = workload_deviations[workload_deviations[option] == "0"]
-                workload_performance = workload_performance[workload_performance[option] == "0"]
-
-        return 2.0 * max(float(
-            workload_deviations[workload_deviations["revision"] == split_releases[0]]["performance"].iloc[0]) * float(
-            workload_performance[workload_performance["revision"] == split_releases[0]]["performance"].iloc[0]),
-                         float(workload_deviations[workload_deviations["revision"] == split_releases[1]][
-                                   "performance"].iloc[0]) * float(
-                             workload_performance[workload_performance["revision"] == split_releases[1]][
-                                 "performance"].iloc[0]))
+    def get_deviations_of_configurations(self, case_study: CaseStudy, configurations: List[str], releases: str,
+                                         workload: str) -> Dict[str, float]:
+        """
+        Computes the threshold 2 * max(mean * deviation) of both releases for each of the given configurations.
+        """
+        configuration_keys = [case_study.get_configuration_key(configuration.split(" "))
+                              for configuration in configurations]
+        thresholds = []
+        for release in releases.split(" - "):
+            performance, deviation = case_study.get_measurements([workload] * len(configurations),
+                                                                 [release] * len(configurations), configuration_keys)
+            thresholds.append(deviation * performance)
+        return {configuration: 2.0 * max(first, second) for configuration, first, second in
+                zip(configurations, thresholds[0].tolist(), thresholds[1].tolist())}
 
     def find_affected_terms(self, revisions: str, configuration: str, workload: str) -> List[str]:
-        all_terms = self.affected_configurations_per_term_and_release[revisions][workload]
-        selected_options = configuration.split(" ")
-
-        # Search for the most general one
-        affected_terms: Dict[int, List[str]] = dict()
-
-        for term in all_terms.keys():
-            options = term.split(" * ")
-            ignore_term = False
-            for option in options:
-                if option not in selected_options:
-                    ignore_term = True
-                    break
-            if ignore_term:
-                continue
-            number_affected_configurations = int(
-                self.affected_configurations_per_term_and_release[revisions][workload][term])
-            if number_affected_configurations not in affected_terms:
-                affected_terms[number_affected_configurations] = list()
-            affected_terms[number_affected_configurations].append(term)
-
-        result = []
-        for number_affected_configurations in sorted(affected_terms.keys()):
-            for affected_term in affected_terms[number_affected_configurations]:
-                result.append(affected_term)
-        return result
+        term_index = self.term_indexes[revisions][workload]
+        number_affected_configurations = self.affected_configurations_per_term_and_release[revisions][workload]
+
+        # Search for the most general one; the terms are ordered by the number of affected configurations
+        affected_terms = term_index.get_items(term_index.select_subsets(configuration.split(" ")))
+        return sorted(affected_terms, key=lambda term: int(number_affected_configurations[term]))
@@ -0,0 +1,253 @@
+#!/bin/env python3
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from PerformanceEvolution.precision_analyzer import PrecisionAnalyzer
+from PerformanceEvolution.workload_sensitivity import WorkloadSensitivityAnalyzer
+from case_study import CaseStudy
+from configuration_level import ConfigurationLevel
+from option_level import OptionLevel
+from plot_renderer import PlotRenderer
+from recall_analyzer import RecallAnalyzer
+from synthetic_case_study import SyntheticCaseStudy
+from vif_analysis import VIFAnalyzer
+
+import process_workloads
+
+Scripts_Path = os.path.dirname(os.path.abspath(__file__))
+
+
+class ScalingBenchmark:
+    """
+    This class measures how the stages of the analysis scale with the size of a case study. Starting from the base
+    parameters of a synthetic case study, one dimension (e.g., the number of configurations) is multiplied by each
+    factor while all other parameters are kept. For each case study, the wall-clock time and the CPU time of each
+    stage are measured; the plots are skipped, as they are measured separately (see plot_renderer.py).
+    The results are written as json so that the results of different commits can be compared.
+    """
+
+    Stages = ["CaseStudy", "ConfigurationLevel", "OptionLevel", "VIF", "Precision", "Recall", "WorkloadSensitivity"]
+    Dimensions = ["configurations", "workloads", "revisions", "options"]
+    Base_Parameters = dict(options=10, alternative_groups=3, group_size=4, interactions=5, configurations=50,
+                           workloads=8, revisions=6, changes=10, seed=0)
+    Factors = [1, 2, 4]
+    Case_Study_Name = "Synthetic"
+
+    def __init__(self, dimensions: List[str] = None, factors: List[int] = None, repetitions: int = 1,
+                 base_parameters: Dict = None) -> None:
+        """
+        :param dimensions: the parameters of the synthetic case study that are scaled (default: all dimensions)
+        :param factors: the factors by which the dimensions are multiplied
+        :param repetitions: the number of executions of each stage; the minimum of the times is reported
+        :param base_parameters: the parameters of the synthetic case study that are not scaled
+        """
+        self.dimensions = self.Dimensions if dimensions is None else dimensions
+        for dimension in self.dimensions:
+            if dimension not in self.Dimensions:
+                print(f"Unknown dimension {dimension}!")
+                exit(-1)
+        self.factors = self.Factors if factors is None else factors
+        self.repetitions = repetitions
+        self.base_parameters = dict(self.Base_Parameters, **(base_parameters or dict()))
+
+    @staticmethod
+    def get_commit() -> str:
+        try:
+            return subprocess.run(["git", "rev-parse", "HEAD"], cwd=Scripts_Path, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return "unknown"
+
+    @staticmethod
+    def measure(function: Callable, log_file) -> Dict[str, float]:
+        """
+        Executes the given function while its console output is written to the log file.
+        :return: the wall-clock time and the CPU time of this process in seconds
+        """
+        wall_time = time.perf_counter()
+        cpu_time = time.process_time()
+        with redirect_stdout(log_file):
+            function()
+        return dict(wall=time.perf_counter() - wall_time, cpu=time.process_time() - cpu_time)
+
+    def get_stages(self, input_path: str, output_path: str) -> Dict[str, Callable]:
+        """
+        :param input_path: the directory containing the synthetic case study
+        :param output_path: the directory of the outputs of the stages
+        :return: the function executing each stage; the stages have to be executed in order
+        """
+        case_study_path = os.path.join(input_path, self.Case_Study_Name)
+        models_path = os.path.join(case_study_path, "models")
+        state = dict()
+
+        def load_case_study() -> None:
+            state['case_study'] = CaseStudy(self.Case_Study_Name, os.path.join(case_study_path, "FeatureModel.xml"),
+                                            os.path.join(case_study_path, "measurements.csv"),
+                                            os.path.join(case_study_path, "deviations.csv"))
+
+        def run_analysis_level(al) -> None:
+            level_path = os.path.join(output_path, al.name)
+            os.makedirs(os.path.join(level_path, self.Case_Study_Name), exist_ok=True)
+            al.initialize_for_metrics(level_path)
+            al.prepare(state['case_study'], input_path)
+            al.evaluate_metrics(state['case_study'], level_path, input_path)
+            al.generate_plots(state['case_study'], os.path.join(level_path, self.Case_Study_Name), input_path)
+            al.finish(level_path, case_study_path)
+
+        def run_vif() -> None:
+            # As in OptionLevel.optimize_models, the models of each workload and release are optimized
+            case_study = state['case_study']
+            vif_analyzer = VIFAnalyzer(case_study, os.path.join(models_path, "model_base.txt"))
+            model_with_countermeasures = vif_analyzer.apply_multicollinearity_countermeasures()
+            for workload in process_workloads.WORKLOADS[self.Case_Study_Name]:
+                for revision in list(dict.fromkeys(case_study.configurations.revision)):
+                    vif_analyzer.apply_incremental_vif(model_with_countermeasures, case_study.Performance,
+                                                       workload=workload, revision=revision)
+
+        def run_analyzer(name: str, function: Callable) -> None:
+            os.makedirs(os.path.join(output_path, name), exist_ok=True)
+            function(os.path.join(output_path, name))
+
+        models_file = os.path.join(models_path, "models.csv")
+        return {
+            "CaseStudy": load_case_study,
+            "ConfigurationLevel": lambda: run_analysis_level(ConfigurationLevel()),
+            "OptionLevel": lambda: run_analysis_level(OptionLevel()),
+            "VIF": run_vif,
+            "Precision": lambda: run_analyzer("Precision", lambda path: PrecisionAnalyzer().perform_analysis(
+                path, state['case_study'], models_file, case_study_path)),
+            "Recall": lambda: run_analyzer("Recall", lambda path: RecallAnalyzer().perform_analysis(
+                path, state['case_study'], models_file, case_study_path)),
+            "WorkloadSensitivity": lambda: run_analyzer("WorkloadSensitivity",
+                                                        lambda path: WorkloadSensitivityAnalyzer().process_data(
+                                                            state['case_study'], case_study_path, path))
+        }
+
+    def run_case_study(self, parameters: Dict, path: str) -> Dict:
+        """
+        Generates the synthetic case study with the given parameters and measures its stages.
+        :param parameters: the parameters of the synthetic case study
+        :param path: the (empty) directory for the case study and the outputs
+        :return: the parameters, the number of measurements, and the times of the stages
+        """
+        input_path = os.path.join(path, "in")
+        synthetic_case_study = SyntheticCaseStudy(self.Case_Study_Name, **parameters)
+        synthetic_case_study.generate(input_path)
+        times: Dict[str, Dict[str, float]] = dict()
+        with open(os.path.join(path, "benchmark.log"), 'w') as log_file:
+            for repetition in range(self.repetitions):
+                output_path = os.path.join(path, f"out_{repetition}")
+                stages = self.get_stages(input_path, output_path)
+                for stage in self.Stages:
+                    stage_times = self.measure(stages[stage], log_file)
+                    if stage not in times or stage_times['wall'] < times[stage]['wall']:
+                        times[stage] = stage_times
+        return dict(parameters=parameters,
+                    rows=len(synthetic_case_study.configurations) * len(synthetic_case_study.workloads) *
+                    len(synthetic_case_study.revisions),
+                    terms=len(synthetic_case_study.terms), stages=times)
+
+    def run(self) -> Dict:
+        """
+        Measures the stages for each dimension and factor.
+        :return: the results and the environment of the benchmark
+        """
+        PlotRenderer.configure(dict(mode=PlotRenderer.Skip, processes=1))
+        results = []
+        for dimension in self.dimensions:
+            for factor in self.factors:
+                parameters = dict(self.base_parameters)
+                parameters[dimension] = parameters[dimension] * factor
+                path = tempfile.mkdtemp(prefix="scaling_benchmark_")
+                try:
+                    result = self.run_case_study(parameters, path)
+                finally:
+                    shutil.rmtree(path, ignore_errors=True)
+                result.update(dimension=dimension, factor=factor)
+                print(f"{dimension} x{factor} ({result['rows']} measurements): " +
+                      ", ".join(f"{stage} {times['wall']:.2f}s" for stage, times in result['stages'].items()))
+                sys.stdout.flush()
+                results.append(result)
+        return dict(commit=self.get_commit(), python=platform.python_version(), machine=platform.machine(),
+                    processors=os.cpu_count(), timestamp=datetime.now().isoformat(timespec='seconds'),
+                    repetitions=self.repetitions, results=results)
+
+    @staticmethod
+    def compare(previous: Dict, current: Dict) -> None:
+        """
+        Prints the wall-clock times of the stages of both benchmarks and their ratios (current / previous) for the
+        dimensions and factors contained in both.
+        """
+        previous_results = {(result['dimension'], result['factor']): result for result in previous['results']}
+        print(f"Comparison of {current['commit'][:10]} with {previous['commit'][:10]} (wall-clock time):")
+        print("| Dimension | Factor | Stage | Previous | Current | Ratio |")
+        print("| :---: | :---: | :---: | :---: | :---: | :---: |")
+        for result in current['results']:
+            previous_result = previous_results.get((result['dimension'], result['factor']))
+            if previous_result is None or previous_result['parameters'] != result['parameters']:
+                continue
+            for stage, times in result['stages'].items():
+                if stage not in previous_result['stages']:
+                    continue
+                previous_time = previous_result['stages'][stage]['wall']
+                ratio = times['wall'] / previous_time if previous_time > 0 else float("NaN")
+                print(f"| {result['dimension']} | {result['factor']} | {stage} | {previous_time:.3f}s | "
+                      f"{times['wall']:.3f}s | {ratio:.2f} |")
+
+
+def print_usage() -> None:
+    """
+    Prints the usage of the python script.
+    """
+    print("Usage: scaling_benchmark.py <ResultPath> [Options]")
+    print("ResultPath\t The json file the results are written to.")
+    print("Options:")
+    print(f"--dimensions=<D>\t The comma-separated dimensions to scale (default: {','.join(ScalingBenchmark.Dimensions)}).")
+    print(f"--factors=<F>\t\t The comma-separated factors of the dimensions (default: "
+          f"{','.join(map(str, ScalingBenchmark.Factors))}).")
+    print("--repetitions=<N>\t Executes each stage N times and reports the minimum (default: 1).")
+    print("--<Parameter>=<N>\t Overrides a base parameter of the synthetic case study (e.g., --configurations=100; "
+          "see synthetic_case_study.py).")
+    print("--compare=<Path>\t Compares the results with the results of a previous benchmark.")
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        print_usage()
+        exit(-1)
+    options = dict()
+    for argument in sys.argv[2:]:
+        name, _, value = argument.partition("=")
+        if not name.startswith("--") or value == "":
+            print_usage()
+            exit(-1)
+        options[name[2:]] = value
+    dimensions = options.pop("dimensions").split(",") if "dimensions" in options else None
+    factors = [int(factor) for factor in options.pop("factors").split(",")] if "factors" in options else None
+    repetitions = int(options.pop("repetitions", 1))
+    compare_path = options.pop("compare", None)
+    for name in options:
+        if name not in ScalingBenchmark.Base_Parameters:
+            print_usage()
+            exit(-1)
+    benchmark = ScalingBenchmark(dimensions, factors, repetitions,
+                                 {name: int(value) for name, value in options.items()})
+    results = benchmark.run()
+    with open(sys.argv[1], 'w') as result_file:
+        json.dump(results, result_file, indent=1)
+    if compare_path is not None:
+        with open(compare_path, 'r') as previous_file:
+            ScalingBenchmark.compare(json.load(previous_file), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+import process_workloads
+
+
+class SharedMeasurements:
+    """
+    This class publishes the measurements and deviations of a case study once for all worker processes. The columns
+    are encoded (the options, the workload, and the revision as codes of the smallest possible integer type; the
+    performance and the configuration key as numbers) and written as numpy files to a directory in shared memory
+    (/dev/shm if available). Workers attach to the directory by its path and memory-map the files read-only; thus,
+    all workers read the same physical pages and the measurements are neither pickled nor copied per worker.
+    Only the rows of a single workload are decoded into data frames when they are needed.
+    """
+
+    Description_File = "description.json"
+    Shared_Memory_Path = "/dev/shm"
+
+    def __init__(self, path: str, description: Dict, arrays: Dict[str, np.ndarray], owner: bool = False) -> None:
+        """
+        :param path: the directory containing the arrays
+        :param description: the columns and categories of the measurements and deviations
+        :param arrays: the (memory-mapped) arrays
+        :param owner: whether the directory is removed when the measurements are closed
+        """
+        self.path = path
+        self.description = description
+        self.arrays = arrays
+        self.owner = owner
+
+    @staticmethod
+    def encode_frame(frame: pd.DataFrame, prefix: str) -> Tuple[List[Dict], Dict[str, np.ndarray]]:
+        """
+        Encodes the columns of the given data frame.
+        :param frame: the measurements or deviations
+        :param prefix: the prefix of the array names
+        :return: the description of the columns and the encoded arrays
+        """
+        columns: List[Dict] = []
+        arrays: Dict[str, np.ndarray] = dict()
+        for position, column_name in enumerate(frame.columns):
+            array_name = f"{prefix}_{position}"
+            column_values = frame[column_name]
+            if pd.api.types.is_numeric_dtype(column_values.dtype) and not pd.api.types.is_bool_dtype(
+                    column_values.dtype):
+                columns.append(dict(name=column_name, kind='numeric', array=array_name))
+                arrays[array_name] = column_values.to_numpy()
+            else:
+                codes, categories = pd.factorize(column_values)
+                columns.append(dict(name=column_name, kind='category', array=array_name,
+                                   categories=categories.tolist()))
+                arrays[array_name] = codes.astype(np.min_scalar_type(-max(len(categories), 1)))
+        return columns, arrays
+
+    @classmethod
+    def publish(cls, configurations: pd.DataFrame, deviations: pd.DataFrame) -> 'SharedMeasurements':
+        """
+        Writes the encoded measurements and deviations to a new directory in shared memory.
+        :param configurations: the measurements of the case study
+        :param deviations: the deviations of the case study
+        :return: the published measurements; the directory is removed when they are closed
+        """
+        directory = cls.Shared_Memory_Path if os.path.isdir(cls.Shared_Memory_Path) else None
+        path = tempfile.mkdtemp(prefix="measurements_", dir=directory)
+        description: Dict = dict()
+        arrays: Dict[str, np.ndarray] = dict()
+        for name, frame in [("measurements", configurations), ("deviations", deviations)]:
+            columns, frame_arrays = cls.encode_frame(frame, name)
+            description[name] = dict(columns=columns, rows=len(frame))
+            arrays.update(frame_arrays)
+        for array_name, values in arrays.items():
+            np.save(os.path.join(path, f"{array_name}.npy"), values, allow_pickle=False)
+        # Write the description last; it marks the measurements as complete
+        with open(os.path.join(path, cls.Description_File), 'w') as description_file:
+            json.dump(description, description_file)
+        return cls.attach(path, owner=True)
+
+    @classmethod
+    def attach(cls, path: str, owner: bool = False) -> 'SharedMeasurements':
+        """
+        Attaches to the published measurements. The arrays are read-only views of the shared files.
+        :param path: the directory of the published measurements
+        :param owner: whether the directory is removed when the measurements are closed
+        :return: the measurements
+        """
+        if not os.path.exists(os.path.join(path, cls.Description_File)):
+            print(f"No measurements are published in {path}!")
+            exit(-1)
+        with open(os.path.join(path, cls.Description_File), 'r') as description_file:
+            description = json.load(description_file)
+        arrays = {column['array']: np.load(os.path.join(path, f"{column['array']}.npy"), mmap_mode='r',
+                                           allow_pickle=False)
+                  for name in description for column in description[name]['columns']}
+        return cls(path, description, arrays, owner)
+
+    def get_column(self, name: str, column_name: str) -> Dict:
+        for column in self.description[name]['columns']:
+            if column['name'] == column_name:
+                return column
+        print(f"Unknown column {column_name}!")
+        exit(-1)
+
+    def get_rows(self, name: str, workload: str) -> np.ndarray:
+        """
+        :param name: 'measurements' or 'deviations'
+        :param workload: the workload
+        :return: the positions of the rows of the given workload
+        """
+        column = self.get_column(name, process_workloads.WORKLOAD_COLUMN_NAME)
+        if workload not in column['categories']:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(self.arrays[column['array']] == column['categories'].index(workload))
+
+    def get_frame(self, name: str, rows: np.ndarray) -> pd.DataFrame:
+        """
+        Decodes the given rows into a data frame with the columns (and the index) of the original data frame.
+        :param name: 'measurements' or 'deviations'
+        :param rows: the positions of the rows
+        :return: the data frame
+        """
+        data = dict()
+        for column in self.description[name]['columns']:
+            values = self.arrays[column['array']][rows]
+            if column['kind'] == 'category':
+                # The last category is reserved for missing values (code -1)
+                categories = np.empty(len(column['categories']) + 1, dtype=object)
+                categories[:-1] = column['categories']
+                categories[-1] = np.nan
+                values = categories[values]
+            data[column['name']] = values
+        return pd.DataFrame(data, columns=[column['name'] for column in self.description[name]['columns']],
+                            index=rows)
+
+    def get_workload_frames(self, workload: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        :param workload: the workload
+        :return: the measurements and the deviations of the given workload
+        """
+        return (self.get_frame("measurements", self.get_rows("measurements", workload)),
+                self.get_frame("deviations", self.get_rows("deviations", workload)))
+
+    def close(self) -> None:
+        self.arrays = dict()
+        if self.owner:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self) -> 'SharedMeasurements':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,194 @@
+import glob
+import hashlib
+import io
+import json
+import os
+import sys
+from contextlib import redirect_stdout
+from typing import Callable, Dict, List
+
+from stage_profiler import StageProfiler
+
+
+class Tee(io.TextIOBase):
+    """Writes the output to the given stream and records it."""
+
+    def __init__(self, stream) -> None:
+        self.stream = stream
+        self.recorded = io.StringIO()
+
+    def write(self, text: str) -> int:
+        self.stream.write(text)
+        return self.recorded.write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+class Stage:
+    """
+    A stage of the analysis pipeline. The inputs and outputs are file or directory paths and may contain glob
+    patterns. The source files of the stage should be part of the inputs so that a code change invalidates the stage.
+    """
+
+    def __init__(self, name: str, run: Callable[[], None], inputs: List[str], outputs: List[str],
+                 dependencies: List[str] = None, always_run: Callable[[], bool] = None) -> None:
+        self.name = name
+        self.run = run
+        self.inputs = inputs
+        self.outputs = outputs
+        self.dependencies = dependencies if dependencies is not None else []
+        self.always_run = always_run
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class StageGraph:
+    """
+    This class executes the stages of the analysis pipeline in the order of their dependencies. For each executed
+    stage, a manifest with the content hashes of its inputs and outputs as well as its console output is stored.
+    The settings are the options that affect the outputs of the stages (e.g., whether plots are rendered); they are
+    recorded as inputs of each stage. A stage is skipped if neither its inputs, the outputs of its dependencies, nor the
+    settings changed and its outputs are still present; in this case, the recorded console output is printed again.
+    """
+
+    def __init__(self, manifest_path: str, force: bool = False, settings: Dict[str, str] = None) -> None:
+        self.manifest_path = manifest_path
+        self.force = force
+        self.settings = settings if settings is not None else dict()
+        self.stages: Dict[str, Stage] = dict()
+        self.output_hashes: Dict[str, Dict[str, str]] = dict()
+
+    def add_stage(self, stage: Stage) -> None:
+        if stage.name in self.stages:
+            print(f"Stage {stage.name} is defined twice!")
+            exit(-1)
+        self.stages[stage.name] = stage
+
+    @staticmethod
+    def hash_file(path: str) -> str:
+        content_hash = hashlib.sha256()
+        with open(path, 'rb') as input_file:
+            for chunk in iter(lambda: input_file.read(1 << 20), b''):
+                content_hash.update(chunk)
+        return content_hash.hexdigest()
+
+    @staticmethod
+    def expand_paths(patterns: List[str]) -> List[str]:
+        """
+        Expands the glob patterns and directories to the list of contained files.
+        :param patterns: the paths or glob patterns
+        :return: the sorted list of files
+        """
+        files = set()
+        for pattern in patterns:
+            for path in glob.glob(pattern):
+                if os.path.isdir(path):
+                    for root, dirs, file_names in os.walk(path):
+                        files.update(os.path.join(root, file_name) for file_name in file_names)
+                else:
+                    files.add(path)
+        return sorted(files)
+
+    def hash_paths(self, patterns: List[str]) -> Dict[str, str]:
+        return {path: self.hash_file(path) for path in self.expand_paths(patterns)}
+
+    def get_order(self) -> List[Stage]:
+        """
+        Sorts the stages topologically. Independent stages keep the order in which they were added.
+        :return: the list of stages in execution order
+        """
+        order: List[Stage] = []
+        visited: Dict[str, bool] = dict()
+
+        def visit(stage_name: str) -> None:
+            if stage_name not in self.stages:
+                print(f"Unknown stage {stage_name}!")
+                exit(-1)
+            if stage_name in visited:
+                if not visited[stage_name]:
+                    print(f"The stage {stage_name} has a cyclic dependency!")
+                    exit(-1)
+                return
+            visited[stage_name] = False
+            for dependency in self.stages[stage_name].dependencies:
+                visit(dependency)
+            visited[stage_name] = True
+            order.append(self.stages[stage_name])
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def get_manifest_file(self, stage: Stage) -> str:
+        return os.path.join(self.manifest_path, f"{stage.name}.json")
+
+    def get_input_hashes(self, stage: Stage) -> Dict[str, str]:
+        input_hashes = self.hash_paths(stage.inputs)
+        for dependency in stage.dependencies:
+            for path, file_hash in self.output_hashes.get(dependency, dict()).items():
+                input_hashes[f"{dependency}:{path}"] = file_hash
+        for name, value in self.settings.items():
+            input_hashes[f"setting:{name}"] = value
+        return input_hashes
+
+    def load_manifest(self, stage: Stage) -> Dict:
+        if not os.path.exists(self.get_manifest_file(stage)):
+            return None
+        with open(self.get_manifest_file(stage), 'r') as manifest_file:
+            return json.load(manifest_file)
+
+    def is_up_to_date(self, stage: Stage, manifest: Dict, input_hashes: Dict[str, str]) -> bool:
+        if self.force or manifest is None or manifest['inputs'] != input_hashes:
+            return False
+        if stage.always_run is not None and stage.always_run():
+            return False
+        for path, file_hash in manifest['outputs'].items():
+            if not os.path.exists(path) or self.hash_file(path) != file_hash:
+                return False
+        return True
+
+    def run_stage(self, stage: Stage) -> bool:
+        """
+        Executes the given stage unless it is up to date.
+        :param stage: the stage to execute
+        :return: <code>True</code> iff the stage was executed
+        """
+        input_hashes = self.get_input_hashes(stage)
+        manifest = self.load_manifest(stage)
+        if self.is_up_to_date(stage, manifest, input_hashes):
+            print(f"{stage.name}: up to date")
+            sys.stdout.write(manifest['log'])
+            StageProfiler.mark(stage.name, "stage", up_to_date=True)
+            self.output_hashes[stage.name] = manifest['outputs']
+            return False
+
+        tee = Tee(sys.stdout)
+        with redirect_stdout(tee), StageProfiler.profile_stage(stage.name):
+            stage.run()
+        self.output_hashes[stage.name] = self.hash_paths(stage.outputs)
+        os.makedirs(os.path.dirname(self.get_manifest_file(stage)), exist_ok=True)
+        with open(self.get_manifest_file(stage), 'w') as manifest_file:
+            json.dump(dict(inputs=input_hashes, outputs=self.output_hashes[stage.name],
+                           log=tee.recorded.getvalue()), manifest_file, indent=1)
+        return True
+
+    def get_pending_stages(self) -> List[str]:
+        """
+        Determines the stages that would be executed by the next execution without executing any stage.
+        :return: the names of the stages that are not up to date, including the stages depending on them
+        """
+        pending: List[str] = []
+        for stage in self.get_order():
+            manifest = self.load_manifest(stage)
+            if any(dependency in pending for dependency in stage.dependencies) or \
+                    not self.is_up_to_date(stage, manifest, self.get_input_hashes(stage)):
+                pending.append(stage.name)
+            else:
+                self.output_hashes[stage.name] = manifest['outputs']
+        return pending
+
+    def run(self) -> None:
+        for stage in self.get_order():
+            self.run_stage(stage)
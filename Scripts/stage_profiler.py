@@ -0,0 +1,224 @@
+import cProfile
+import glob
+import io
+import json
+import os
+import pstats
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+class StageProfiler:
+    """
+    This class records the wall-clock time, the CPU time (including the CPU time of terminated child processes), and
+    the peak resident set size of the stages of the analysis and of their parts (e.g., the workloads of an analysis
+    level or the VIF analysis of a workload and release) together with the number of rows and terms they process.
+    Every process appends its spans to its own file in the directory '.profile' of the output directory; at the end,
+    the spans of all processes are merged into a trace in the Chrome trace format (trace.json, which can be opened by
+    Perfetto or chrome://tracing) and a summary table (summary.md).
+    Additionally, a single stage can be profiled by cProfile or tracemalloc.
+    """
+
+    # The profilers of a stage
+    CProfile = "cprofile"
+    Tracemalloc = "tracemalloc"
+
+    Profile_Directory = ".profile"
+    Trace_File = "trace.json"
+    Summary_File = "summary.md"
+    # The number of functions and allocation sites listed in the profiles of a stage
+    Profile_Entries = 30
+    # The number of slowest parts of the stages that are printed in addition to the stages
+    Printed_Spans = 10
+
+    Enabled = False
+    Path: str = None
+    # The stage (or the stages with this prefix, e.g., 'Precision') that is profiled by the profiler
+    Profiled_Stage: str = None
+    Profiler: str = None
+
+    @classmethod
+    def get_settings(cls) -> Dict:
+        """
+        :return: the settings of the profiler that are transferred to other processes
+        """
+        return dict(enabled=cls.Enabled, path=cls.Path, profiled_stage=cls.Profiled_Stage, profiler=cls.Profiler)
+
+    @classmethod
+    def configure(cls, settings: Dict, worker: bool = False) -> None:
+        """
+        Applies the given settings in this process.
+        :param settings: the settings of the profiler
+        :param worker: whether this process is a worker; only the main process removes the spans of previous
+        executions
+        """
+        if settings.get('profiler') not in [None, cls.CProfile, cls.Tracemalloc]:
+            print(f"Unknown profiler {settings['profiler']}!")
+            exit(-1)
+        cls.Enabled = settings['enabled']
+        cls.Path = settings['path']
+        cls.Profiled_Stage = settings.get('profiled_stage')
+        cls.Profiler = settings.get('profiler')
+        if (cls.Enabled or cls.Profiler is not None) and not worker:
+            os.makedirs(cls.Path, exist_ok=True)
+            for span_file in glob.glob(os.path.join(cls.Path, "spans_*.jsonl")):
+                os.remove(span_file)
+
+    @staticmethod
+    def get_resources() -> Dict[str, float]:
+        own_usage = resource.getrusage(resource.RUSAGE_SELF)
+        children_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        # On Linux, the maximum resident set size is given in kilobytes
+        return dict(cpu=own_usage.ru_utime + own_usage.ru_stime + children_usage.ru_utime + children_usage.ru_stime,
+                    peak_rss=own_usage.ru_maxrss / 1024.0, children_peak_rss=children_usage.ru_maxrss / 1024.0)
+
+    @classmethod
+    def record(cls, event: Dict) -> None:
+        with open(os.path.join(cls.Path, f"spans_{os.getpid()}.jsonl"), 'a') as span_file:
+            span_file.write(json.dumps(event) + "\n")
+
+    @classmethod
+    @contextmanager
+    def span(cls, name: str, category: str, **counts):
+        """
+        Records the execution of the enclosed block if the profiler is enabled.
+        :param name: the name of the span (e.g., 'ConfigurationLevel/<workload>')
+        :param category: the category of the span (e.g., 'stage' or 'workload')
+        :param counts: the numbers of processed items (e.g., rows=...); further counts can be added to the yielded
+        dictionary within the block
+        """
+        if not cls.Enabled:
+            yield dict()
+            return
+        start_resources = cls.get_resources()
+        start = time.time()
+        wall_start = time.perf_counter()
+        try:
+            yield counts
+        finally:
+            wall_time = time.perf_counter() - wall_start
+            end_resources = cls.get_resources()
+            cls.record(dict(name=name, cat=category, ph="X", ts=int(start * 1e6), dur=int(wall_time * 1e6),
+                            pid=os.getpid(), tid=0,
+                            args=dict(counts, wall=wall_time, cpu=end_resources['cpu'] - start_resources['cpu'],
+                                      peak_rss_mb=end_resources['peak_rss'],
+                                      children_peak_rss_mb=end_resources['children_peak_rss'])))
+
+    @classmethod
+    def mark(cls, name: str, category: str, **arguments) -> None:
+        """
+        Records an instant event (e.g., a stage that is up to date) if the profiler is enabled.
+        """
+        if cls.Enabled:
+            cls.record(dict(name=name, cat=category, ph="i", s="p", ts=int(time.time() * 1e6), pid=os.getpid(),
+                            tid=0, args=arguments))
+
+    @classmethod
+    def get_profile_path(cls, stage: str, suffix: str) -> str:
+        return os.path.join(cls.Path, f"{stage.replace('/', '_')}{suffix}")
+
+    @classmethod
+    @contextmanager
+    def profile_stage(cls, stage: str):
+        """
+        Records the span of the given stage and profiles it by cProfile or tracemalloc if it is the profiled stage.
+        The profile is written to the profile directory (<stage>.prof and <stage>_cprofile.txt or
+        <stage>_tracemalloc.txt).
+        """
+        profiled = cls.Profiler is not None and (stage == cls.Profiled_Stage or
+                                                 stage.startswith(f"{cls.Profiled_Stage}/"))
+        with cls.span(stage, "stage"):
+            if not profiled:
+                yield
+            elif cls.Profiler == cls.CProfile:
+                profile = cProfile.Profile()
+                profile.enable()
+                try:
+                    yield
+                finally:
+                    profile.disable()
+                    profile.dump_stats(cls.get_profile_path(stage, ".prof"))
+                    statistics = io.StringIO()
+                    pstats.Stats(profile, stream=statistics).sort_stats("cumulative").print_stats(
+                        cls.Profile_Entries)
+                    with open(cls.get_profile_path(stage, "_cprofile.txt"), 'w') as profile_file:
+                        profile_file.write(statistics.getvalue())
+            else:
+                tracemalloc.start()
+                try:
+                    yield
+                finally:
+                    snapshot = tracemalloc.take_snapshot()
+                    current, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                    with open(cls.get_profile_path(stage, "_tracemalloc.txt"), 'w') as profile_file:
+                        profile_file.write(f"Current: {current / 2 ** 20:.1f} MB, peak: {peak / 2 ** 20:.1f} MB\n")
+                        for statistic in snapshot.statistics("lineno")[:cls.Profile_Entries]:
+                            profile_file.write(f"{statistic}\n")
+
+    @classmethod
+    def load_events(cls) -> List[Dict]:
+        events = []
+        for span_file_path in sorted(glob.glob(os.path.join(cls.Path, "spans_*.jsonl"))):
+            with open(span_file_path, 'r') as span_file:
+                events += [json.loads(line) for line in span_file if line.strip() != ""]
+        return sorted(events, key=lambda event: event['ts'])
+
+    @staticmethod
+    def summarize(events: List[Dict]) -> List[Dict]:
+        """
+        Aggregates the spans with the same name.
+        :return: the aggregated spans; the stages in the order of their execution, followed by the other spans in
+        descending order of their wall-clock time
+        """
+        summary: Dict[str, Dict] = dict()
+        for event in events:
+            if event['ph'] != "X":
+                continue
+            entry = summary.setdefault(event['name'], dict(name=event['name'], category=event['cat'], count=0,
+                                                           wall=0.0, cpu=0.0, peak_rss_mb=0.0, rows=None,
+                                                           terms=None))
+            entry['count'] += 1
+            entry['wall'] += event['args']['wall']
+            entry['cpu'] += event['args']['cpu']
+            entry['peak_rss_mb'] = max(entry['peak_rss_mb'], event['args']['peak_rss_mb'],
+                                       event['args']['children_peak_rss_mb'])
+            for count in ['rows', 'terms']:
+                if count in event['args']:
+                    entry[count] = (entry[count] or 0) + event['args'][count]
+        stages = [entry for entry in summary.values() if entry['category'] == "stage"]
+        others = sorted([entry for entry in summary.values() if entry['category'] != "stage"],
+                        key=lambda entry: -entry['wall'])
+        return stages + others
+
+    @staticmethod
+    def format_summary(entries: List[Dict]) -> str:
+        lines = ["| Span | Count | Wall [s] | CPU [s] | Peak RSS [MB] | Rows | Terms |",
+                 "| :---: | :---: | :---: | :---: | :---: | :---: | :---: |"]
+        for entry in entries:
+            rows = "" if entry['rows'] is None else str(entry['rows'])
+            terms = "" if entry['terms'] is None else str(entry['terms'])
+            lines.append(f"| {entry['name']} | {entry['count']} | {entry['wall']:.2f} | {entry['cpu']:.2f} | "
+                         f"{entry['peak_rss_mb']:.0f} | {rows} | {terms} |")
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def finish(cls) -> None:
+        """
+        Merges the spans of all processes into the trace and the summary table and prints the summary of the stages
+        and of their slowest parts.
+        """
+        if not cls.Enabled:
+            return
+        events = cls.load_events()
+        with open(os.path.join(cls.Path, cls.Trace_File), 'w') as trace_file:
+            json.dump(dict(traceEvents=events, displayTimeUnit="ms"), trace_file)
+        entries = cls.summarize(events)
+        with open(os.path.join(cls.Path, cls.Summary_File), 'w') as summary_file:
+            summary_file.write(cls.format_summary(entries))
+        stages = [entry for entry in entries if entry['category'] == "stage"]
+        print(f"Profile (trace: {os.path.join(cls.Path, cls.Trace_File)}):")
+        print(cls.format_summary(stages + entries[len(stages):len(stages) + cls.Printed_Spans]), end="")
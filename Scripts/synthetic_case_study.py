@@ -0,0 +1,275 @@
+#!/bin/env python3
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import process_workloads
+
+
+class SyntheticCaseStudy:
+    """
+    This class generates a synthetic case study with the files of a real one: the feature model, the measurements,
+    the deviations, and the performance-influence models (models/models.csv and models/model_base.txt).
+    The feature model consists of the mandatory option 'base', alternative groups of mandatory options that exclude
+    each other, and optional options. The performance of a configuration is given by a performance-influence model
+    of each workload (with the terms 'base', the alternatives except for the first one of each group, the optional
+    options, and interactions of two options) with small measurement noise. The injected changes multiply the
+    influence of a term for some workloads from a release onward; they are written to injected_changes.json.
+    As the workloads of the case studies are listed in process_workloads.WORKLOADS, the workloads of the generated
+    case study are registered there; other scripts (e.g., execute_performance_analysis.py) have to register them as
+    well.
+    """
+
+    Root = "root"
+    Base_Option = "base"
+    Feature_Model_File = "FeatureModel.xml"
+    Measurements_File = "measurements.csv"
+    Deviations_File = "deviations.csv"
+    Models_Directory = "models"
+    Changes_File = "injected_changes.json"
+    # The relative standard deviation of the measurements
+    Noise = 0.005
+    Model_Error = 0.1
+
+    def __init__(self, name: str = "Synthetic", options: int = 10, alternative_groups: int = 3, group_size: int = 4,
+                 interactions: int = 5, configurations: int = 50, workloads: int = 8, revisions: int = 6,
+                 changes: int = 10, seed: int = 0) -> None:
+        """
+        :param name: the name of the case study
+        :param options: the number of optional options
+        :param alternative_groups: the number of alternative groups
+        :param group_size: the number of alternatives per group
+        :param interactions: the number of interactions of two options in the performance-influence models
+        :param configurations: the number of configurations that are measured per workload and release
+        :param workloads: the number of workloads
+        :param revisions: the number of releases
+        :param changes: the number of injected changes
+        :param seed: the seed of the random numbers
+        """
+        if group_size < 2 or revisions < 2 or options + alternative_groups < 1:
+            print("A synthetic case study needs at least two alternatives per group, two releases, and one option!")
+            exit(-1)
+        self.name = name
+        self.parameters = dict(options=options, alternative_groups=alternative_groups, group_size=group_size,
+                               interactions=interactions, configurations=configurations, workloads=workloads,
+                               revisions=revisions, changes=changes, seed=seed)
+        self.random = np.random.default_rng(seed)
+        self.groups = [[f"group{group}_{alternative}" for alternative in range(group_size)]
+                       for group in range(alternative_groups)]
+        self.optional_options = [f"option{option}" for option in range(options)]
+        self.workloads = [f"workload{workload:03d}" for workload in range(workloads)]
+        self.revisions = [f"r{revision:02d}" for revision in range(revisions)]
+        # The options in the order of the feature model with their parents and whether they are optional
+        self.options: List[Tuple[str, str, bool]] = [(self.Root, "", False), (self.Base_Option, self.Root, False)]
+        for group, alternatives in enumerate(self.groups):
+            self.options.append((f"group{group}", self.Root, False))
+            self.options += [(alternative, f"group{group}", False) for alternative in alternatives]
+        self.options += [(option, self.Root, True) for option in self.optional_options]
+        self.option_names = [option for option, parent, optional in self.options]
+
+        self.terms = self.create_terms(interactions)
+        self.configurations = self.sample_configurations(configurations)
+        self.injected_changes: List[Dict] = []
+        self.coefficients = self.create_coefficients(changes)
+
+    def create_terms(self, number_interactions: int) -> List[List[str]]:
+        """
+        :return: the terms of the performance-influence models; the first term is the base term
+        """
+        single_terms = [alternatives[1:] for alternatives in self.groups]
+        candidates = [option for alternatives in single_terms for option in alternatives] + self.optional_options
+        terms = [[self.Base_Option]] + [[option] for option in candidates]
+        interactions = set()
+        for _ in range(number_interactions * 10):
+            if len(interactions) == number_interactions or len(candidates) < 2:
+                break
+            first, second = sorted(self.random.choice(len(candidates), 2, replace=False).tolist())
+            # Two alternatives of the same group are never selected together
+            if first != second and not any(candidates[first] in group and candidates[second] in group
+                                           for group in self.groups):
+                interactions.add((candidates[first], candidates[second]))
+        return terms + [list(interaction) for interaction in sorted(interactions)]
+
+    def sample_configurations(self, number_configurations: int) -> np.ndarray:
+        """
+        Samples distinct valid configurations uniformly.
+        :return: the selection (0 or 1) of the options (in the order of the feature model) of each configuration
+        """
+        group_size = len(self.groups[0]) if len(self.groups) > 0 else 1
+        if number_configurations > group_size ** len(self.groups) * 2 ** len(self.optional_options):
+            print(f"The feature model has less than {number_configurations} configurations!")
+            exit(-1)
+        choices = np.zeros((0, len(self.groups) + len(self.optional_options)), dtype=np.int64)
+        while len(choices) < number_configurations:
+            samples = np.concatenate([self.random.integers(0, group_size, (number_configurations, len(self.groups))),
+                                      self.random.integers(0, 2, (number_configurations,
+                                                                  len(self.optional_options)))], axis=1)
+            choices = np.concatenate([choices, samples])
+            unique_choices, positions = np.unique(choices, axis=0, return_index=True)
+            choices = choices[np.sort(positions)]
+        choices = choices[:number_configurations]
+
+        selections = np.zeros((number_configurations, len(self.option_names)), dtype=np.uint8)
+        selections[:, self.option_names.index(self.Root)] = 1
+        selections[:, self.option_names.index(self.Base_Option)] = 1
+        for group, alternatives in enumerate(self.groups):
+            selections[:, self.option_names.index(f"group{group}")] = 1
+            for position, alternative in enumerate(alternatives):
+                selections[:, self.option_names.index(alternative)] = choices[:, group] == position
+        for position, option in enumerate(self.optional_options):
+            selections[:, self.option_names.index(option)] = choices[:, len(self.groups) + position]
+        return selections
+
+    def create_coefficients(self, number_changes: int) -> np.ndarray:
+        """
+        Creates the influences of the terms and injects the changes.
+        :return: the influences of the terms per workload and release
+        """
+        influences = self.random.uniform(0.1, 5.0, (len(self.workloads), len(self.terms)))
+        influences[:, 0] = self.random.uniform(5.0, 50.0, len(self.workloads))
+        coefficients = np.repeat(influences[:, np.newaxis, :], len(self.revisions), axis=1)
+        for _ in range(number_changes):
+            revision = int(self.random.integers(1, len(self.revisions)))
+            term = int(self.random.integers(1, len(self.terms))) if len(self.terms) > 1 else 0
+            workloads = np.sort(self.random.choice(len(self.workloads),
+                                                   int(self.random.integers(1, len(self.workloads) + 1)),
+                                                   replace=False))
+            factor = float(self.random.uniform(2.0, 5.0))
+            factor = factor if self.random.random() < 0.5 else 1.0 / factor
+            coefficients[workloads, revision:, term] *= factor
+            self.injected_changes.append(dict(term=" * ".join(self.terms[term]),
+                                              releases=f"{self.revisions[revision - 1]} - {self.revisions[revision]}",
+                                              workloads=[self.workloads[workload] for workload in workloads],
+                                              factor=factor))
+        return coefficients
+
+    def get_term_values(self) -> np.ndarray:
+        """
+        :return: the value (0 or 1) of each term for each configuration
+        """
+        values = np.ones((len(self.configurations), len(self.terms)))
+        for position, term in enumerate(self.terms):
+            for option in term:
+                values[:, position] *= self.configurations[:, self.option_names.index(option)]
+        return values
+
+    def write_feature_model(self, path: str) -> None:
+        root = ET.Element("vm", name=self.name)
+        binary_options = ET.SubElement(root, "binaryOptions")
+        for option, parent, optional in self.options:
+            option_node = ET.SubElement(binary_options, "configurationOption")
+            ET.SubElement(option_node, "name").text = option
+            for element in ["outputString", "prefix", "postfix"]:
+                ET.SubElement(option_node, element).text = "\n      "
+            ET.SubElement(option_node, "parent").text = parent if parent != "" else "\n      "
+            ET.SubElement(option_node, "impliedOptions")
+            excluded_options = ET.SubElement(option_node, "excludedOptions")
+            for alternatives in self.groups:
+                if option in alternatives:
+                    for alternative in alternatives:
+                        if alternative != option:
+                            ET.SubElement(excluded_options, "options").text = alternative
+            ET.SubElement(option_node, "optional").text = str(optional)
+        ET.SubElement(root, "numericOptions")
+        ET.indent(root)
+        ET.ElementTree(root).write(path)
+
+    def write_measurements(self, path: str, deviations_path: str) -> None:
+        """
+        Writes the measurements and the deviations of all releases, workloads, and configurations. The rows of both
+        files correspond to each other.
+        """
+        header = ";".join(self.option_names + ["workloads"] + self.workloads + ["revision", "performance"]) + "\n"
+        configurations = [";".join(selection) for selection in self.configurations.astype(str).tolist()]
+        term_values = self.get_term_values()
+        with open(path, 'w') as measurements_file, open(deviations_path, 'w') as deviations_file:
+            measurements_file.write(header)
+            deviations_file.write(header)
+            for revision_position, revision in enumerate(self.revisions):
+                for workload_position, workload in enumerate(self.workloads):
+                    workload_columns = ";".join("1" if position == workload_position else "0"
+                                                for position in range(len(self.workloads)))
+                    performance = term_values @ self.coefficients[workload_position, revision_position]
+                    deviations = np.abs(self.random.normal(0.0, self.Noise, len(performance)))
+                    performance *= 1.0 + self.random.normal(0.0, self.Noise, len(performance))
+                    for configuration, value, deviation in zip(configurations, performance.tolist(),
+                                                               deviations.tolist()):
+                        prefix = f"{configuration};1;{workload_columns};{revision};"
+                        measurements_file.write(f"{prefix}{value:.6f}\n")
+                        deviations_file.write(f"{prefix}{deviation:.6f}\n")
+
+    def write_models(self, path: str) -> None:
+        """
+        Writes the performance-influence models (models.csv) and the terms of the models (model_base.txt).
+        """
+        term_names = [" * ".join(term) for term in self.terms]
+        with open(os.path.join(path, "models.csv"), 'w') as models_file:
+            models_file.write(";".join(["workload", "revision"] + term_names + ["error"]) + "\n")
+            for workload_position, workload in enumerate(self.workloads):
+                for revision_position, revision in enumerate(self.revisions):
+                    coefficients = self.coefficients[workload_position, revision_position].tolist()
+                    models_file.write(";".join([workload, revision] + [f"{value:.6f}" for value in coefficients] +
+                                               [str(self.Model_Error)]) + "\n")
+        with open(os.path.join(path, "model_base.txt"), 'w') as model_file:
+            for term in term_names:
+                model_file.write(term + "\n")
+
+    def generate(self, path: str) -> str:
+        """
+        Writes the case study to the directory of the case study in the given directory and registers its workloads.
+        :param path: the directory containing the case studies
+        :return: the directory of the case study
+        """
+        case_study_path = os.path.join(path, self.name)
+        os.makedirs(os.path.join(case_study_path, self.Models_Directory), exist_ok=True)
+        self.write_feature_model(os.path.join(case_study_path, self.Feature_Model_File))
+        self.write_measurements(os.path.join(case_study_path, self.Measurements_File),
+                                os.path.join(case_study_path, self.Deviations_File))
+        self.write_models(os.path.join(case_study_path, self.Models_Directory))
+        with open(os.path.join(case_study_path, self.Changes_File), 'w') as changes_file:
+            json.dump(dict(parameters=self.parameters, changes=self.injected_changes), changes_file, indent=1)
+        process_workloads.WORKLOADS[self.name] = self.workloads
+        return case_study_path
+
+
+def print_usage() -> None:
+    """
+    Prints the usage of the python script.
+    """
+    print("Usage: synthetic_case_study.py <OutputPath> [Options]")
+    print("OutputPath\t The directory where the directory of the case study is created.")
+    print("Options:")
+    print("--name=<S>\t\t The name of the case study (default: Synthetic).")
+    print("--options=<N>\t\t The number of optional options (default: 10).")
+    print("--alternative_groups=<N>\t The number of alternative groups (default: 3).")
+    print("--group_size=<N>\t The number of alternatives per group (default: 4).")
+    print("--interactions=<N>\t The number of interactions in the models (default: 5).")
+    print("--configurations=<N>\t The number of configurations per workload and release (default: 50).")
+    print("--workloads=<N>\t\t The number of workloads (default: 8).")
+    print("--revisions=<N>\t\t The number of releases (default: 6).")
+    print("--changes=<N>\t\t The number of injected changes (default: 10).")
+    print("--seed=<N>\t\t The seed of the random numbers (default: 0).")
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        print_usage()
+        exit(-1)
+    arguments = dict()
+    for argument in sys.argv[2:]:
+        name, _, value = argument.partition("=")
+        if not name.startswith("--") or value == "":
+            print_usage()
+            exit(-1)
+        arguments[name[2:]] = value if name == "--name" else int(value)
+    case_study = SyntheticCaseStudy(**arguments)
+    print(f"Generated {case_study.generate(sys.argv[1])} with the workloads:")
+    print(" ".join(case_study.workloads))
+
+
+if __name__ == "__main__":
+    main()
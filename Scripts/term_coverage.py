@@ -0,0 +1,58 @@
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from case_study import CaseStudy
+
+
+class TermCoverage:
+    """
+    This class counts the configurations covered by each term (i.e., the configurations selecting all options of the
+    term) for all workloads of a revision at once. The terms are encoded once as a term x option incidence matrix;
+    a configuration covers a term iff the product of its option vector with the row of the term equals the number of
+    options of the term. The counts per workload are the product of the workload indicator matrix with the coverage
+    matrix. The counts of each revision are computed once and shared by all workloads and release pairs.
+    """
+
+    def __init__(self, terms: List[str], options: List[str]) -> None:
+        """
+        :param terms: the terms (e.g., the columns of models.csv)
+        :param options: the binary options of the case study
+        """
+        self.terms = terms
+        self.options = options
+        option_positions = {option: position for position, option in enumerate(options)}
+        self.incidence = np.zeros((len(terms), len(options)), dtype=np.float32)
+        self.term_sizes = np.zeros(len(terms), dtype=np.float32)
+        for i, term in enumerate(terms):
+            for option in set(term.split(" * ")):
+                # Options that are not measured can never be covered since the size of the term is not reached
+                self.term_sizes[i] += 1
+                if option in option_positions:
+                    self.incidence[i, option_positions[option]] = 1
+        self.counts: Dict[str, pd.DataFrame] = dict()
+
+    def get_counts(self, configurations: pd.DataFrame, revision: str) -> pd.DataFrame:
+        """
+        Counts the configurations of the given revision that are covered by each term.
+        :param configurations: the measured configurations of all workloads and revisions
+        :param revision: the revision
+        :return: the number of covered configurations per workload (rows) and term (columns)
+        """
+        if revision not in self.counts:
+            revision_configurations = configurations[configurations['revision'] == revision]
+            selection = CaseStudy.get_selection(revision_configurations, self.options).astype(np.float32)
+            coverage = ((selection @ self.incidence.T) == self.term_sizes).astype(np.float32)
+            codes, workloads = pd.factorize(revision_configurations['workload'])
+            indicator = np.zeros((len(workloads), len(codes)), dtype=np.float32)
+            indicator[codes, np.arange(len(codes))] = 1
+            self.counts[revision] = pd.DataFrame((indicator @ coverage).astype(np.int64), index=workloads,
+                                                 columns=self.terms)
+        return self.counts[revision]
+
+    def get_count(self, configurations: pd.DataFrame, revision: str, workload: str, term: str) -> int:
+        counts = self.get_counts(configurations, revision)
+        if workload not in counts.index:
+            return 0
+        return int(counts.at[workload, term])
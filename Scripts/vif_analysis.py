@@ -3,12 +3,14 @@ import math
 import sys
 import os
 
+import numpy as np
 import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 from patsy.highlevel import dmatrices
 
 from case_study import CaseStudy
+from collinearity_engine import CollinearityEngine
 from feature import Feature
 from statsmodels.stats.outliers_influence import variance_inflation_factor
 
@@ -154,12 +156,15 @@ class VIFAnalyzer:
             data = data[data['workload'] == workload]
 
         dataframe_for_vif = pd.DataFrame(data=data, columns=[model_to_check[0][0], nfp])
+        # Single options are categorical terms (independent of the encoding of the measurements)
+        dataframe_for_vif[model_to_check[0][0]] = dataframe_for_vif[model_to_check[0][0]].astype(str)
         for i in range(1, len(model_to_check)):
             current_model.append(model_to_check[i])
             current_model_string.append('__'.join(model_to_check[i]))
             # Append to the dataframe the needed information
             # The term could consist of one or more terms; therefore, we have to split it
-            dataframe_for_vif[current_model_string[-1]] = self.case_study.configurations[model_to_check[i][0]]
+            dataframe_for_vif[current_model_string[-1]] = self.case_study.configurations[
+                model_to_check[i][0]].astype(str)
             for j in range(1, len(model_to_check[i])):
                 dataframe_for_vif[current_model_string[-1]] = dataframe_for_vif[current_model_string[-1]].astype(int) \
                                                               * self.case_study.configurations[model_to_check[i][j]] \
@@ -197,6 +202,132 @@ class VIFAnalyzer:
             log_file.close()
         return current_model
 
+    def get_term_columns(self, model_to_check: List[List[str]], nfp: str, revision: str = None,
+                         workload: str = None) -> List[Tuple[int, str, str, np.ndarray]]:
+        """
+        Creates the columns of the design matrix for the terms of the given model as patsy would do for
+        <code>apply_iterative_vif</code>: single options are categorical and named '<option>[T.1]', whereas
+        interactions are numerical. Constant single options are dropped from the design matrix; the first one is
+        kept in the model, all further ones are skipped.
+        :param model_to_check: the model to check. It contains in each line a term of the performance-influence model
+        :param nfp: the nfp to investigate
+        :return: the list of (term index, term string, column name, values), where the column name is <code>None</code>
+        for a dropped term that is kept and the values are <code>None</code> for a skipped term
+        """
+        if revision is None:
+            data = self.case_study.configurations
+        else:
+            data = self.case_study.configurations[self.case_study.configurations['revision'] == revision]
+
+        if workload is not None:
+            data = data[data['workload'] == workload]
+        data = data[data[nfp].notna()]
+
+        dropped_terms = 0
+        term_columns = []
+        for i in range(0, len(model_to_check)):
+            term = model_to_check[i]
+            if i == 0:
+                # Only the first option of the first term is considered
+                term_string = '_'.join(term)
+                term_values = CaseStudy.get_selection(data, [term[0]])[:, 0]
+            else:
+                term_string = '__'.join(term)
+                term_values = np.all(CaseStudy.get_selection(data, term), axis=1)
+            categorical = i == 0 or len(term) == 1
+            if categorical and np.all(term_values == term_values[0]):
+                dropped_terms += 1
+                term_columns.append((i, term_string, None, None if dropped_terms > 1 else term_values))
+                continue
+            term_columns.append(
+                (i, term_string, f"{term_string}[T.1]" if categorical else term_string, term_values))
+        return term_columns
+
+    @staticmethod
+    def log_conflict(log_file, term_string: str, conflicting_terms: List[str], vif_value: float) -> None:
+        # Order the conflicts like the columns of patsy: categorical columns precede numerical ones
+        conflicting_terms.sort(key=lambda name: not name.endswith("[T.1]"))
+        print(f"Removing term {term_string} since it is conflicting with {str(conflicting_terms)}")
+        if log_file is not None:
+            log_file.write(f"{term_string} ({vif_value}): {str(conflicting_terms)}\n")
+
+    def apply_incremental_vif(self, model_to_check: List[List[str]], nfp: str, log_path: str = None,
+                              revision: str = None, workload: str = None) -> List[List[str]]:
+        """
+        Applies the iterative VIF analysis by using an incremental collinearity engine. Instead of rebuilding the
+        design matrix and recomputing the VIF of all columns for each additional term, the factorization of the
+        accepted terms is updated. The resulting model and the conflicts that are written to the log file correspond
+        to <code>apply_iterative_vif</code>.
+        :param model_to_check: the model to check. It contains in each line a term of the performance-influence model
+        :param nfp: the nfp to investigate
+        :param log_path: the path to the log file where the conflicts are written
+        :return: A reduced model where all conflicting model are already removed.
+        """
+        if len(model_to_check) < 2:
+            print("The length of the given model is too short (less than 2)")
+            exit(-1)
+        log_file = None
+        if log_path is not None:
+            log_file = open(log_path, 'w')
+
+        term_columns = self.get_term_columns(model_to_check, nfp, revision, workload)
+        engine = CollinearityEngine(len(term_columns[0][3]),
+                                    sum(1 for _, _, column_name, term_values in term_columns
+                                        if column_name is not None and term_values is not None))
+        current_model = []
+        for i, term_string, column_name, term_values in term_columns:
+            if term_values is None:
+                continue
+            if column_name is not None:
+                conflicting_terms, vif_value = engine.add_column(column_name, term_values)
+                if i > 0 and len(conflicting_terms) > 0:
+                    self.log_conflict(log_file, term_string, conflicting_terms, vif_value)
+                    continue
+            current_model.append(model_to_check[i])
+        if log_file is not None:
+            log_file.close()
+        return current_model
+
+    def apply_rank_revealing_pruning(self, model_to_check: List[List[str]], nfp: str, log_path: str = None,
+                                     revision: str = None, workload: str = None) -> List[List[str]]:
+        """
+        Removes the multicollinear terms in one shot. The design matrix of all terms is built once and a
+        rank-revealing decomposition determines the maximal linearly independent subset of the terms in the order of
+        the model. For each dropped term, the terms it depends on are written to the log file in the same format as
+        <code>apply_iterative_vif</code>.
+        :param model_to_check: the model to check. It contains in each line a term of the performance-influence model
+        :param nfp: the nfp to investigate
+        :param log_path: the path to the log file where the conflicts are written
+        :return: A reduced model where all conflicting model are already removed.
+        """
+        if len(model_to_check) < 2:
+            print("The length of the given model is too short (less than 2)")
+            exit(-1)
+
+        term_columns = self.get_term_columns(model_to_check, nfp, revision, workload)
+        columns = [entry for entry in term_columns if entry[2] is not None]
+        matrix = np.column_stack([np.ones(len(term_columns[0][3]))] + [entry[3] for entry in columns])
+        dependencies = CollinearityEngine.find_dependent_columns(
+            [CollinearityEngine.Intercept] + [entry[2] for entry in columns], matrix)
+
+        log_file = None
+        if log_path is not None:
+            log_file = open(log_path, 'w')
+        current_model = []
+        column_number = 0
+        for i, term_string, column_name, term_values in term_columns:
+            if term_values is None:
+                continue
+            if column_name is not None:
+                column_number += 1
+                if i > 0 and column_number in dependencies:
+                    conflicting_terms, vif_value = dependencies[column_number]
+                    self.log_conflict(log_file, term_string, conflicting_terms, vif_value)
+                    continue
+            current_model.append(model_to_check[i])
+        if log_file is not None:
+            log_file.close()
+        return current_model
 
 # Press the green button in the gutter to run the script.
 if __name__ == '__main__':
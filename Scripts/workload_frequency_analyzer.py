@@ -1,9 +1,8 @@
 import json
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
 from typing import Dict
-import pandas as pd
+
+from plot_renderer import PlotRenderer
 
 
 class WorkloadFrequencyAnalyzer:
@@ -33,26 +32,8 @@ class WorkloadFrequencyAnalyzer:
         average /= len(performance_change_frequency.values())
         print(f"Average probability of picking a workload that identifies performance changes: {average * 100}%")
 
-        df = pd.DataFrame(columns=["#Workloads", "Frequency"])
-        df["#Workloads"] = x_axis
-        df["Frequency"] = y_axis
-
-        sns.set_color_codes("muted")
-        plt.figure(figsize=(15, 8))
-        ax = sns.barplot(x="#Workloads", y="Frequency", data=df, color='b')
-
-        fig = ax.get_figure()
-        ax.set_ylabel("Frequency", fontsize=35)
-        ax.set_xlabel("#Workloads", fontsize=35)
-        ax.set_xlim(0, max_workloads + 0.5)
-        plt.xticks(range(0, max_workloads + 1, 10))
-
-        ax2 = ax.twiny()
-        ax2.set_xlim(0, 100)
-        ax2.set_xlabel("Workloads [%]", fontsize=35, labelpad=15)
-        ax2.plot([],[])
-
-        fig.tight_layout()
-        fig.savefig(os.path.join(output_path, 'workloadFrequency.pdf'))
-        plt.close(fig)
-
+        PlotRenderer.submit(PlotRenderer.Barplot, os.path.join(output_path, 'workloadFrequency.pdf'),
+                            dict(labels=list(x_axis), values=y_axis, figsize=[15, 8], xlabel="#Workloads",
+                                 ylabel="Frequency", fontsize=35, xlim=[0, max_workloads + 0.5],
+                                 xticks=list(range(0, max_workloads + 1, 10)), twin_xlabel="Workloads [%]",
+                                 twin_xlim=[0, 100], twin_xlabel_pad=15))
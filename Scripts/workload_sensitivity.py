@@ -1,52 +1,75 @@
 import process_workloads
+from PerformanceEvolution.array_store import SparseLabeledArray
 from PerformanceEvolution.case_study import CaseStudy
 
 import numpy as np
 import os
-import pandas as pd
+import scipy.sparse
 
 
 class WorkloadSensitivityAnalyzer:
+    # The text of the change directions (-1, 0, and 1) in clustering.csv
+    Direction_Labels = np.array(["-1.0", "0.0", "1.0"])
+
     def __init__(self):
         pass
 
+    def read_change_directions(self, input_path: str, workloads: list, number_columns: int) -> scipy.sparse.csr_matrix:
+        """
+        Reads the sparse configuration-level changes of all workloads into one sparse matrix.
+        :param input_path: the directory containing the sparse_configuration_difference_* files
+        :param workloads: the workloads in the order of the rows
+        :param number_columns: the number of columns (configurations x release pairs)
+        :return: a sparse (workload x (release pair, configuration)) matrix of the change directions (-1 or 1)
+        """
+        rows, columns, directions = [], [], []
+        for workload_pos, workload in enumerate(workloads):
+            changes = SparseLabeledArray.load(
+                os.path.join(input_path, f"sparse_configuration_difference_{workload}")).values
+            changes = changes.tocoo()
+            # The releases are concatenated; each change is encoded by its direction (-1 or 1)
+            rows.append(np.full(changes.nnz, workload_pos))
+            columns.append(changes.row.astype(np.int64) * changes.shape[1] + changes.col)
+            directions.append(np.sign(changes.data))
+        return scipy.sparse.csr_matrix((np.concatenate(directions), (np.concatenate(rows), np.concatenate(columns))),
+                                       shape=(len(workloads), number_columns))
+
+    def write_clustering_file(self, change_directions: scipy.sparse.csr_matrix, workloads: list, path: str) -> None:
+        """
+        Writes the change directions in the csv format; the rows are written one after another.
+        """
+        with open(os.path.join(path, "clustering.csv"), 'w') as heatmap_file:
+            heatmap_file.write(",".join(["workload"] + [str(i) for i in range(change_directions.shape[1])]) + "\n")
+            for workload_pos, workload in enumerate(workloads):
+                row = change_directions.getrow(workload_pos).toarray().ravel().astype(np.int64)
+                heatmap_file.write(",".join([workload] + self.Direction_Labels[row + 1].tolist()) + "\n")
+
+    @staticmethod
+    def count_change_directions(change_directions: scipy.sparse.csr_matrix) -> int:
+        """
+        :return: the number of distinct change directions (i.e., regression or improvement) summed over all columns
+        """
+        return int(np.count_nonzero((change_directions > 0).sum(axis=0)) +
+                   np.count_nonzero((change_directions < 0).sum(axis=0)))
+
     def process_data(self, case_study: CaseStudy, input_path: str, path: str) -> None:
         workloads = process_workloads.WORKLOADS[str(case_study.name)]
         releases = sorted(list(case_study.configurations["revision"].unique()))
         number_configs = int(len(case_study.configurations[case_study.configurations['revision'] == releases[-1]]) / len(workloads))
-        heatmap_data = np.zeros((len(workloads), number_configs * (len(releases) - 1)))
-        for workload in workloads:
-            workload_pos = workloads.index(workload)
-            changes_data = np.load(os.path.join(input_path, f"configuration_difference_{workload}"), allow_pickle=True)
-            for release in range(len(changes_data)):
-                for config_number in range(len(changes_data[release])):
-                    if changes_data[release][config_number] < 0:
-                        heatmap_data[workload_pos][release * len(changes_data[release]) + config_number] = -1
-                    elif changes_data[release][config_number] > 0:
-                        heatmap_data[workload_pos][release * len(changes_data[release]) + config_number] = 1
-                    else:
-                        heatmap_data[workload_pos][release * len(changes_data[release]) + config_number] = 0
-
-        df = pd.DataFrame(heatmap_data)
-        df.index = workloads
-        df.index.names = ['workload']
-        with open(os.path.join(path, "clustering.csv"), 'w') as heatmap_file:
-            heatmap_file.write(df.to_csv())
-
-        all_changes = 0
-        found_number_changes = 0
-        # For each term and release
-        for i in df.columns:
-            performance_changes = list(df[i].unique())
-            # Remove 0 since this indicates no performance change
-            if 0 in performance_changes:
-                performance_changes.remove(0)
-            all_changes += len(performance_changes)
-            # Locate airport_p07airport2p2 and termesopt18strips_p18
-            relevant_workloads = ['airport_p07airport2p2', 'satellite_p06pfile6', 'termesopt18strips_p18', 'mprime_prob02', 'logistics98_prob31', 'organicsynthesissplitopt18strips_p01', 'visitallopt11strips_problem06full', 'woodworkingopt08strips_p24', 'floortileopt11strips_optp01002', 'trucksstrips_p08']
-            found_changes = list(df.loc[relevant_workloads][i].unique())
-            if 0 in found_changes:
-                found_changes.remove(0)
-            found_number_changes += len(found_changes)
+        change_directions = self.read_change_directions(input_path, workloads,
+                                                        number_configs * (len(releases) - 1))
+        self.write_clustering_file(change_directions, workloads, path)
+
+        # For each term and release, count the change directions (0 indicates no performance change)
+        all_changes = self.count_change_directions(change_directions)
+        # Locate airport_p07airport2p2 and termesopt18strips_p18
+        relevant_workloads = ['airport_p07airport2p2', 'satellite_p06pfile6', 'termesopt18strips_p18', 'mprime_prob02', 'logistics98_prob31', 'organicsynthesissplitopt18strips_p01', 'visitallopt11strips_problem06full', 'woodworkingopt08strips_p24', 'floortileopt11strips_optp01002', 'trucksstrips_p08']
+        # Other case studies (e.g., synthetic ones) do not contain all of these workloads
+        relevant_workloads = [workload for workload in relevant_workloads if workload in workloads]
+        found_number_changes = self.count_change_directions(
+            change_directions[[workloads.index(workload) for workload in relevant_workloads]])
 
+        if all_changes == 0:
+            print("Found changes by clusters: 0 out of 0")
+            return
         print(f"Found changes by clusters: {found_number_changes} out of {all_changes} ({found_number_changes * 1.0 / all_changes * 100.0}%)")